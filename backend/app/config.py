@@ -19,6 +19,58 @@ class Settings:
     MODEL_DIR: str = os.getenv("MODEL_DIR", os.path.join(BASE_DIR, "data", "models"))
     EMBEDDING_DIR: str = os.getenv("EMBEDDING_DIR", os.path.join(BASE_DIR, "data", "embeddings"))
 
+    # Vector Store
+    # Memory budget for tenant shards kept resident by the similarity engine (LRU beyond this)
+    VECTOR_SHARD_CACHE_MB: int = int(os.getenv("VECTOR_SHARD_CACHE_MB", 512))
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 2048))
+    # Background compaction rewrites a shard once this fraction of its vectors are deleted
+    VECTOR_COMPACTION_DEAD_RATIO: float = float(os.getenv("VECTOR_COMPACTION_DEAD_RATIO", 0.2))
+    VECTOR_COMPACTION_INTERVAL_SECONDS: int = int(os.getenv("VECTOR_COMPACTION_INTERVAL_SECONDS", 60))
+    # Segment storage: flat (float32, exact), fp16, sq8 or pq (compressed codes + exact re-ranking)
+    VECTOR_STORAGE: str = os.getenv("VECTOR_STORAGE", "flat").lower()
+    VECTOR_PQ_SUBQUANTIZERS: int = int(os.getenv("VECTOR_PQ_SUBQUANTIZERS", 96))
+    # sq8/pq shortlist this many candidates per result before exact re-ranking
+    VECTOR_RERANK_FACTOR: int = int(os.getenv("VECTOR_RERANK_FACTOR", 10))
+    # Rows per chunk when a node warms its shards from the clause_embeddings table
+    CLAUSE_EMBEDDING_CHUNK_SIZE: int = int(os.getenv("CLAUSE_EMBEDDING_CHUNK_SIZE", 1000))
+    # New clauses this close (cosine, same clause type) to an indexed one become references to it
+    VECTOR_DEDUP_THRESHOLD: float = float(os.getenv("VECTOR_DEDUP_THRESHOLD", 0.97))
+    # Most matches a threshold (range) search will page through for one query
+    VECTOR_RANGE_SEARCH_MAX_RESULTS: int = int(os.getenv("VECTOR_RANGE_SEARCH_MAX_RESULTS", 10000))
+    # Sentence encoder: torch (reference), int8, onnx or onnx-int8; 0 threads = library default
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+    EMBEDDING_THREADS: int = int(os.getenv("EMBEDDING_THREADS", 0))
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+    # Clause template clustering (cluster_clauses.py): k is capped per clause type, clauses below
+    # this cosine to their template count as outliers, and k-means refits once a scope doubles
+    CLAUSE_CLUSTER_MAX_K: int = int(os.getenv("CLAUSE_CLUSTER_MAX_K", 50))
+    CLAUSE_OUTLIER_SIMILARITY: float = float(os.getenv("CLAUSE_OUTLIER_SIMILARITY", 0.75))
+    CLAUSE_CLUSTER_REFIT_GROWTH: float = float(os.getenv("CLAUSE_CLUSTER_REFIT_GROWTH", 2.0))
+
+    # Risk model training: feature-store extraction runs in ML_FEATURE_WORKERS processes (0 = one per
+    # core) over chunks of ML_FEATURE_CHUNK_SIZE contracts; from ML_EXTERNAL_MEMORY_ROWS labelled
+    # contracts XGBoost trains from a page iterator instead of one matrix. Every full fit is scored on
+    # (and never trained on) the first ML_HOLDOUT_MAX_ROWS contracts with id % 5 == 0, the same holdout
+    # that gates warm starts; that is ~20% of the labelled contracts until the bucket outgrows the cap,
+    # and bucket contracts past the cap are trained on
+    ML_FEATURE_WORKERS: int = int(os.getenv("ML_FEATURE_WORKERS", 0))
+    ML_FEATURE_CHUNK_SIZE: int = int(os.getenv("ML_FEATURE_CHUNK_SIZE", 200))
+    ML_EXTERNAL_MEMORY_ROWS: int = int(os.getenv("ML_EXTERNAL_MEMORY_ROWS", 1000000))
+    ML_HOLDOUT_MAX_ROWS: int = int(os.getenv("ML_HOLDOUT_MAX_ROWS", 100000))
+    # Warm-start retraining: when at most ML_INCREMENTAL_MAX_FRACTION of the labelled contracts are new or
+    # changed since the serving model, boost ML_INCREMENTAL_ROUNDS more trees on just those; the update is
+    # dropped for a full fit if holdout accuracy falls by more than ML_INCREMENTAL_MAX_ACCURACY_DROP, and
+    # after ML_INCREMENTAL_MAX_CHAIN warm starts in a row
+    ML_INCREMENTAL_ROUNDS: int = int(os.getenv("ML_INCREMENTAL_ROUNDS", 20))
+    ML_INCREMENTAL_MAX_FRACTION: float = float(os.getenv("ML_INCREMENTAL_MAX_FRACTION", 0.2))
+    ML_INCREMENTAL_MAX_ACCURACY_DROP: float = float(os.getenv("ML_INCREMENTAL_MAX_ACCURACY_DROP", 0.02))
+    ML_INCREMENTAL_MAX_CHAIN: int = int(os.getenv("ML_INCREMENTAL_MAX_CHAIN", 5))
+    # Risk model registry (versioned artifacts + CURRENT pointer) on disk shared by every worker;
+    # each worker polls CURRENT and hot-reloads (0 disables polling)
+    MODEL_REGISTRY_DIR: str = os.getenv("MODEL_REGISTRY_DIR", os.path.join(MODEL_DIR, "registry"))
+    MODEL_REGISTRY_KEEP_VERSIONS: int = int(os.getenv("MODEL_REGISTRY_KEEP_VERSIONS", 10))
+    MODEL_RELOAD_INTERVAL_SECONDS: float = float(os.getenv("MODEL_RELOAD_INTERVAL_SECONDS", 5))
+
     # Feature Flags
     ENABLE_FORECASTING: bool = os.getenv("ENABLE_FORECASTING", "true").lower() == "true"
     ENABLE_RISK_MODEL: bool = os.getenv("ENABLE_RISK_MODEL", "true").lower() == "true"
@@ -1,25 +1,50 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, Float, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, Float, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
 
 class ClauseEmbedding(Base):
+    """
+    Durable source of truth for the clause vector store.
+    Row ids double as FAISS vector ids, so any node can rebuild its shards from this table.
+    """
     __tablename__ = "clause_embeddings"
-    
+
     id = Column(Integer, primary_key=True, index=True)
     clause_text = Column(Text, nullable=False)
     clause_type = Column(String, index=True)
-    
-    # Vector embedding stored as JSON (Postgres) or specialized vector type if using pgvector extension
-    # embedding = Column(JSON) 
-    
+
+    # Raw little-endian float32 vector (embedding_dim * 4 bytes), L2-normalized
+    embedding = Column(LargeBinary, nullable=True)
+    embedding_dim = Column(Integer, nullable=True)
+    model_version = Column(String, nullable=True)
+    # sha1 of the clause text, for change detection and duplicate lookups
+    content_hash = Column(String(40), nullable=True, index=True)
+
+    # NULL company_id = shared public clause library
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True, index=True)
     source_contract_id = Column(Integer, ForeignKey("contracts.id"), nullable=True, index=True)
+    source_contract = Column(String, nullable=True)
+    # Every contract that contains this clause ([{contract_id, source_contract}]); the
+    # source_contract columns above hold the first of them
+    sources = Column(JSON, default=list)
+    reference_count = Column(Integer, default=1)
+    risk_level = Column(String, nullable=True)
     tags = Column(JSON, default=list)
-    
+
+    # Template cluster within (company_id, clause_type), set by the offline clustering job;
+    # cluster_similarity is the cosine to the cluster centroid (low = deviating wording)
+    cluster_id = Column(Integer, ForeignKey("clause_clusters.id"), nullable=True, index=True)
+    cluster_similarity = Column(Float, nullable=True)
+
+    # Closest entry of the standard clause library and 1 - cosine to it, scored at ingestion
+    standard_clause_id = Column(String, nullable=True)
+    standard_deviation = Column(Float, nullable=True)
+
     # Statistics for usage analysis
     similarity_count = Column(Integer, default=0)
     average_similarity = Column(Float, default=0.0)
-    
+
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -29,4 +54,36 @@ class ClauseEmbedding(Base):
     # Composite index for faster filtering during vector search
     __table_args__ = (
         Index('ix_clause_type_contract', 'clause_type', 'source_contract_id'),
-    )
\ No newline at end of file
+        # Streaming a tenant's rows in id order when warming its shard
+        Index('ix_clause_embeddings_company_id_id', 'company_id', 'id'),
+        # Outlier lookups: least typical clauses of a tenant first
+        Index('ix_clause_embeddings_company_cluster_similarity', 'company_id', 'cluster_similarity'),
+    )
+
+
+class ClauseCluster(Base):
+    """
+    One clause template: a k-means centroid over a tenant's clauses of one clause_type.
+    Written by the clustering job, so cluster stats are table reads rather than vector scans.
+    """
+    __tablename__ = "clause_clusters"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True, index=True)
+    clause_type = Column(String, index=True)
+
+    # Little-endian float32, L2-normalized
+    centroid = Column(LargeBinary, nullable=False)
+    embedding_dim = Column(Integer, nullable=False)
+    model_version = Column(String, nullable=True)
+
+    size = Column(Integer, default=0)
+    mean_similarity = Column(Float, default=0.0)
+    outlier_count = Column(Integer, default=0)
+    # Clause closest to the centroid, shown as the template's canonical wording
+    representative_clause_id = Column(Integer, nullable=True)
+    # Clauses in scope when k-means last ran in full; a full refit happens once the scope outgrows it
+    fitted_on = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary
+from app.database import Base
+from datetime import datetime
+
+class ContractFeatures(Base):
+    """
+    Feature store for the risk model: one extracted feature vector per contract.
+    A row is current while its schema_version matches FEATURE_SCHEMA_VERSION and its
+    content_hash matches the contract, so training never re-parses unchanged contracts.
+    """
+    __tablename__ = "contract_features"
+
+    contract_id = Column(Integer, ForeignKey("contracts.id", ondelete="CASCADE"), primary_key=True)
+    schema_version = Column(Integer, nullable=False, index=True)
+    # sha1 of every contract field the extractor reads (text, clauses, entities, dates)
+    content_hash = Column(String(40), nullable=False)
+
+    # Little-endian float32 in ContractFeatureExtractor.feature_names_for_schema() order
+    features = Column(LargeBinary, nullable=False)
+    feature_count = Column(Integer, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
 
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.models.contract import Contract
 from app.models.sla import SLAEvent
 from app.models.vendor import Vendor
@@ -19,6 +19,7 @@ from app.services.ner_service import extract_entities
 from app.services.summary_service import generate_contract_summary
 from app.services.alert_service import get_contract_alerts
 from app.services.ai_loader import nlp_classifier, risk_model, similarity_engine
+from app.services.ml_models.feature_store import ContractFeatureStore
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/contracts", tags=["Contracts"])
@@ -26,6 +27,9 @@ router = APIRouter(prefix="/contracts", tags=["Contracts"])
 UPLOAD_DIR = "uploaded_contracts"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Risk-model features are stored at upload so retraining never re-parses this contract
+feature_store = ContractFeatureStore(SessionLocal)
+
 class SLAEventCreate(BaseModel):
     metric_name: str
     value: float
@@ -96,8 +100,8 @@ def upload_contract(
             risk_level = risk_result.get("predicted_risk_level", "UNKNOWN")
             risk_score = risk_result.get("risk_score", 50)
             
-            if "top_contributing_features" in risk_result:
-                risk_reasons = [f['feature'] for f in risk_result["top_contributing_features"]]
+            # Per-contract attributions, e.g. "contains_unlimited: +12.345" (risk-score points)
+            risk_reasons = risk_model.risk_reasons(risk_result)
         except Exception as e:
             logger.warning(f"Risk prediction failed, falling back to defaults: {e}")
             
@@ -123,19 +127,33 @@ def upload_contract(
         db.add(contract)
         db.commit()
         db.refresh(contract)
+
+        try:
+            feature_store.put(contract, db)
+        except Exception as e:
+            logger.error(f"Feature store update failed for contract {contract.id}: {e}")
         
         # 6. Vector Indexing ONLY after successful DB save to prevent orphan vectors
-        if similarity_engine and clauses:
+        if similarity_engine:
             try:
-                for c_type, texts in clauses.items():
-                    for text in texts:
-                        similarity_engine.add_clause_to_database(
-                            clause_text=text,
-                            clause_type=c_type,
-                            source_contract=contract_name,
-                            risk_level=risk_level,
-                            tags=[current_user.company.name if current_user.company else "public"]
-                        )
+                # One encode and one index publish for the whole contract
+                similarity_engine.add_clauses_to_database(
+                    [(text, c_type) for c_type, texts in clauses.items() for text in texts],
+                    source_contract=contract_name,
+                    risk_level=risk_level,
+                    tags=[current_user.company.name if current_user.company else "public"],
+                    company_id=current_user.company_id,
+                    contract_id=contract.id
+                )
+
+                # Document-level vector for "find similar contracts"
+                similarity_engine.index_contract(
+                    contract_id=contract.id,
+                    text=extracted_text[:15000],
+                    company_id=contract.company_id,
+                    contract_name=contract_name,
+                    risk_level=risk_level
+                )
                 similarity_engine._save_data()
             except Exception as e:
                 logger.error(f"Vector DB Indexing warning: {e}")
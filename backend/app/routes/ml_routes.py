@@ -1,23 +1,63 @@
+import os
 import logging
-from fastapi import APIRouter, HTTPException, Depends, Body, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Body, Query, status
 from typing import Dict, Any
 
-from app.database import get_db 
+from app.config import settings
 from app.models.user import User
 from app.routes.auth import get_current_user
 from app.services.ai_loader import risk_model
-from app.services.ml_models.train_model import train_model_on_existing_data
+from app.services.ml_models.train_model import run_training_job
+from app.services.ml_models.training_jobs import TrainingJobManager
+from app.schemas.ml_schema import BatchRiskPredictionRequest
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/ml", tags=["Machine Learning"])
 
+# Retraining runs off the request threads, one job at a time across workers; job records live
+# next to the model registry so every worker can report on them
+training_jobs = TrainingJobManager(
+    lambda progress, mode: run_training_job(risk_model, progress, mode),
+    jobs_dir=os.path.join(settings.MODEL_REGISTRY_DIR, "jobs")
+)
+
 @router.get("/model/info")
 def get_model_info(current_user: User = Depends(get_current_user)):
     if not risk_model:
         return {"status": "Model not loaded"}
     return risk_model.get_model_info()
 
+@router.get("/models")
+def list_model_versions(current_user: User = Depends(get_current_user)):
+    """Published risk model versions, newest first, with their metrics and training data size"""
+    if not risk_model:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Risk model not loaded")
+    return {
+        "current_version": risk_model.registry.current_version(),
+        "serving_version": risk_model.get_model_info()["model_version"],
+        "versions": risk_model.registry.list()
+    }
+
+@router.post("/models/{version}/activate")
+def activate_model_version(
+    version: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Makes a published version current on every worker, e.g. to roll back a bad retrain"""
+    if current_user.role not in ["super_admin", "company_admin", "admin"]:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Not authorized to change the serving model")
+    if not risk_model:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Risk model not loaded")
+    try:
+        risk_model.activate(version)
+    except ValueError as e:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, str(e))
+    except Exception as e:
+        logger.error(f"Model activation failed for {version}: {e}", exc_info=True)
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Model activation failed")
+    logger.info(f"Risk model {version} activated by {current_user.email}")
+    return {"status": "success", "info": risk_model.get_model_info()}
+
 @router.post("/predict/risk")
 def predict_contract_risk(
     contract_data: Dict[str, Any] = Body(...),
@@ -32,11 +72,32 @@ def predict_contract_risk(
         logger.error(f"Risk prediction failed: {e}", exc_info=True)
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Prediction failed during processing")
 
-@router.post("/train")
+@router.post("/predict/risk/batch")
+def predict_contract_risk_batch(
+    request: BatchRiskPredictionRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Portfolio scoring: one feature matrix and one model call for all contracts, results in request order."""
+    if not risk_model:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Risk model not loaded")
+    try:
+        predictions = risk_model.predict_batch(request.contracts)
+        return {"status": "success", "count": len(predictions), "predictions": predictions}
+    except Exception as e:
+        logger.error(f"Batch risk prediction failed: {e}", exc_info=True)
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Batch prediction failed during processing")
+
+@router.post("/train", status_code=status.HTTP_202_ACCEPTED)
 def train_model_endpoint(
-    db: Session = Depends(get_db),
+    mode: str = Query("auto", pattern="^(auto|full|incremental)$"),
     current_user: User = Depends(get_current_user)
 ):
+    """
+    Starts retraining in the background and returns at once; poll GET /ml/train/jobs/{job_id}.
+    The current model keeps serving until the new one is saved and swapped in.
+    mode=auto warm-starts from the current model when few contracts changed and refits
+    otherwise; full always refits; incremental only warm-starts.
+    """
     if current_user.role not in ["super_admin", "company_admin", "admin"]:
         logger.warning(f"Unauthorized ML training attempt by {current_user.email}")
         raise HTTPException(status.HTTP_403_FORBIDDEN, "Not authorized to trigger model retraining")
@@ -45,30 +106,37 @@ def train_model_endpoint(
         raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Risk model not loaded")
 
     try:
-        logger.info(f"ML Retraining initiated by {current_user.email}")
-        result = train_model_on_existing_data(risk_model_instance=risk_model, db_session=db)
-        
-        # Check the exact status returned by the model
-        if result and result.get("status") == "success":
-            logger.info("Model retrained successfully")
-            return {
-                "status": "success", 
-                "message": "Model retrained successfully", 
-                "info": risk_model.get_model_info(),
-                "metrics": {
-                    "train_accuracy": result.get("train_accuracy"),
-                    "test_accuracy": result.get("test_accuracy")
-                }
-            }
-        else:
-            # Safely pass the abort message back to the frontend
-            reason = result.get("message", "Insufficient training data") if result else "Training aborted"
-            logger.info(f"Model training skipped: {reason}")
-            return {
-                "status": "skipped", 
-                "message": reason
-            }
-            
-    except Exception as e:
-        logger.error(f"Model training failed: {e}", exc_info=True)
-        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Training failed due to internal error")
\ No newline at end of file
+        job, created = training_jobs.submit(requested_by=current_user.email, mode=mode)
+    except RuntimeError as e:
+        logger.warning(f"ML Retraining request by {current_user.email} not started: {e}")
+        raise HTTPException(status.HTTP_409_CONFLICT, "Retraining is already starting on another worker")
+    if created:
+        logger.info(f"ML Retraining job {job.id} ({mode}) queued by {current_user.email}")
+    return {
+        "status": job.status,
+        "message": "Retraining started" if created else "Retraining already in progress",
+        "job_id": job.id,
+        "job": job.to_dict()
+    }
+
+@router.get("/train/jobs")
+def list_training_jobs(current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["super_admin", "company_admin", "admin"]:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Not authorized to view training jobs")
+    return {"jobs": [job.to_dict() for job in training_jobs.list()]}
+
+@router.get("/train/jobs/{job_id}")
+def get_training_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role not in ["super_admin", "company_admin", "admin"]:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Not authorized to view training jobs")
+
+    job = training_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Training job not found")
+    response = job.to_dict()
+    if job.status == "succeeded":
+        response["info"] = risk_model.get_model_info()
+    return response
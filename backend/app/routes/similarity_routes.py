@@ -8,15 +8,50 @@ from app.models.contract import Contract
 from app.models.user import User
 from app.routes.auth import get_current_user
 from app.database import get_db
+from app.schemas.similarity_schema import BatchSearchRequest
+from app.services.vector_store.clustering import cluster_stats, outlier_clauses
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/similarity", tags=["Similarity Search"])
 
+def resolve_search_tenant(current_user: User, company_id: Optional[int]) -> Optional[int]:
+    """Only the Super Admin may search another tenant's shard; everyone else is pinned to their own."""
+    if current_user.role == "super_admin":
+        return company_id
+    return current_user.company_id
+
 @router.get("/database/stats")
-def get_stats(current_user: User = Depends(get_current_user)):
+def get_stats(
+    company_id: Optional[int] = Query(None),
+    current_user: User = Depends(get_current_user)
+):
     if not similarity_engine:
         return {"status": "AI Engine Offline"}
-    return similarity_engine.get_database_stats()
+    return similarity_engine.get_database_stats(company_id=resolve_search_tenant(current_user, company_id))
+
+@router.get("/clusters")
+def get_cluster_stats(
+    clause_type: Optional[str] = Query(None),
+    company_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Clause templates per clause type, as of the last clustering job run"""
+    return cluster_stats(db, resolve_search_tenant(current_user, company_id), clause_type)
+
+@router.get("/clusters/outliers")
+def get_outlier_clauses(
+    clause_type: Optional[str] = Query(None),
+    max_similarity: float = Query(settings.CLAUSE_OUTLIER_SIMILARITY, ge=0.0, le=1.0),
+    limit: int = Query(50, ge=1, le=500),
+    company_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Clauses (and the contracts containing them) that deviate most from their template"""
+    results = outlier_clauses(db, resolve_search_tenant(current_user, company_id), max_similarity, clause_type, limit)
+    return {"results": results}
 
 @router.post("/search")
 def search_clauses(
@@ -24,25 +59,193 @@ def search_clauses(
     clause_type: Optional[str] = Query(None),
     top_k: int = 10,
     min_similarity: float = 0.7,
+    include_public: bool = True,
+    company_id: Optional[int] = Query(None),
+    search_mode: str = Query("vector", pattern="^(vector|hybrid)$"),
     current_user: User = Depends(get_current_user)
 ):
     if not similarity_engine:
         raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Similarity engine offline")
 
     try:
-        # Note: In a fully strict multi-tenant environment, you would also pass 
-        # current_user.company.name to the similarity_engine to filter the vector search.
+        # 🔒 Tenant Isolation: only the caller's shard (plus the shared public library) is scanned
         results = similarity_engine.find_similar_clauses(
             query_text=query,
             clause_type=clause_type,
             top_k=top_k,
-            similarity_threshold=min_similarity
+            similarity_threshold=min_similarity,
+            company_id=resolve_search_tenant(current_user, company_id),
+            include_public=include_public,
+            search_mode=search_mode
         )
         return {"results": results}
     except Exception as e:
         logger.error(f"Vector search failed: {e}", exc_info=True)
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Search failed during processing")
 
+@router.post("/search/range")
+def search_clauses_above_threshold(
+    query: str,
+    min_similarity: float = Query(0.85, ge=0.5, le=1.0),
+    clause_type: Optional[str] = Query(None),
+    risk_level: Optional[str] = Query(None),
+    include_public: bool = True,
+    company_id: Optional[int] = Query(None),
+    page_size: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Compliance sweeps: every clause at or above `min_similarity`, paged with `next_cursor`
+    instead of guessing `top_k`.
+    """
+    if not similarity_engine:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Similarity engine offline")
+
+    try:
+        return similarity_engine.find_clauses_above_threshold(
+            query_text=query,
+            similarity_threshold=min_similarity,
+            clause_type=clause_type,
+            filter_by_risk=risk_level,
+            company_id=resolve_search_tenant(current_user, company_id),
+            include_public=include_public,
+            page_size=page_size,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e))
+    except Exception as e:
+        logger.error(f"Range search failed: {e}", exc_info=True)
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Search failed during processing")
+
+@router.post("/search/batch")
+def search_clauses_batch(
+    request: BatchSearchRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk clause search for audit jobs: one encoder pass and one FAISS search per shard for all queries."""
+    if not similarity_engine:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Similarity engine offline")
+
+    try:
+        batch_results = similarity_engine.find_similar_clauses_batch(
+            query_texts=request.queries,
+            clause_type=request.clause_type,
+            top_k=request.top_k,
+            similarity_threshold=request.min_similarity,
+            company_id=resolve_search_tenant(current_user, request.company_id),
+            include_public=request.include_public,
+            search_mode=request.search_mode
+        )
+        return {
+            "results": [
+                {"query": query, "results": results}
+                for query, results in zip(request.queries, batch_results)
+            ]
+        }
+    except Exception as e:
+        logger.error(f"Batch vector search failed: {e}", exc_info=True)
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Batch search failed during processing")
+
+@router.get("/contracts/{contract_id}/similar")
+def find_similar_contracts(
+    contract_id: int,
+    top_k: int = Query(5, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not similarity_engine:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Similarity engine offline")
+
+    contract = db.query(Contract).filter(Contract.id == contract_id).first()
+    if not contract:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Contract not found")
+
+    # 🔒 Tenant Isolation: results come from the contract's own tenant shard only
+    if current_user.role != "super_admin" and contract.company_id != current_user.company_id:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Access denied. Contract belongs to another tenant.")
+
+    try:
+        results = similarity_engine.find_similar_contracts(
+            contract_id=contract.id,
+            text=contract.raw_text[:15000] if contract.raw_text else "",
+            company_id=contract.company_id,
+            top_k=top_k,
+            contract_name=contract.contract_name,
+            risk_level=contract.risk_level
+        )
+        return {"contract_id": contract.id, "contract_name": contract.contract_name, "similar_contracts": results}
+    except Exception as e:
+        logger.error(f"Similar contract lookup failed: {e}", exc_info=True)
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Similar contract search failed")
+
+@router.get("/contracts/{contract_id}/deviations")
+def get_clause_deviations(
+    contract_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """How far each of a contract's clauses strays from the closest standard clause (0 = verbatim)"""
+    if not similarity_engine:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Similarity engine offline")
+
+    contract = db.query(Contract).filter(Contract.id == contract_id).first()
+    if not contract:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Contract not found")
+    if current_user.role != "super_admin" and contract.company_id != current_user.company_id:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Access denied. Contract belongs to another tenant.")
+
+    try:
+        clauses = similarity_engine.contract_clause_deviations(contract.id, company_id=contract.company_id)
+        return {"contract_id": contract.id, "contract_name": contract.contract_name, "clauses": clauses}
+    except Exception as e:
+        logger.error(f"Clause deviation lookup failed: {e}", exc_info=True)
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Deviation lookup failed")
+
+@router.delete("/contracts/{contract_id}/vectors")
+def remove_contract_vectors(
+    contract_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Removes a contract's clause and document vectors, e.g. before it is deleted or re-analysed."""
+    if current_user.role not in ["super_admin", "company_admin", "admin"]:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Not authorized to modify the vector store")
+    if not similarity_engine:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Similarity engine offline")
+
+    contract = db.query(Contract).filter(Contract.id == contract_id).first()
+    if not contract:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Contract not found")
+    if current_user.role != "super_admin" and contract.company_id != current_user.company_id:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Access denied. Contract belongs to another tenant.")
+
+    try:
+        removed = similarity_engine.remove_contract(contract.id, company_id=contract.company_id)
+        return {"contract_id": contract.id, "removed_clauses": removed}
+    except Exception as e:
+        logger.error(f"Vector removal failed for contract {contract_id}: {e}", exc_info=True)
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Vector removal failed")
+
+@router.delete("/tenants/{company_id}")
+def remove_tenant_vectors(
+    company_id: int,
+    current_user: User = Depends(get_current_user)
+):
+    """Drops a departing tenant's entire vector shard"""
+    if current_user.role != "super_admin":
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Only Super Admin can remove a tenant's vector store")
+    if not similarity_engine:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Similarity engine offline")
+
+    try:
+        similarity_engine.remove_tenant(company_id)
+        return {"company_id": company_id, "status": "removed"}
+    except Exception as e:
+        logger.error(f"Vector store removal failed for tenant {company_id}: {e}", exc_info=True)
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Tenant vector removal failed")
+
 @router.post("/compare/contracts")
 def compare_contracts(
     contract1_id: int,
@@ -69,11 +272,13 @@ def compare_contracts(
         text1 = c1.raw_text[:15000] if c1.raw_text else ""
         text2 = c2.raw_text[:15000] if c2.raw_text else ""
 
+        comparison = similarity_engine.compare_contract_records(c1.id, text1, c2.id, text2)
+
         return {
             "contract1": c1.contract_name,
             "contract2": c2.contract_name,
-            "overall_comparison": similarity_engine.compare_contracts(text1, text2, "overall"),
-            "clause_comparison": similarity_engine.compare_contracts(text1, text2, "clauses"),
+            "overall_comparison": comparison["overall"],
+            "clause_comparison": comparison["clauses"],
             "risk_comparison": {
                 "contract1_risk": c1.risk_level,
                 "contract2_risk": c2.risk_level
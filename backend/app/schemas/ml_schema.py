@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any
+
+class BatchRiskPredictionRequest(BaseModel):
+    # Same shape as the /ml/predict/risk body: raw_text, extracted_clauses, entities, start_date, end_date
+    contracts: List[Dict[str, Any]] = Field(..., min_length=1, max_length=1000)
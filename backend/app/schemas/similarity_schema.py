@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=500)
+    clause_type: Optional[str] = None
+    top_k: int = Field(10, ge=1, le=100)
+    min_similarity: float = 0.7
+    include_public: bool = True
+    company_id: Optional[int] = None
+    # "vector" (embeddings only) or "hybrid" (BM25 + vector, fused by reciprocal rank)
+    search_mode: str = Field("vector", pattern="^(vector|hybrid)$")
@@ -37,16 +37,44 @@ class AIServices:
 
         # 2. Load Risk Model
         try:
+            from app.config import settings
             from app.services.ml_models.risk_model import RiskPredictionModel
-            self.risk_model = RiskPredictionModel()
+            from app.services.ml_models.model_registry import ModelRegistry
+            self.risk_model = RiskPredictionModel(
+                feature_workers=settings.ML_FEATURE_WORKERS,
+                registry=ModelRegistry(settings.MODEL_REGISTRY_DIR, keep_versions=settings.MODEL_REGISTRY_KEEP_VERSIONS)
+            )
+            # Models retrained by any worker reach this one within the polling interval
+            if settings.MODEL_RELOAD_INTERVAL_SECONDS > 0:
+                self.risk_model.start_watching(settings.MODEL_RELOAD_INTERVAL_SECONDS)
             logger.info("✅ XGBoost Risk Model Loaded")
         except Exception as e:
             logger.error(f"⚠️ Risk Model Failed: {e}", exc_info=True)
 
         # 3. Load Vector DB
         try:
+            from app.config import settings
+            from app.database import SessionLocal
             from app.services.similarity_service import ContractSimilarityEngine
-            self.similarity_engine = ContractSimilarityEngine()
+            from app.services.vector_store.clause_store import ClauseEmbeddingStore
+            from app.services.vector_store.segment import VectorStorage
+            self.similarity_engine = ContractSimilarityEngine(
+                shard_cache_mb=settings.VECTOR_SHARD_CACHE_MB,
+                query_cache_size=settings.QUERY_EMBEDDING_CACHE_SIZE,
+                compaction_dead_ratio=settings.VECTOR_COMPACTION_DEAD_RATIO,
+                compaction_interval_seconds=settings.VECTOR_COMPACTION_INTERVAL_SECONDS,
+                clause_store=ClauseEmbeddingStore(SessionLocal, chunk_size=settings.CLAUSE_EMBEDDING_CHUNK_SIZE),
+                vector_storage=VectorStorage(
+                    mode=settings.VECTOR_STORAGE,
+                    pq_m=settings.VECTOR_PQ_SUBQUANTIZERS,
+                    rerank_factor=settings.VECTOR_RERANK_FACTOR
+                ),
+                dedup_threshold=settings.VECTOR_DEDUP_THRESHOLD,
+                range_search_max_results=settings.VECTOR_RANGE_SEARCH_MAX_RESULTS,
+                encoder_backend=settings.EMBEDDING_BACKEND,
+                encoder_threads=settings.EMBEDDING_THREADS,
+                encoder_batch_size=settings.EMBEDDING_BATCH_SIZE
+            )
             logger.info("✅ Vector Database (FAISS) Loaded")
         except Exception as e:
             logger.error(f"⚠️ Similarity Engine Failed: {e}", exc_info=True)
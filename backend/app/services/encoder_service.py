@@ -0,0 +1,206 @@
+import os
+import logging
+import numpy as np
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+ENCODER_BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+
+# Fixed clauses every optimized backend must embed like the reference model before it is used
+PARITY_SENTENCES = [
+    "Either party may terminate this Agreement upon thirty (30) days' prior written notice.",
+    "Customer shall pay all undisputed invoices within thirty days of receipt.",
+    "The Vendor shall make the Services available 99.9% of the time in each calendar month.",
+    "Neither party shall be liable for any indirect or consequential damages.",
+    "This Agreement shall be governed by the laws of the State of New York.",
+    "All intellectual property rights in the deliverables shall vest in the Customer.",
+    "Confidential Information shall not be disclosed to any third party.",
+    "Late fee",
+]
+
+# Below this many sentences a process pool costs more to start than it saves
+MIN_POOL_SENTENCES = 2000
+
+
+class SentenceEncoder:
+    """
+    Sentence-transformer wrapper with a choice of CPU inference backend.
+
+    torch:     eager PyTorch fp32 (the reference)
+    int8:      PyTorch dynamic int8 quantization of the Linear layers
+    onnx:      the transformer exported once to ONNX and run by ONNX Runtime, pooled in numpy
+    onnx-int8: the same ONNX graph with dynamically quantized int8 weights
+
+    Optimized backends must reproduce the reference embeddings of PARITY_SENTENCES to
+    `parity_min_cosine`; otherwise the encoder logs the mismatch and falls back to torch, so
+    stored vectors stay interchangeable whichever backend a worker runs.
+    """
+
+    def __init__(self, model_name: str, backend: str = "torch", threads: int = 0, batch_size: int = 32, cache_dir: str = "app/data/embeddings/encoders", parity_min_cosine: float = 0.99):
+        if backend not in ENCODER_BACKENDS:
+            raise ValueError(f"Unknown encoder backend '{backend}' (expected one of {ENCODER_BACKENDS})")
+        self.model_name = model_name
+        self.requested_backend = backend
+        self.backend = "torch"
+        self.threads = threads
+        self.batch_size = batch_size
+        self.cache_dir = cache_dir
+        self.parity_min_cosine = parity_min_cosine
+        self.parity_cosine: Optional[float] = None
+
+        from sentence_transformers import SentenceTransformer
+        # The fp32 model is always kept: it is the parity reference and runs the process pool
+        self.reference = SentenceTransformer(model_name, device="cpu")
+        self._quantized = None
+        self._session = None
+        if threads > 0:
+            import torch
+            torch.set_num_threads(threads)
+
+        if backend != "torch":
+            try:
+                self._load_backend(backend)
+                self.parity_cosine = self.parity()
+                if self.parity_cosine < parity_min_cosine:
+                    raise ValueError(f"parity cosine {self.parity_cosine:.4f} < {parity_min_cosine}")
+                self.backend = backend
+                logger.info(f"✅ Encoder backend '{backend}' active (parity cosine {self.parity_cosine:.4f})")
+            except Exception as e:
+                logger.error(f"Encoder backend '{backend}' unavailable, falling back to torch: {e}", exc_info=True)
+                self._quantized = self._session = None
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.reference.get_sentence_embedding_dimension()
+
+    # --- Backends ---
+
+    def _load_backend(self, backend: str):
+        if backend == "int8":
+            import torch
+            self._quantized = torch.quantization.quantize_dynamic(self.reference, {torch.nn.Linear}, dtype=torch.qint8)
+            return
+
+        import onnxruntime as ort
+        path = self._export_onnx(quantize=backend == "onnx-int8")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.threads > 0:
+            options.intra_op_num_threads = self.threads
+            options.inter_op_num_threads = 1
+        self._session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self._input_names = [i.name for i in self._session.get_inputs()]
+
+        pooling = self.reference[1]
+        if not getattr(pooling, "pooling_mode_mean_tokens", False) and not getattr(pooling, "pooling_mode_cls_token", False):
+            raise ValueError("ONNX backend supports mean or CLS pooling only")
+        self._cls_pooling = bool(getattr(pooling, "pooling_mode_cls_token", False))
+        self._normalize = any(type(module).__name__ == "Normalize" for module in self.reference)
+
+    def _export_onnx(self, quantize: bool) -> str:
+        """Exports the transformer once per model (and its int8 variant); later loads reuse the files"""
+        import torch
+        model_dir = os.path.join(self.cache_dir, self.model_name.replace("/", "__"))
+        fp32_path = os.path.join(model_dir, "model.onnx")
+        int8_path = os.path.join(model_dir, "model.int8.onnx")
+        os.makedirs(model_dir, exist_ok=True)
+
+        if not os.path.exists(fp32_path):
+            transformer = self.reference[0].auto_model
+            sample = self.reference.tokenizer(["export"], return_tensors="pt")
+            names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+
+            class _Exportable(torch.nn.Module):
+                def __init__(self, model):
+                    super().__init__()
+                    self.model = model
+
+                def forward(self, *inputs):
+                    return self.model(**dict(zip(names, inputs)))[0]
+
+            tmp = f"{fp32_path}.{os.getpid()}.tmp"
+            torch.onnx.export(
+                _Exportable(transformer).eval(), tuple(sample[n] for n in names), tmp,
+                input_names=names, output_names=["last_hidden_state"], opset_version=14,
+                dynamic_axes={**{n: {0: "batch", 1: "sequence"} for n in names}, "last_hidden_state": {0: "batch", 1: "sequence"}}
+            )
+            os.replace(tmp, fp32_path)
+            logger.info(f"Exported {self.model_name} to ONNX at {fp32_path}")
+
+        if not quantize:
+            return fp32_path
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            tmp = f"{int8_path}.{os.getpid()}.tmp"
+            quantize_dynamic(fp32_path, tmp, weight_type=QuantType.QInt8)
+            os.replace(tmp, int8_path)
+        return int8_path
+
+    # --- Encoding ---
+
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        batch_size = batch_size or self.batch_size
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype='float32')
+        if self._session is not None:
+            return self._encode_onnx(texts, batch_size)
+        model = self._quantized if self._quantized is not None else self.reference
+        return np.asarray(model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False), dtype='float32')
+
+    def encode_reference(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.reference.encode(texts, batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False), dtype='float32')
+
+    def _encode_onnx(self, texts: List[str], batch_size: int) -> np.ndarray:
+        tokenizer = self.reference.tokenizer
+        max_length = self.reference.max_seq_length
+        # Longest first, like SentenceTransformer.encode, so each batch pads to similar lengths
+        order = np.argsort([-len(t) for t in texts], kind='stable')
+        embeddings = np.zeros((len(texts), self.get_sentence_embedding_dimension()), dtype='float32')
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            tokens = tokenizer([texts[i] for i in rows], padding=True, truncation=True, max_length=max_length, return_tensors="np")
+            hidden = self._session.run(None, {name: tokens[name].astype('int64') for name in self._input_names})[0]
+            if self._cls_pooling:
+                pooled = hidden[:, 0]
+            else:
+                mask = tokens["attention_mask"][..., None].astype('float32')
+                pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self._normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            embeddings[rows] = pooled
+        return embeddings
+
+    def encode_multi_process(self, texts: List[str], processes: int = 0, chunk_size: Optional[int] = None) -> np.ndarray:
+        """
+        Bulk encoding for re-indexing jobs over `processes` CPU workers (SentenceTransformer's
+        multi-process pool, running the fp32 reference model). Each worker gets an equal share
+        of the cores. Small inputs are encoded in-process.
+        """
+        cores = os.cpu_count() or 1
+        processes = processes or cores
+        if processes < 2 or len(texts) < MIN_POOL_SENTENCES:
+            return self.encode(texts)
+
+        # Workers are spawned; they read the thread count from the environment at import
+        previous = os.environ.get("OMP_NUM_THREADS")
+        os.environ["OMP_NUM_THREADS"] = str(max(1, cores // processes))
+        try:
+            pool = self.reference.start_multi_process_pool(target_devices=["cpu"] * processes)
+        finally:
+            if previous is None:
+                os.environ.pop("OMP_NUM_THREADS", None)
+            else:
+                os.environ["OMP_NUM_THREADS"] = previous
+        try:
+            return np.asarray(self.reference.encode_multi_process(texts, pool, batch_size=self.batch_size, chunk_size=chunk_size), dtype='float32')
+        finally:
+            self.reference.stop_multi_process_pool(pool)
+
+    def parity(self, texts: Optional[List[str]] = None) -> float:
+        """Lowest cosine between this backend's and the reference model's embeddings of `texts`"""
+        texts = texts or PARITY_SENTENCES
+        ours = self.encode(texts)
+        reference = self.encode_reference(texts)
+        ours = ours / np.clip(np.linalg.norm(ours, axis=1, keepdims=True), 1e-12, None)
+        reference = reference / np.clip(np.linalg.norm(reference, axis=1, keepdims=True), 1e-12, None)
+        return float((ours * reference).sum(axis=1).min())
@@ -6,6 +6,9 @@ from datetime import datetime, date
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever extract_features changes its output, so the feature store re-extracts every contract
+FEATURE_SCHEMA_VERSION = 1
+
 class ContractFeatureExtractor:
     """
     Extract features from contracts for ML model training.
@@ -36,11 +39,13 @@ class ContractFeatureExtractor:
         entities = contract_data.get("entities") or {}
         
         raw_features = {}
+        # One lowercased copy shared by every keyword scan
+        text_lower = text.lower()
         
-        raw_features.update(self._extract_text_features(text))
+        raw_features.update(self._extract_text_features(text, text_lower))
         raw_features.update(self._extract_clause_features(clauses))
         raw_features.update(self._extract_entity_features(entities))
-        raw_features.update(self._extract_structural_features(text))
+        raw_features.update(self._extract_structural_features(text, text_lower))
         
         # Safely handle dates (can be strings or datetime.date objects)
         start = contract_data.get("start_date")
@@ -56,24 +61,29 @@ class ContractFeatureExtractor:
         self.feature_names = list(deterministic_features.keys())
         
         return deterministic_features
+
+    def feature_names_for_schema(self) -> List[str]:
+        """Every feature extract_features emits, in its order (the set does not depend on the contract)"""
+        return list(self.extract_features({}).keys())
     
-    def _extract_text_features(self, text: str) -> Dict[str, float]:
+    def _extract_text_features(self, text: str, text_lower: str) -> Dict[str, float]:
         features = {}
         words = text.split()
         word_count = len(words)
         
         features["text_length"] = len(text)
         features["word_count"] = word_count
-        features["sentence_count"] = len(self.sentence_split.split(text))
+        # re.split yields one more piece than there are delimiters; count delimiters, not sentences
+        features["sentence_count"] = len(self.sentence_split.findall(text)) + 1
         
         if word_count > 0:
-            features["avg_word_length"] = np.mean([len(w) for w in words])
+            # Summed in C; same value as np.mean over a list of word lengths
+            features["avg_word_length"] = sum(map(len, words)) / word_count
             features["avg_sentence_length"] = word_count / max(1, features["sentence_count"])
         else:
             features["avg_word_length"] = 0.0
             features["avg_sentence_length"] = 0.0
         
-        text_lower = text.lower()
         for indicator in self.risk_indicators:
             features[f"contains_{indicator.replace(' ', '_')}"] = 1.0 if indicator in text_lower else 0.0
         
@@ -115,13 +125,12 @@ class ContractFeatureExtractor:
         
         return features
     
-    def _extract_structural_features(self, text: str) -> Dict[str, float]:
+    def _extract_structural_features(self, text: str, text_lower: str) -> Dict[str, float]:
         features = {}
         
         features["section_count"] = float(len(self.section_header.findall(text)))
         features["has_tables"] = 1.0 if ("|" in text and "---" in text) else 0.0
         
-        text_lower = text.lower()
         features["definition_count"] = float(sum(text_lower.count(p) for p in self.definition_patterns))
         
         return features
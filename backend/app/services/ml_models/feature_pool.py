@@ -0,0 +1,101 @@
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional
+
+from app.services.ml_models.feature_engineering import ContractFeatureExtractor
+
+logger = logging.getLogger(__name__)
+
+# Below this many contracts, shipping them to workers costs more than extracting in-process
+MIN_PARALLEL_CONTRACTS = 64
+
+# One extractor per worker process, built on its first chunk
+_worker_extractor: Optional[ContractFeatureExtractor] = None
+
+
+def worker_extractor() -> ContractFeatureExtractor:
+    global _worker_extractor
+    if _worker_extractor is None:
+        _worker_extractor = ContractFeatureExtractor()
+    return _worker_extractor
+
+
+def extract_feature_chunk(contracts: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+    extractor = worker_extractor()
+    return [extractor.extract_features(contract) for contract in contracts]
+
+
+class FeatureExtractionPool:
+    """
+    Process pool for the pure-Python feature extraction, shared by training prep, batch
+    re-scoring and the feature store.
+
+    Work is cut into chunks of `chunk_size` contracts; at most `max_in_flight_per_worker`
+    chunks per worker are queued at once, and results come back in input order whatever
+    order the workers finish in. The executor is started on first use and then kept, so
+    repeated batches do not pay for worker start-up; workers are spawned rather than forked
+    because the API process runs threads (request pool, XGBoost's OpenMP).
+    """
+
+    def __init__(self, processes: int = 0, chunk_size: int = 32, max_in_flight_per_worker: int = 2, min_parallel: int = MIN_PARALLEL_CONTRACTS):
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_in_flight = max(1, max_in_flight_per_worker * self.processes)
+        self.min_parallel = min_parallel
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Once per pool, not per executor: shutdown() stops whichever executor is current at exit
+        atexit.register(self.shutdown)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def map_chunks(self, fn: Callable[[Any], Any], chunks: Iterable[Any], parallel: bool = True) -> Iterator[Any]:
+        """fn(chunk) for every chunk, yielded in input order; `fn` must be a picklable module-level function"""
+        if not parallel or self.processes < 2:
+            for chunk in chunks:
+                yield fn(chunk)
+            return
+
+        executor = self._get_executor()
+        in_flight = deque()
+        try:
+            for chunk in chunks:
+                in_flight.append(executor.submit(fn, chunk))
+                if len(in_flight) >= self.max_in_flight:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool next time
+            self.shutdown()
+            raise
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def extract_features(self, contracts: List[Dict[str, Any]], extractor: Optional[ContractFeatureExtractor] = None) -> List[Dict[str, float]]:
+        """extract_features for every contract, in order; small batches stay in-process"""
+        if len(contracts) < self.min_parallel or self.processes < 2:
+            extractor = extractor or worker_extractor()
+            return [extractor.extract_features(contract) for contract in contracts]
+        chunks = (contracts[start:start + self.chunk_size] for start in range(0, len(contracts), self.chunk_size))
+        features: List[Dict[str, float]] = []
+        for chunk_features in self.map_chunks(extract_feature_chunk, chunks):
+            features.extend(chunk_features)
+        return features
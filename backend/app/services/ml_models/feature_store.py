@@ -0,0 +1,294 @@
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+import xgboost as xgb
+from datetime import datetime
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select, func, and_, not_
+from sqlalchemy.orm import Session
+
+from app.models.contract import Contract
+from app.models.ml_features import ContractFeatures
+from app.services.ml_models.feature_engineering import ContractFeatureExtractor, FEATURE_SCHEMA_VERSION
+from app.services.ml_models.feature_pool import FeatureExtractionPool, worker_extractor
+
+logger = logging.getLogger(__name__)
+
+# Contracts with id % HOLDOUT_BUCKETS == 0 are the held-out test set of full fits and the
+# warm-start check, up to the store's holdout_max_rows; bucket rows past that cap are trained on
+HOLDOUT_BUCKETS = 5
+
+
+def contract_content_hash(contract_data: Dict[str, Any]) -> str:
+    """sha1 over every field ContractFeatureExtractor reads; a new hash means new features"""
+    digest = hashlib.sha1()
+    digest.update((contract_data.get("raw_text") or "").encode("utf-8"))
+    for field in ("extracted_clauses", "entities", "start_date", "end_date"):
+        digest.update(b"\x00")
+        digest.update(json.dumps(contract_data.get(field), sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def contract_record(contract: Contract) -> Dict[str, Any]:
+    return {
+        "id": contract.id,
+        "raw_text": contract.raw_text,
+        "extracted_clauses": contract.extracted_clauses or {},
+        "entities": contract.entities or {},
+        "start_date": contract.start_date,
+        "end_date": contract.end_date
+    }
+
+
+def extract_feature_rows(records: List[Dict[str, Any]], extractor: Optional[ContractFeatureExtractor] = None) -> List[Tuple[int, str, bytes]]:
+    """(contract_id, content_hash, float32 feature bytes) per record; pool workers use their own extractor"""
+    extractor = extractor or worker_extractor()
+    feature_names = extractor.feature_names_for_schema()
+    rows = []
+    for record in records:
+        features = extractor.extract_features(record)
+        vector = np.array([features[name] for name in feature_names], dtype='<f4')
+        rows.append((record["id"], contract_content_hash(record), vector.tobytes()))
+    return rows
+
+
+class FeatureBuffer:
+    """Append-only (rows, width) array that doubles its capacity, so loading N rows copies O(N) bytes"""
+
+    def __init__(self, width: int, dtype: str = 'float32', capacity: int = 1024):
+        self._data = np.zeros((capacity, width), dtype=dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, rows: np.ndarray):
+        needed = self._size + len(rows)
+        if needed > len(self._data):
+            grown = np.zeros((max(needed, 2 * len(self._data)), self._data.shape[1]), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = rows
+        self._size = needed
+
+    def array(self) -> np.ndarray:
+        return self._data[:self._size]
+
+
+class ContractFeatureStore:
+    """
+    Persisted risk-model features in the `contract_features` table.
+
+    Contracts are extracted once: at upload (`put`) or, for rows that are missing or were
+    written by an older FEATURE_SCHEMA_VERSION, by `refresh` before training. Training then
+    reads one float32 matrix (`load_training_matrix`) instead of every contract's raw text.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], extractor: Optional[ContractFeatureExtractor] = None, chunk_size: int = 200, processes: int = 0, pool: Optional[FeatureExtractionPool] = None, holdout_max_rows: Optional[int] = None):
+        self.session_factory = session_factory
+        self.extractor = extractor or ContractFeatureExtractor()
+        self.chunk_size = chunk_size
+        # Extraction workers for refresh(); 0 = one per core, 1 = in-process
+        self.pool = pool or FeatureExtractionPool(processes)
+        self.feature_names = self.extractor.feature_names_for_schema()
+        # The holdout is the first holdout_max_rows bucket rows by contract id (None = the whole bucket)
+        self.holdout_max_rows = holdout_max_rows
+        self._holdout_until: Optional[int] = None
+
+    def put(self, contract: Contract, db: Optional[Session] = None):
+        """Extracts and upserts one contract's features (call after the contract is committed)"""
+        self.put_many([contract_record(contract)], db)
+
+    def put_many(self, records: List[Dict[str, Any]], db: Optional[Session] = None):
+        self._write_rows(extract_feature_rows(records, self.extractor), db)
+
+    def _write_rows(self, rows: List[Tuple[int, str, bytes]], db: Optional[Session] = None):
+        owns_session = db is None
+        db = db or self.session_factory()
+        try:
+            for contract_id, content_hash, features in rows:
+                db.merge(ContractFeatures(
+                    contract_id=contract_id,
+                    schema_version=FEATURE_SCHEMA_VERSION,
+                    content_hash=content_hash,
+                    features=features,
+                    feature_count=len(self.feature_names)
+                ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            if owns_session:
+                db.close()
+
+    def refresh(self, verify: bool = False, progress: Optional[Callable[[str, float], None]] = None) -> Dict[str, int]:
+        """
+        Brings the store up to date with the contracts table. By default only contracts without
+        a current-schema row are extracted, which never touches the text of stored contracts.
+        verify=True also re-hashes every stored contract to catch edits made outside the API.
+
+        Contracts stream from the database `chunk_size` at a time and are extracted by a process
+        pool with at most two chunks per worker in flight, so memory stays flat however many
+        contracts need extracting.
+        """
+        self._holdout_until = None
+        db = self.session_factory()
+        try:
+            query = db.query(Contract.id).filter(Contract.raw_text.isnot(None))
+            if not verify:
+                current = select(ContractFeatures.contract_id).where(ContractFeatures.schema_version == FEATURE_SCHEMA_VERSION)
+                query = query.filter(Contract.id.notin_(current))
+            contract_ids = [contract_id for (contract_id,) in query.order_by(Contract.id).all()]
+            stored = dict(db.query(ContractFeatures.contract_id, ContractFeatures.content_hash).filter(
+                ContractFeatures.schema_version == FEATURE_SCHEMA_VERSION
+            ).all()) if verify else {}
+
+            def pending_chunks() -> Iterator[List[Dict[str, Any]]]:
+                for start in range(0, len(contract_ids), self.chunk_size):
+                    chunk = contract_ids[start:start + self.chunk_size]
+                    records = [contract_record(c) for c in db.query(Contract).filter(Contract.id.in_(chunk)).all()]
+                    # The records hold copies; drop the ORM rows and their text right away
+                    db.expunge_all()
+                    if verify:
+                        records = [r for r in records if stored.get(r["id"]) != contract_content_hash(r)]
+                    if records:
+                        yield records
+
+            extracted = 0
+            for rows in self.pool.map_chunks(extract_feature_rows, pending_chunks(), parallel=len(contract_ids) > self.chunk_size):
+                self._write_rows(rows, db)
+                extracted += len(rows)
+                if progress:
+                    progress("extracting_features", min(1.0, extracted / len(contract_ids)))
+            logger.info(f"Feature store refresh: {extracted} of {len(contract_ids)} scanned contracts extracted (schema v{FEATURE_SCHEMA_VERSION})")
+            return {"scanned": len(contract_ids), "extracted": extracted}
+        finally:
+            db.close()
+
+    def feature_watermark(self) -> Optional[datetime]:
+        """Newest updated_at in the store; rows written after it are what a warm start trains on"""
+        db = self.session_factory()
+        try:
+            return db.query(func.max(ContractFeatures.updated_at)).filter(
+                ContractFeatures.schema_version == FEATURE_SCHEMA_VERSION
+            ).scalar()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _labelled(query):
+        return query.join(Contract, Contract.id == ContractFeatures.contract_id).filter(
+            ContractFeatures.schema_version == FEATURE_SCHEMA_VERSION,
+            Contract.raw_text.isnot(None),
+            Contract.risk_level.isnot(None),
+            Contract.risk_level != "UNKNOWN"
+        )
+
+    def _holdout_boundary(self, db: Session) -> Optional[int]:
+        """
+        Contract id of the last holdout row, or None while the bucket is within holdout_max_rows.
+        Worked out once per refresh, so every page of one training run splits the same way.
+        """
+        if self.holdout_max_rows is None:
+            return None
+        if self._holdout_until is None:
+            boundary = self._labelled(db.query(ContractFeatures.contract_id)).filter(
+                Contract.id % HOLDOUT_BUCKETS == 0
+            ).order_by(ContractFeatures.contract_id).offset(self.holdout_max_rows - 1).limit(1).scalar()
+            # 0: the whole bucket fits
+            self._holdout_until = boundary or 0
+        return self._holdout_until or None
+
+    def _training_rows(self, db: Session, split: Optional[str] = None, updated_after: Optional[datetime] = None):
+        query = self._labelled(db.query(ContractFeatures.contract_id, ContractFeatures.features, Contract.risk_score))
+        if split in ("train", "holdout"):
+            in_holdout = Contract.id % HOLDOUT_BUCKETS == 0
+            boundary = self._holdout_boundary(db)
+            if boundary is not None:
+                in_holdout = and_(in_holdout, Contract.id <= boundary)
+            query = query.filter(in_holdout if split == "holdout" else not_(in_holdout))
+        if updated_after is not None:
+            # New contracts and re-extracted (edited) ones
+            query = query.filter(ContractFeatures.updated_at > updated_after)
+        return query
+
+    def count_training_rows(self, split: Optional[str] = None, updated_after: Optional[datetime] = None) -> int:
+        db = self.session_factory()
+        try:
+            return self._training_rows(db, split, updated_after).count()
+        finally:
+            db.close()
+
+    def iter_training_batches(self, split: Optional[str] = None, batch_size: int = 10000, updated_after: Optional[datetime] = None) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """(contract_ids, float32 features, risk_scores) in contract id order, one keyset page at a time"""
+        n_features = len(self.feature_names)
+        last_id = 0
+        while True:
+            db = self.session_factory()
+            try:
+                rows = self._training_rows(db, split, updated_after).filter(ContractFeatures.contract_id > last_id).order_by(
+                    ContractFeatures.contract_id
+                ).limit(batch_size).all()
+            finally:
+                db.close()
+            if not rows:
+                return
+            last_id = rows[-1].contract_id
+            X = np.frombuffer(b"".join(row.features for row in rows), dtype='<f4').reshape(len(rows), n_features).astype('float32')
+            yield (
+                np.array([row.contract_id for row in rows], dtype=np.int64),
+                X,
+                np.array([row.risk_score or 0 for row in rows], dtype=np.float64)
+            )
+
+    def load_training_matrix(self, split: Optional[str] = None, limit: Optional[int] = None, updated_after: Optional[datetime] = None) -> Tuple[List[int], np.ndarray, List[Optional[int]]]:
+        """
+        (contract_ids, (N, n_features) float32 matrix, risk_scores) for every labelled contract
+        (or one `split`, or only rows written after `updated_after`), streamed batch by batch
+        into a growing buffer
+        """
+        features = FeatureBuffer(len(self.feature_names))
+        keys = FeatureBuffer(2, dtype='int64')
+        for contract_ids, X, risk_scores in self.iter_training_batches(split, updated_after=updated_after):
+            if limit is not None and len(features) + len(X) > limit:
+                keep = limit - len(features)
+                contract_ids, X, risk_scores = contract_ids[:keep], X[:keep], risk_scores[:keep]
+            features.append(X)
+            keys.append(np.column_stack([contract_ids, risk_scores.astype(np.int64)]))
+            if limit is not None and len(features) >= limit:
+                break
+        keys = keys.array()
+        return keys[:, 0].tolist(), features.array(), keys[:, 1].tolist()
+
+
+class TrainingBatchIter(xgb.DataIter):
+    """
+    Feeds XGBoost the feature store one page at a time (external memory), so a training
+    matrix larger than RAM is never materialized. XGBoost caches its own pages under
+    `cache_dir`; `label_fn` maps risk scores to class indices.
+    """
+
+    def __init__(self, store: ContractFeatureStore, label_fn: Callable[[np.ndarray], np.ndarray], cache_dir: str, split: Optional[str] = "train", batch_size: int = 10000):
+        self.store = store
+        self.label_fn = label_fn
+        self.split = split
+        self.batch_size = batch_size
+        self._batches: Optional[Iterator] = None
+        super().__init__(cache_prefix=os.path.join(cache_dir, "features"))
+
+    def next(self, input_data: Callable) -> bool:
+        if self._batches is None:
+            self._batches = self.store.iter_training_batches(self.split, self.batch_size)
+        batch = next(self._batches, None)
+        if batch is None:
+            return False
+        _, X, risk_scores = batch
+        input_data(data=X, label=self.label_fn(risk_scores), feature_names=self.store.feature_names)
+        return True
+
+    def reset(self):
+        self._batches = None
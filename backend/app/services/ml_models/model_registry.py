@@ -0,0 +1,103 @@
+import os
+import json
+import uuid
+import shutil
+import logging
+import joblib
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CURRENT_POINTER = "CURRENT"
+MODEL_FILE = "model.pkl"
+METADATA_FILE = "metadata.json"
+
+
+def new_version() -> str:
+    """Sortable by time; the suffix keeps two workers publishing in the same microsecond apart"""
+    return f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+
+
+class ModelRegistry:
+    """
+    Versioned risk-model artifacts on shared disk:
+
+        <root>/<version>/model.pkl       the pickled model bundle
+        <root>/<version>/metadata.json   metrics, feature names, training data size, ...
+        <root>/CURRENT                   the version every worker should serve
+
+    A version directory is fully written under a temporary name and renamed into place before
+    CURRENT can name it, and CURRENT itself is replaced with os.replace, so a reader sees either
+    the old or the new version, never a partial one. The newest `keep_versions` versions (and
+    the current one) are kept for rollback.
+    """
+
+    def __init__(self, root: str, keep_versions: int = 10):
+        self.root = root
+        self.keep_versions = keep_versions
+        os.makedirs(root, exist_ok=True)
+
+    def current_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, CURRENT_POINTER), 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, bundle: Dict[str, Any], metadata: Dict[str, Any], make_current: bool = True) -> str:
+        version = bundle.get("version") or new_version()
+        staging = os.path.join(self.root, f".{version}.tmp-{os.getpid()}")
+        os.makedirs(staging)
+        try:
+            joblib.dump({**bundle, "version": version}, os.path.join(staging, MODEL_FILE))
+            with open(os.path.join(staging, METADATA_FILE), 'w', encoding='utf-8') as f:
+                json.dump({**metadata, "version": version}, f, indent=2, default=str)
+            os.rename(staging, os.path.join(self.root, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        if make_current:
+            self.set_current(version)
+        self.prune()
+        return version
+
+    def set_current(self, version: str):
+        if not os.path.exists(os.path.join(self.root, version, MODEL_FILE)):
+            raise ValueError(f"Unknown model version '{version}'")
+        tmp = os.path.join(self.root, f"{CURRENT_POINTER}.tmp-{os.getpid()}")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.root, CURRENT_POINTER))
+        logger.info(f"Model registry: CURRENT -> {version}")
+
+    def load(self, version: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """(model bundle, metadata) of one version"""
+        bundle = joblib.load(os.path.join(self.root, version, MODEL_FILE))
+        return bundle, self.metadata(version)
+
+    def metadata(self, version: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.root, version, METADATA_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"version": version}
+
+    def versions(self) -> List[str]:
+        """Published versions, newest first"""
+        return sorted((
+            name for name in os.listdir(self.root)
+            if not name.startswith(".") and os.path.isfile(os.path.join(self.root, name, MODEL_FILE))
+        ), reverse=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        current = self.current_version()
+        return [{**self.metadata(version), "current": version == current} for version in self.versions()]
+
+    def prune(self):
+        current = self.current_version()
+        for version in self.versions()[self.keep_versions:]:
+            if version != current:
+                shutil.rmtree(os.path.join(self.root, version), ignore_errors=True)
@@ -5,36 +5,209 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 import joblib
 import os
+import copy
 import logging
-from typing import Dict, List, Any, Tuple
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+from app.services.ml_models.feature_pool import FeatureExtractionPool
+from app.services.ml_models.model_registry import ModelRegistry
 
 logger = logging.getLogger(__name__)
 
+# Expected danger score (0-100) contributed by each predicted class probability
+DANGER_WEIGHTS = {"LOW": 15.0, "MEDIUM": 50.0, "HIGH": 90.0}
+
+BOOSTING_ROUNDS = 100
+
+# Native xgb.train parameters, the same hyperparameters as the XGBClassifier in _fit
+BOOSTER_PARAMS = {
+    "objective": "multi:softprob",
+    "num_class": 3,
+    "max_depth": 4,
+    "eta": 0.1,
+    "seed": 42,
+    "tree_method": "hist",
+    "eval_metric": "merror"
+}
+
+# progress(stage, fraction of that stage done), reported by training
+ProgressCallback = Callable[[str, float], None]
+
+
+class _BoostingProgress(xgb.callback.TrainingCallback):
+    def __init__(self, progress: ProgressCallback, rounds: int):
+        super().__init__()
+        self.progress = progress
+        self.rounds = rounds
+
+    def after_iteration(self, model, epoch: int, evals_log) -> bool:
+        self.progress("training", (epoch + 1) / self.rounds)
+        return False
+
+
+class RiskModelState:
+    """
+    One trained model plus everything predictions derive from it: the feature -> column map,
+    the raw Booster for inplace_predict and pred_contribs, and the class weights.
+    Built once and never mutated. Retraining builds a new state and swaps the reference, so a
+    prediction that started on the old model finishes on it.
+    """
+
+    def __init__(self, model: xgb.XGBClassifier, label_encoder: LabelEncoder, feature_names: List[str], version: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None):
+        self.model = model
+        self.label_encoder = label_encoder
+        self.feature_names = list(feature_names)
+        self.version = version
+        self.metadata = metadata or {}
+
+        self.feature_index = {name: i for i, name in enumerate(self.feature_names)}
+        self.booster = model.get_booster()
+        self.class_weights = np.array([DANGER_WEIGHTS.get(cls, 50.0) for cls in label_encoder.classes_])
+        # Input buffers are sized by this model's feature count
+        self.local = threading.local()
+
+    def row_buffer(self) -> np.ndarray:
+        """One reusable (1, n_features) input row per thread"""
+        row = getattr(self.local, "row", None)
+        if row is None:
+            row = self.local.row = np.zeros((1, len(self.feature_names)), dtype=np.float32)
+        return row
+
+    def fill_row(self, row: np.ndarray, features: Dict[str, float]):
+        index = self.feature_index
+        for name, value in features.items():
+            i = index.get(name)
+            if i is not None:
+                row[i] = value
+
+    def risk_scores(self, probabilities: np.ndarray) -> np.ndarray:
+        """Maps class probabilities (N, n_classes) to 0-100 danger scores"""
+        return np.clip(probabilities @ self.class_weights, 0, 100).astype(int)
+
+    def contributions(self, X: np.ndarray, probabilities: np.ndarray) -> np.ndarray:
+        """
+        (N, n_features) per-contract attributions in risk-score points, from XGBoost's native
+        TreeSHAP (pred_contribs): one extra C++ pass over the same rows.
+
+        TreeSHAP attributes each class's margin. The risk score is sum_k p_k * w_k over the
+        softmax of those margins, whose first-order sensitivity to margin k is p_k * (w_k - score);
+        weighting the class attributions by it gives each feature's effect on the 0-100 score
+        (positive = raises risk).
+        """
+        contribs = self.booster.predict(xgb.DMatrix(X), pred_contribs=True, validate_features=False)
+        if contribs.ndim == 2:
+            contribs = contribs[:, None, :]
+        expected = probabilities @ self.class_weights
+        sensitivity = probabilities * (self.class_weights[None, :] - expected[:, None])
+        # Last column is the bias term, not a feature
+        return np.einsum('nk,nkf->nf', sensitivity, contribs[:, :, :-1])
+
+    def top_contributing_features(self, row: np.ndarray, contributions: np.ndarray, top_n: int = 5) -> List[Dict[str, Any]]:
+        """This contract's strongest drivers by absolute attribution, with their values"""
+        order = np.argsort(-np.abs(contributions))[:top_n]
+        return [{
+            "feature": self.feature_names[i],
+            "value": float(row[i]),
+            "contribution": round(float(contributions[i]), 3)
+        } for i in order if contributions[i] != 0]
+
+
 class RiskPredictionModel:
     """
     XGBoost model for contract risk prediction with SHAP explainability.
     """
     
-    def __init__(self, model_path: str = "app/data/models/risk_model.pkl"):
+    def __init__(self, model_path: str = "app/data/models/risk_model.pkl", feature_workers: int = 0, registry: Optional[ModelRegistry] = None):
+        # model_path is the bundled model, served until the registry has a CURRENT version
         self.model_path = model_path
-        self.model = None
+        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+        self.registry = registry or ModelRegistry(os.path.join(os.path.dirname(self.model_path), "registry"))
         self.label_encoder = LabelEncoder()
         self.feature_extractor = None
-        self.feature_names = []
+        # Large batches (training prep, portfolio re-scoring) extract features across processes
+        self.feature_pool = FeatureExtractionPool(feature_workers)
+
+        # The serving model; replaced as a whole, never modified (see RiskModelState)
+        self._state: Optional[RiskModelState] = None
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
         
         self._load_model()
+
+    @property
+    def model(self) -> Optional[xgb.XGBClassifier]:
+        state = self._state
+        return state.model if state else None
+
+    @property
+    def feature_names(self) -> List[str]:
+        state = self._state
+        return state.feature_names if state else []
     
     def _load_model(self):
-        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+        version = self.registry.current_version()
+        if version:
+            try:
+                self._state = self._load_version(version)
+                logger.info(f"Loaded risk model {version} with {len(self.feature_names)} features")
+                return
+            except Exception as e:
+                logger.warning(f"Could not load registry model {version}, using {self.model_path}: {e}")
         if os.path.exists(self.model_path):
             try:
                 saved_data = joblib.load(self.model_path)
-                self.model = saved_data['model']
-                self.label_encoder = saved_data['label_encoder']
-                self.feature_names = saved_data['feature_names']
+                self._state = RiskModelState(
+                    saved_data['model'], saved_data['label_encoder'], saved_data['feature_names'], saved_data.get('version')
+                )
                 logger.info(f"Loaded existing model with {len(self.feature_names)} features")
             except Exception as e:
                 logger.warning(f"Could not load existing model: {e}")
+
+    def _load_version(self, version: str) -> RiskModelState:
+        bundle, metadata = self.registry.load(version)
+        return RiskModelState(bundle['model'], bundle['label_encoder'], bundle['feature_names'], version, metadata)
+
+    def reload_if_changed(self) -> bool:
+        """Swaps in the registry's CURRENT version if it differs from the serving one"""
+        version = self.registry.current_version()
+        state = self._state
+        if not version or (state and state.version == version):
+            return False
+        with self._reload_lock:
+            state = self._state
+            if state and state.version == version:
+                return False
+            # Loaded off to the side; requests keep using the old state until the swap
+            self._state = self._load_version(version)
+        logger.info(f"Hot-reloaded risk model {version}")
+        return True
+
+    def activate(self, version: str) -> bool:
+        """Points every worker at a published version (e.g. a rollback) and serves it here at once"""
+        self.registry.set_current(version)
+        return self.reload_if_changed()
+
+    def start_watching(self, interval_seconds: float = 5.0):
+        """Polls the registry's CURRENT pointer on a daemon thread, so a model trained by any worker reaches this one"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+
+        def watch():
+            while not self._stop_watching.wait(interval_seconds):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    logger.error(f"Risk model hot reload failed: {e}", exc_info=True)
+
+        self._watcher = threading.Thread(target=watch, name="risk-model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
     
     def prepare_training_data(self, contracts_data: List[Dict[str, Any]]) -> Tuple[pd.DataFrame, pd.Series]:
         from app.services.ml_models.feature_engineering import ContractFeatureExtractor
@@ -42,25 +215,12 @@ class RiskPredictionModel:
         if not self.feature_extractor:
             self.feature_extractor = ContractFeatureExtractor()
         
-        features_list = []
-        labels = []
-        
-        for contract in contracts_data:
-            features = self.feature_extractor.extract_features(contract)
-            features_list.append(features)
-            
-            # Use strict boundaries to clean up any conflicting database data during training
-            score = contract.get("risk_score", 0) or 0
-            if score >= 75:
-                labels.append("HIGH")
-            elif score >= 40:
-                labels.append("MEDIUM")
-            else:
-                labels.append("LOW")
+        features_list = self.feature_pool.extract_features(contracts_data, self.feature_extractor)
+        # Use strict boundaries to clean up any conflicting database data during training
+        labels = [self._risk_level(contract.get("risk_score", 0) or 0) for contract in contracts_data]
         
         X = pd.DataFrame(features_list)
         X = X.fillna(0)
-        self.feature_names = X.columns.tolist()
         
         # Force the encoder to register all 3 classes to prevent XGBoost training crashes
         self.label_encoder.fit(["LOW", "MEDIUM", "HIGH"])
@@ -68,12 +228,126 @@ class RiskPredictionModel:
         
         return X, y
     
-    def train(self, contracts_data: List[Dict[str, Any]], test_size: float = 0.2):
+    def train(self, contracts_data: List[Dict[str, Any]], test_size: float = 0.2, progress: Optional[ProgressCallback] = None):
         if len(contracts_data) < 10:
             return {"status": "skipped", "reason": "insufficient_data", "message": "Need at least 10 contracts"}
 
         X, y = self.prepare_training_data(contracts_data)
-        
+        return self._fit(X, y, test_size, progress)
+
+    def train_from_features(self, X: np.ndarray, risk_scores: List[Any], feature_names: List[str], test_size: float = 0.2, progress: Optional[ProgressCallback] = None, training_info: Optional[Dict[str, Any]] = None, holdout: Optional[Tuple[np.ndarray, List[Any]]] = None):
+        """
+        Trains on precomputed feature rows (the feature store) labelled from their risk scores.
+        `holdout` (X_test, test_risk_scores) replaces the random test split with fixed rows, so
+        later warm starts can be scored on contracts this model never saw.
+        """
+        if len(X) < 10:
+            return {"status": "skipped", "reason": "insufficient_data", "message": "Need at least 10 contracts"}
+
+        y = self.labels_for_scores(np.asarray([score or 0 for score in risk_scores]))
+        # Named columns, so the booster carries the same feature names as a DataFrame-trained one
+        X = pd.DataFrame(X, columns=list(feature_names))
+        if holdout is not None and len(holdout[0]):
+            X_test = pd.DataFrame(holdout[0], columns=list(feature_names))
+            y_test = self.labels_for_scores(np.asarray([score or 0 for score in holdout[1]]))
+            return self._fit(X, y, test_size, progress, training_info, test_set=(X_test, y_test))
+        return self._fit(X, y, test_size, progress, training_info)
+
+    def labels_for_scores(self, risk_scores: np.ndarray) -> np.ndarray:
+        """Class indices for risk scores, with the same boundaries as prepare_training_data"""
+        self.label_encoder.fit(["LOW", "MEDIUM", "HIGH"])
+        return self.label_encoder.transform([self._risk_level(score) for score in np.asarray(risk_scores, dtype=np.int64)])
+
+    def train_from_batches(self, train_iter: xgb.DataIter, X_test: np.ndarray, test_risk_scores: List[Any], feature_names: List[str], progress: Optional[ProgressCallback] = None, training_info: Optional[Dict[str, Any]] = None):
+        """
+        External-memory training for corpora too large for one in-memory matrix: XGBoost pulls
+        the training rows page by page from `train_iter` (see TrainingBatchIter) and the model
+        is scored on the separately loaded holdout rows. Same hyperparameters as _fit.
+        """
+        self.label_encoder.fit(["LOW", "MEDIUM", "HIGH"])
+
+        dtrain = xgb.DMatrix(train_iter)
+        y_train = dtrain.get_label()
+        if len(np.unique(y_train)) < 2:
+            return {"status": "skipped", "message": "Training requires contracts with at least 2 different risk levels."}
+
+        booster = xgb.train(BOOSTER_PARAMS, dtrain, num_boost_round=BOOSTING_ROUNDS, callbacks=[_BoostingProgress(progress, BOOSTING_ROUNDS)] if progress else None)
+        # "[0]\ttrain-merror:0.0123"
+        train_error = float(booster.eval(dtrain, "train").split(":")[-1])
+        training_rows = dtrain.num_row()
+        del dtrain
+
+        # Wrapped as the sklearn estimator every other code path expects
+        model = xgb.XGBClassifier()
+        model.load_model(bytearray(booster.save_raw()))
+        state = RiskModelState(model, copy.deepcopy(self.label_encoder), feature_names)
+
+        metrics = {"train_accuracy": 1.0 - train_error, "test_accuracy": self.holdout_accuracy(state, X_test, test_risk_scores)}
+        self._publish(state, metrics, training_rows=training_rows, holdout_rows=len(X_test), mode="external_memory", incremental_chain=0, **(training_info or {}))
+        return {"status": "success", **metrics, "model_version": state.version}
+
+    def train_incremental(self, X_new: np.ndarray, new_risk_scores: List[Any], X_holdout: np.ndarray, holdout_risk_scores: List[Any], feature_names: List[str], rounds: int = 20, max_accuracy_drop: float = 0.02, progress: Optional[ProgressCallback] = None, training_info: Optional[Dict[str, Any]] = None):
+        """
+        Warm start: boosts `rounds` more trees onto a copy of the serving booster using only the
+        new and changed rows, instead of refitting every contract. xgb.train copies the base
+        booster, so the serving state is untouched until _publish swaps the result in.
+
+        Trees fitted to a small delta can drift away from the rest of the corpus, so the
+        candidate is scored against the serving model on the same holdout rows and rejected
+        (status "rejected", nothing published) if its accuracy is more than `max_accuracy_drop`
+        lower. Also rejected when the serving model was trained on other features; both cases
+        call for a full fit.
+        """
+        base = self._state
+        if base is None:
+            return {"status": "rejected", "reason": "no_base_model", "message": "No trained model to continue from"}
+        if base.feature_names != list(feature_names):
+            return {"status": "rejected", "reason": "feature_mismatch", "message": "The serving model was trained on different features"}
+        if len(X_new) == 0:
+            return {"status": "skipped", "reason": "no_changes", "message": "No new or changed contracts since the current model"}
+
+        self.label_encoder.fit(["LOW", "MEDIUM", "HIGH"])
+        # Native API: a delta may hold a single risk level, which XGBClassifier.fit refuses
+        dtrain = xgb.DMatrix(np.ascontiguousarray(X_new, dtype=np.float32), label=self.labels_for_scores(np.asarray([score or 0 for score in new_risk_scores])), feature_names=list(feature_names))
+        booster = xgb.train(BOOSTER_PARAMS, dtrain, num_boost_round=rounds, xgb_model=base.booster, callbacks=[_BoostingProgress(progress, rounds)] if progress else None)
+        train_error = float(booster.eval(dtrain, "train").split(":")[-1])
+
+        model = xgb.XGBClassifier()
+        model.load_model(bytearray(booster.save_raw()))
+        candidate = RiskModelState(model, copy.deepcopy(self.label_encoder), feature_names)
+
+        base_accuracy = self.holdout_accuracy(base, X_holdout, holdout_risk_scores)
+        test_accuracy = self.holdout_accuracy(candidate, X_holdout, holdout_risk_scores)
+        if base_accuracy is not None and test_accuracy < base_accuracy - max_accuracy_drop:
+            logger.warning(f"Incremental update rejected: holdout accuracy {test_accuracy:.3f} vs {base_accuracy:.3f} for {base.version}")
+            return {
+                "status": "rejected",
+                "reason": "holdout_regression",
+                "message": f"Warm-started model lost accuracy on the holdout ({test_accuracy:.3f} vs {base_accuracy:.3f})",
+                "base_accuracy": base_accuracy,
+                "test_accuracy": test_accuracy
+            }
+
+        metrics = {"train_accuracy": 1.0 - train_error, "test_accuracy": test_accuracy, "base_test_accuracy": base_accuracy}
+        self._publish(
+            candidate, metrics,
+            training_rows=len(X_new),
+            holdout_rows=len(X_holdout),
+            mode="incremental",
+            base_version=base.version,
+            incremental_chain=base.metadata.get("incremental_chain", 0) + 1,
+            boosting_rounds=booster.num_boosted_rounds(),
+            **(training_info or {})
+        )
+        return {"status": "success", **metrics, "model_version": candidate.version, "base_version": base.version}
+
+    def holdout_accuracy(self, state: RiskModelState, X: np.ndarray, risk_scores: List[Any]) -> Optional[float]:
+        if not len(X):
+            return None
+        predicted = np.argmax(state.booster.inplace_predict(np.ascontiguousarray(X, dtype=np.float32)), axis=1)
+        return float((predicted == self.labels_for_scores(np.asarray([score or 0 for score in risk_scores]))).mean())
+
+    def _fit(self, X: pd.DataFrame, y: np.ndarray, test_size: float, progress: Optional[ProgressCallback] = None, training_info: Optional[Dict[str, Any]] = None, test_set: Optional[Tuple[pd.DataFrame, np.ndarray]] = None):
         # Count how many of each class we have
         unique_classes, class_counts = np.unique(y, return_counts=True)
         if len(unique_classes) < 2:
@@ -87,7 +361,10 @@ class RiskPredictionModel:
         # 🛡️ CRITICAL FIX: Only enforce stratification if EVERY class has at least 2 contracts
         can_stratify = np.min(class_counts) >= 2
         
-        if len(X) > 20:
+        if test_set is not None:
+            X_train, y_train = X, y
+            X_test, y_test = test_set
+        elif len(X) > 20:
             X_train, X_test, y_train, y_test = train_test_split(
                 X, y, 
                 test_size=test_size, 
@@ -97,8 +374,8 @@ class RiskPredictionModel:
         else:
             X_train, X_test, y_train, y_test = X, X, y, y
         
-        self.model = xgb.XGBClassifier(
-            n_estimators=100,
+        model = xgb.XGBClassifier(
+            n_estimators=BOOSTING_ROUNDS,
             max_depth=4,
             learning_rate=0.1,
             objective='multi:softprob',
@@ -107,18 +384,48 @@ class RiskPredictionModel:
             n_jobs=-1
         )
         
-        self.model.fit(X_train, y_train, eval_set=[(X_test, y_test)], verbose=False)
-        
-        self._save_model()
+        # The callback only lives for this fit; it must not be pickled with the model
+        model.set_params(callbacks=[_BoostingProgress(progress, BOOSTING_ROUNDS)] if progress else None)
+        model.fit(X_train, y_train, eval_set=[(X_test, y_test)], verbose=False)
+        model.set_params(callbacks=None)
+
+        state = RiskModelState(model, copy.deepcopy(self.label_encoder), X.columns.tolist())
+        metrics = {
+            "train_accuracy": model.score(X_train, y_train),
+            "test_accuracy": model.score(X_test, y_test)
+        }
+        self._publish(state, metrics, training_rows=len(X_train), holdout_rows=len(X_test), mode="in_memory", incremental_chain=0, **(training_info or {}))
         
-        return {
-            "status": "success",
-            "train_accuracy": self.model.score(X_train, y_train),
-            "test_accuracy": self.model.score(X_test, y_test)
+        return {"status": "success", **metrics, "model_version": state.version}
+
+    def _publish(self, state: RiskModelState, metrics: Dict[str, Any], **training_info):
+        """
+        Publishes a newly trained state to the registry (which moves CURRENT, so the other
+        workers follow), then makes it the serving model here with one reference swap
+        """
+        from app.services.ml_models.feature_engineering import FEATURE_SCHEMA_VERSION
+        state.metadata = {
+            "created_at": datetime.utcnow().isoformat(),
+            "metrics": metrics,
+            "feature_names": state.feature_names,
+            "feature_count": len(state.feature_names),
+            "feature_schema_version": FEATURE_SCHEMA_VERSION,
+            "classes": [str(c) for c in state.label_encoder.classes_],
+            "xgboost_version": xgb.__version__,
+            **training_info
         }
+        state.version = self.registry.publish({
+            'model': state.model,
+            'label_encoder': state.label_encoder,
+            'feature_names': state.feature_names
+        }, state.metadata)
+        state.metadata["version"] = state.version
+        self._state = state
+        logger.info(f"Risk model {state.version} is now serving ({len(state.feature_names)} features)")
     
     def predict(self, contract_data: Dict[str, Any]) -> Dict[str, Any]:
-        if not self.model:
+        state = self._state
+        if not state:
             return self._fallback_prediction(contract_data)
         
         from app.services.ml_models.feature_engineering import ContractFeatureExtractor
@@ -126,55 +433,74 @@ class RiskPredictionModel:
             self.feature_extractor = ContractFeatureExtractor()
         
         try:
-            features = self.feature_extractor.extract_features(contract_data)
-            X = pd.DataFrame([features]).reindex(columns=self.feature_names, fill_value=0)
-            
-            prediction_proba = self.model.predict_proba(X)[0]
-            classes = self.label_encoder.classes_
+            row = state.row_buffer()
+            row.fill(0.0)
+            state.fill_row(row[0], self.feature_extractor.extract_features(contract_data))
             
-            # Map probabilities to a 0-100 Danger Score
-            danger_weights = {"LOW": 15.0, "MEDIUM": 50.0, "HIGH": 90.0}
-            risk_score_float = sum(prediction_proba[i] * danger_weights.get(cls, 50.0) for i, cls in enumerate(classes))
-            risk_score = int(np.clip(risk_score_float, 0, 100))
-            
-            # Mathematically enforce the text label based on the calculated score
-            if risk_score >= 75:
-                predicted_class = "HIGH"
-            elif risk_score >= 40:
-                predicted_class = "MEDIUM"
-            else:
-                predicted_class = "LOW"
-            
-            top_features = self._get_top_contributing_features(X.iloc[0])
+            probabilities = state.booster.inplace_predict(row)
+            risk_score = int(state.risk_scores(probabilities)[0])
+            contributions = state.contributions(row, probabilities)[0]
             
             return {
-                "predicted_risk_level": predicted_class,
+                "predicted_risk_level": self._risk_level(risk_score),
                 "risk_score": risk_score,
-                "top_contributing_features": top_features,
+                "top_contributing_features": state.top_contributing_features(row[0], contributions),
                 "model_used": "xgboost"
             }
         except Exception as e:
             logger.warning(f"XGBoost Prediction error, using fallback: {e}")
             return self._fallback_prediction(contract_data)
-    
-    def _get_top_contributing_features(self, features: pd.Series) -> List[Dict[str, Any]]:
-        if not self.model: return []
-        try:
-            importances = self.model.feature_importances_
-            indices = np.argsort(importances)[::-1]
-            top_features = []
-            for i in range(min(5, len(indices))):
-                idx = indices[i]
-                if idx >= len(self.feature_names): continue
-                if float(importances[idx]) > 0:
-                    top_features.append({
-                        "feature": self.feature_names[idx],
-                        "value": float(features.get(self.feature_names[idx], 0)),
-                        "contribution": float(importances[idx])
-                    })
-            return top_features
-        except Exception:
+
+    def predict_batch(self, contracts_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Scores N contracts with one predict_proba call. Features are written straight into a
+        preallocated (N, n_features) matrix in `feature_names` order, skipping the per-row DataFrame.
+        """
+        if not contracts_data:
             return []
+        state = self._state
+        if not state:
+            return [self._fallback_prediction(c) for c in contracts_data]
+
+        from app.services.ml_models.feature_engineering import ContractFeatureExtractor
+        if not self.feature_extractor:
+            self.feature_extractor = ContractFeatureExtractor()
+
+        try:
+            X = self._feature_matrix(state, contracts_data)
+            probabilities = state.booster.inplace_predict(X)
+            risk_scores = state.risk_scores(probabilities)
+            # Attributions for the whole batch in one pred_contribs call
+            contributions = state.contributions(X, probabilities)
+            return [{
+                "predicted_risk_level": self._risk_level(int(score)),
+                "risk_score": int(score),
+                "top_contributing_features": state.top_contributing_features(row, contribution),
+                "model_used": "xgboost"
+            } for score, row, contribution in zip(risk_scores, X, contributions)]
+        except Exception as e:
+            logger.warning(f"XGBoost batch prediction error, using fallback: {e}")
+            return [self._fallback_prediction(c) for c in contracts_data]
+
+    def _feature_matrix(self, state: RiskModelState, contracts_data: List[Dict[str, Any]]) -> np.ndarray:
+        X = np.zeros((len(contracts_data), len(state.feature_names)), dtype=np.float32)
+        for row, features in enumerate(self.feature_pool.extract_features(contracts_data, self.feature_extractor)):
+            state.fill_row(X[row], features)
+        return X
+
+    @staticmethod
+    def risk_reasons(prediction: Dict[str, Any]) -> List[str]:
+        """Contract.risk_reasons entries: "feature: +points" per top attribution"""
+        return [f"{f['feature']}: {f['contribution']:+.3f}" for f in prediction.get("top_contributing_features", [])]
+
+    @staticmethod
+    def _risk_level(risk_score: int) -> str:
+        # Mathematically enforce the text label based on the calculated score
+        if risk_score >= 75:
+            return "HIGH"
+        elif risk_score >= 40:
+            return "MEDIUM"
+        return "LOW"
     
     def _fallback_prediction(self, contract_data: Dict[str, Any]) -> Dict[str, Any]:
         text = contract_data.get("raw_text", "").lower()
@@ -199,17 +525,20 @@ class RiskPredictionModel:
             "model_used": "rule_based_fallback"
         }
     
-    def _save_model(self):
-        if self.model:
-            joblib.dump({
-                'model': self.model,
-                'label_encoder': self.label_encoder,
-                'feature_names': self.feature_names
-            }, self.model_path)
-            
+    def get_training_metadata(self) -> Dict[str, Any]:
+        """Registry metadata of the serving model ({} for the bundled model)"""
+        state = self._state
+        return dict(state.metadata) if state else {}
+
     def get_model_info(self) -> Dict[str, Any]:
+        state = self._state
         return {
-            "model_type": "XGBoost" if self.model else "None",
-            "is_trained": self.model is not None,
-            "feature_count": len(self.feature_names)
+            "model_type": "XGBoost" if state else "None",
+            "is_trained": state is not None,
+            "feature_count": len(state.feature_names) if state else 0,
+            "model_version": state.version if state else None,
+            "trained_at": state.metadata.get("created_at") if state else None,
+            "metrics": state.metadata.get("metrics") if state else None,
+            "training_rows": state.metadata.get("training_rows") if state else None,
+            "training_mode": state.metadata.get("mode") if state else None
         }
\ No newline at end of file
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from app.services.ml_models.risk_model import ProgressCallback
+from app.services.vector_store.change_log import FileLock, safe_replace
+
+logger = logging.getLogger(__name__)
+
+# A running job's record is rewritten at most this often (and on every stage change)
+PERSIST_INTERVAL_SECONDS = 1.0
+
+# How long a submit waits for the worker holding the training lock to write its job record
+LOCK_HOLDER_WAIT_SECONDS = 2.0
+
+# Share of the overall progress bar each training stage covers, in order
+STAGE_WEIGHTS = OrderedDict([
+    ("extracting_features", 0.4),
+    ("loading_features", 0.1),
+    ("training", 0.5),
+])
+
+
+class TrainingJob:
+    def __init__(self, requested_by: Optional[str] = None, mode: str = "auto"):
+        self.id = uuid.uuid4().hex
+        self.mode = mode              # auto | full | incremental
+        self.status = "queued"        # queued -> running -> succeeded | skipped | failed
+        self.stage: Optional[str] = None
+        self.progress = 0.0
+        self.requested_by = requested_by
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def report(self, stage: str, fraction: float):
+        """ProgressCallback: maps a stage's own 0-1 progress onto the job's overall 0-1 progress"""
+        done = 0.0
+        for name, weight in STAGE_WEIGHTS.items():
+            if name == stage:
+                self.stage = stage
+                self.progress = round(min(1.0, done + weight * max(0.0, min(1.0, fraction))), 3)
+                return
+            done += weight
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrainingJob":
+        """A job record written by any worker (see TrainingJobManager)"""
+        job = cls(data.get("requested_by"), data.get("mode", "auto"))
+        job.id = data["job_id"]
+        job.status = data["status"]
+        job.stage = data.get("stage")
+        job.progress = data.get("progress", 0.0)
+        for field in ("created_at", "started_at", "finished_at"):
+            value = data.get(field)
+            setattr(job, field, datetime.fromisoformat(value) if value else None)
+        job.result = data.get("result")
+        job.error = data.get("error")
+        return job
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "mode": self.mode,
+            "stage": self.stage,
+            "progress": self.progress,
+            "requested_by": self.requested_by,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class TrainingJobManager:
+    """
+    Runs risk-model retraining off the request path, one job at a time across all workers,
+    on a daemon thread.
+
+    `run_training(progress, mode)` does the work (its own DB session, the feature store, the
+    fit) and returns the training result dict. A job holds `<jobs_dir>/training.lock` (flock)
+    while it runs, so submitting on any worker while one is queued or running returns that
+    job instead of training and publishing a second model concurrently.
+
+    Job records are JSON files in `jobs_dir`, next to the model registry on the disk every
+    worker shares, so any worker answers the status endpoints. The last `max_history` are kept.
+    """
+
+    def __init__(self, run_training: Callable[[ProgressCallback, str], Optional[Dict[str, Any]]], jobs_dir: str, max_history: int = 20):
+        self.run_training = run_training
+        self.jobs_dir = jobs_dir
+        self.max_history = max_history
+        os.makedirs(jobs_dir, exist_ok=True)
+        self._training_lock = FileLock(os.path.join(jobs_dir, "training.lock"))
+        self._lock = threading.Lock()
+        # The job this process is running, if any; its in-memory copy is fresher than the file
+        self._active: Optional[TrainingJob] = None
+
+    def submit(self, requested_by: Optional[str] = None, mode: str = "auto") -> Tuple[TrainingJob, bool]:
+        """
+        (job, created): the new job, or the one already in progress on any worker with
+        created=False. Raises RuntimeError if another worker holds the training lock but its
+        job record never appeared.
+        """
+        with self._lock:
+            if self._active is not None:
+                return self._active, False
+            if not self._training_lock.acquire(blocking=False):
+                return self._job_in_progress(), False
+            try:
+                self._fail_interrupted()
+                job = TrainingJob(requested_by, mode)
+                self._persist(job)
+                self._prune()
+            except Exception:
+                self._training_lock.release()
+                raise
+            self._active = job
+        threading.Thread(target=self._run, args=(job,), name=f"risk-training-{job.id[:8]}", daemon=True).start()
+        return job, True
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        active = self._active
+        if active is not None and active.id == job_id:
+            return active
+        if not job_id.isalnum():
+            return None
+        return self._read(os.path.join(self.jobs_dir, f"{job_id}.json"))
+
+    def list(self) -> List[TrainingJob]:
+        """Recent jobs from every worker, newest first"""
+        active = self._active
+        jobs = [active if active is not None and job.id == active.id else job for job in self._records()]
+        return jobs[:self.max_history]
+
+    def _records(self) -> List[TrainingJob]:
+        jobs = []
+        for name in os.listdir(self.jobs_dir):
+            if name.endswith(".json"):
+                job = self._read(os.path.join(self.jobs_dir, name))
+                if job is not None:
+                    jobs.append(job)
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def _read(self, path: str) -> Optional[TrainingJob]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return TrainingJob.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Unreadable training job record {path}: {e}")
+            return None
+
+    def _persist(self, job: TrainingJob):
+        path = os.path.join(self.jobs_dir, f"{job.id}.json")
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(job.to_dict(), f, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+        safe_replace(f"{path}.tmp", path)
+
+    def _prune(self):
+        for job in self._records()[self.max_history:]:
+            try:
+                os.remove(os.path.join(self.jobs_dir, f"{job.id}.json"))
+            except OSError:
+                pass
+
+    def _job_in_progress(self) -> TrainingJob:
+        """The job of the worker holding the training lock (which writes its record right after locking)"""
+        deadline = time.monotonic() + LOCK_HOLDER_WAIT_SECONDS
+        while True:
+            for job in self._records():
+                if job.active:
+                    return job
+            if time.monotonic() >= deadline:
+                raise RuntimeError("Another worker is starting a training job")
+            time.sleep(0.05)
+
+    def _fail_interrupted(self):
+        """With the lock free, records still marked active belong to a worker that died mid-job"""
+        for job in self._records():
+            if job.active:
+                job.status = "failed"
+                job.error = "Interrupted: the worker running this job exited"
+                job.finished_at = job.finished_at or datetime.utcnow()
+                self._persist(job)
+
+    def _run(self, job: TrainingJob):
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        self._persist(job)
+        last_persist = [time.monotonic(), job.stage]
+
+        def progress(stage: str, fraction: float):
+            job.report(stage, fraction)
+            now = time.monotonic()
+            if job.stage != last_persist[1] or now - last_persist[0] >= PERSIST_INTERVAL_SECONDS:
+                last_persist[:] = [now, job.stage]
+                try:
+                    self._persist(job)
+                except OSError as e:
+                    logger.warning(f"Could not record progress of training job {job.id}: {e}")
+
+        try:
+            result = self.run_training(progress, job.mode)
+            job.result = result
+            if result and result.get("status") == "success":
+                job.status = "succeeded"
+                job.progress = 1.0
+            else:
+                job.status = "skipped"
+                job.error = result.get("message", "Training aborted") if result else "Training aborted"
+        except Exception as e:
+            logger.error(f"Training job {job.id} failed: {e}", exc_info=True)
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            try:
+                self._persist(job)
+            except Exception as e:
+                logger.error(f"Could not record the outcome of training job {job.id}: {e}", exc_info=True)
+            with self._lock:
+                self._active = None
+                self._training_lock.release()
@@ -1,146 +1,599 @@
 import numpy as np
-from typing import List, Dict, Any, Optional
-import json
-import pickle
+from typing import List, Dict, Any, Optional, Tuple
 import os
 import shutil
 import faiss
 import re
+import json
+import heapq
+import base64
 from datetime import datetime
 import logging
 
+from app.services.vector_store.shard import VectorShard, shard_key_for, company_id_for, clause_fingerprint, PUBLIC_SHARD_KEY
+from app.services.vector_store.cache import ShardCache, QueryEmbeddingCache
+from app.services.vector_store.contract_embeddings import ContractEmbeddingStore, ContractEmbeddings
+from app.services.vector_store.compaction import CompactionWorker
+from app.services.vector_store.clause_store import ClauseEmbeddingStore
+from app.services.vector_store.segment import VectorStorage, FLAT_STORAGE, STORAGE_MODES
+from app.services.vector_store.clause_library import StandardClauseLibrary
+from app.services.encoder_service import SentenceEncoder
+
 logger = logging.getLogger(__name__)
 
+# Serving encoder; stored clause vectors are tagged with it as their model_version
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+SEARCH_MODES = ("vector", "hybrid")
+# Reciprocal rank fusion constant: damps the weight of the very top ranks of either list
+RRF_K = 60
+
+
+def _encode_cursor(position: Tuple[float, str, int]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[float, str, int]:
+    try:
+        score, shard_key, vector_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(score), str(shard_key), int(vector_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
 class ContractSimilarityEngine:
-    def __init__(self, model_name="all-MiniLM-L6-v2"):
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, data_dir: str = "app/data/embeddings", shard_cache_mb: int = 512, query_cache_size: int = 2048, compaction_dead_ratio: float = 0.2, compaction_interval_seconds: float = 60.0, clause_store: Optional[ClauseEmbeddingStore] = None, vector_storage: VectorStorage = FLAT_STORAGE, dedup_threshold: float = 0.97, range_search_max_results: int = 10000, encoder_backend: str = "torch", encoder_threads: int = 0, encoder_batch_size: int = 32):
         self.model_name = model_name
-        self.model = None
-        self.index = None
-        
-        self.clause_metadata: List[Dict] = []
-        self.clause_texts: List[str] = []
-        
-        self.data_dir = "app/data/embeddings"
-        self.metadata_path = os.path.join(self.data_dir, "clause_metadata.json")
-        self.embeddings_path = os.path.join(self.data_dir, "clause_embeddings.npy")
-        self.texts_path = os.path.join(self.data_dir, "clause_texts.pkl")
+        self.model: Optional[SentenceEncoder] = None
+        self.embedding_dim = None
+        # CPU inference backend; every backend must match the torch embeddings (see SentenceEncoder)
+        self.encoder_backend = encoder_backend
+        self.encoder_threads = encoder_threads
+        self.encoder_batch_size = encoder_batch_size
+
+        # Cached query vectors are only valid for the model that produced them
+        self.model_version = model_name
+        self.query_cache = QueryEmbeddingCache(max_entries=query_cache_size)
+
+        # Vectors are partitioned per tenant; each shard lives under <data_dir>/tenants/<key>/
+        self.data_dir = data_dir
+        self.shards_dir = os.path.join(self.data_dir, "tenants")
+        self.shard_cache_bytes = shard_cache_mb * 1024 * 1024
+        self.shards: Optional[ShardCache] = None
+        self.contract_embeddings = ContractEmbeddingStore(self.data_dir, self._embed_contract)
+        if vector_storage.mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown vector storage mode '{vector_storage.mode}' (expected one of {STORAGE_MODES})")
+        self.vector_storage = vector_storage
+        # Cosine at or above which a new clause of the same type is stored as a reference, not a vector
+        self.dedup_threshold = dedup_threshold
+        # Server-side cap on the matches one threshold (range) query may page through
+        self.range_search_max_results = range_search_max_results
+
+        # Reference clauses (app/data/clause_library.json), embedded by build_clause_library.py
+        self.clause_library_source = os.path.join(os.path.dirname(self.data_dir), "clause_library.json")
+        self.clause_library_path = os.path.join(self.data_dir, "clause_library.npz")
+        self.clause_library: Optional[StandardClauseLibrary] = None
+
+        # Durable copy of every clause vector in the database; shards are rebuilt from it
+        self.clause_store = clause_store
+        self.compactor = CompactionWorker(
+            lambda: self.shards.loaded_shards() if self.shards else [],
+            dead_ratio_threshold=compaction_dead_ratio,
+            interval_seconds=compaction_interval_seconds
+        )
         
         self._is_initialized = False
 
     def _initialize_model(self):
         if not self.model:
             try:
-                from sentence_transformers import SentenceTransformer
-                self.model = SentenceTransformer(self.model_name)
+                self.model = SentenceEncoder(
+                    self.model_name, backend=self.encoder_backend, threads=self.encoder_threads,
+                    batch_size=self.encoder_batch_size, cache_dir=os.path.join(self.data_dir, "encoders")
+                )
                 self.embedding_dim = self.model.get_sentence_embedding_dimension()
-                self.index = faiss.IndexFlatIP(self.embedding_dim)
-                self._load_existing_data()
+                self.shards = ShardCache(self._load_shard, self.shard_cache_bytes)
+                self.clause_library = self._load_clause_library()
+                self.compactor.start()
                 self._is_initialized = True
             except Exception as e:
                 logger.error(f"Failed to initialize Similarity Engine: {e}")
                 raise e
 
-    def _load_existing_data(self):
-        if os.path.exists(self.metadata_path) and os.path.exists(self.embeddings_path):
-            try:
-                with open(self.metadata_path, 'r') as f:
-                    self.clause_metadata = json.load(f)
-                with open(self.texts_path, 'rb') as f:
-                    self.clause_texts = pickle.load(f)
-                embeddings = np.load(self.embeddings_path)
-                if self.index:
-                    self.index.reset()
-                    self.index.add(embeddings.astype('float32'))
-                logger.info(f"✅ Loaded {len(self.clause_texts)} clauses into Vector DB")
-            except Exception as e:
-                logger.error(f"Could not load existing embeddings: {e}")
+    def _load_clause_library(self) -> Optional[StandardClauseLibrary]:
+        try:
+            library = StandardClauseLibrary.load(self.clause_library_path, self.model_version, self.clause_library_source)
+            if library is None and os.path.exists(self.clause_library_source):
+                logger.warning("Standard clause library not built for this encoder; embedding it now (run build_clause_library.py)")
+                library = self.build_clause_library()
+            return library
+        except Exception as e:
+            logger.error(f"Could not load the standard clause library: {e}", exc_info=True)
+            return None
 
-    def _save_data(self):
-        """Safely saves FAISS data, avoiding Windows File Lock errors"""
+    def build_clause_library(self) -> StandardClauseLibrary:
+        """Embeds the standard clauses once and saves them next to the tenant shards"""
+        library = StandardClauseLibrary.build(self.clause_library_source, self.model.encode, self.model_version)
         os.makedirs(self.data_dir, exist_ok=True)
-        if not self.clause_texts: return
-        
+        library.save(self.clause_library_path)
+        self.clause_library = library
+        return library
+
+    def _load_shard(self, key: str) -> VectorShard:
+        shard = VectorShard(key, self.shards_dir, self.embedding_dim, self.vector_storage)
+        shard.load()
+        if self.clause_store:
+            self._sync_shard_from_db(shard)
+        return shard
+
+    def _sync_shard_from_db(self, shard: VectorShard) -> int:
+        """
+        Pulls rows this node hasn't indexed yet from the clause_embeddings table, in chunks.
+        On a node with no local shard files this warms the whole tenant index.
+        """
+        added = 0
         try:
-            embeddings = self.model.encode(self.clause_texts)
-            faiss.normalize_L2(embeddings)
-            
-            # 🛡️ THE FIX: Open a file object first so numpy doesn't silently add an extra ".npy"
-            with open(self.embeddings_path + ".tmp", 'wb') as f:
-                np.save(f, embeddings)
-                
-            with open(self.metadata_path + ".tmp", 'w') as f:
-                json.dump(self.clause_metadata, f, indent=2)
-            with open(self.texts_path + ".tmp", 'wb') as f:
-                pickle.dump(self.clause_texts, f)
-                
-            # Safe replace for Windows
-            def safe_replace(src, dst):
-                if os.path.exists(dst):
-                    try:
-                        os.remove(dst)
-                    except PermissionError:
-                        pass # Windows file lock fallback
-                shutil.move(src, dst)
-
-            safe_replace(self.embeddings_path + ".tmp", self.embeddings_path)
-            safe_replace(self.metadata_path + ".tmp", self.metadata_path)
-            safe_replace(self.texts_path + ".tmp", self.texts_path)
-            
+            for ids, embeddings, texts, metadata in self.clause_store.stream(company_id_for(shard.key), after_id=shard.next_id - 1, model_version=self.model_version):
+                shard.add(embeddings, texts, metadata, ids=ids)
+                added += len(ids)
+            if added:
+                shard.save(force=True)
+                logger.info(f"✅ Synced {added} clauses into shard '{shard.key}' from the database")
         except Exception as e:
-            logger.error(f"❌ Failed to save Vector DB: {e}", exc_info=True)
+            logger.error(f"Could not sync shard '{shard.key}' from the database: {e}", exc_info=True)
+        return added
 
-    def add_clause_to_database(self, clause_text: str, clause_type: str, source_contract: str = "unknown", risk_level: str = "MEDIUM", tags: List[str] = None):
+    def rebuild_shard(self, company_id: Optional[int] = None) -> int:
+        """Discards a tenant's local shard files and rebuilds them from the database. Returns the live clause count."""
         self._initialize_model()
-        clause_text = clause_text.strip()
-        if not clause_text: return -1
+        if not self.clause_store:
+            raise RuntimeError("No clause embedding store configured")
+        key = shard_key_for(company_id)
+        shard = self._shard(key)
+        # Document vectors aren't in the database yet: checkpoint them and keep their files
+        shard.save(force=True)
+        keep = {os.path.basename(shard.contract_vectors_path), os.path.basename(shard.contract_metadata_path)}
+        self.shards.drop(key)
+        for name in os.listdir(shard.dir):
+            if name in keep: continue
+            path = os.path.join(shard.dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+        return len(self._shard(key))
 
-        embedding = self.model.encode([clause_text])
-        faiss.normalize_L2(embedding)
-        self.index.add(embedding.astype('float32'))
-        
-        self.clause_metadata.append({
-            "id": len(self.clause_texts),
+    def _shards_for_search(self, company_id: Optional[int], include_public: bool) -> List[VectorShard]:
+        keys = []
+        if company_id is not None:
+            keys.append(shard_key_for(company_id))
+        if include_public or company_id is None:
+            keys.append(PUBLIC_SHARD_KEY)
+        return [self._shard(k) for k in keys]
+
+    def _shard(self, key: str) -> VectorShard:
+        """Loaded shard, caught up with writes made by other workers"""
+        shard = self.shards.get(key)
+        shard.sync()
+        return shard
+
+    def _save_data(self):
+        """Persists every loaded shard that changed since its last save"""
+        if self.shards:
+            self.shards.save_all()
+
+    def add_clause_to_database(self, clause_text: str, clause_type: str, source_contract: str = "unknown", risk_level: str = "MEDIUM", tags: List[str] = None, company_id: Optional[int] = None, contract_id: Optional[int] = None):
+        ids = self.add_clauses_to_database(
+            [(clause_text, clause_type)], source_contract=source_contract, risk_level=risk_level,
+            tags=tags, company_id=company_id, contract_id=contract_id
+        )
+        return ids[0] if ids else -1
+
+    def add_clauses_to_database(self, clauses: List[Tuple[str, str]], source_contract: str = "unknown", risk_level: str = "MEDIUM", tags: List[str] = None, company_id: Optional[int] = None, contract_id: Optional[int] = None) -> List[int]:
+        """
+        Indexes a batch of (clause_text, clause_type) pairs with one encode call.
+        The batch is published to searchers as a single new shard snapshot.
+
+        Boilerplate repeats across contracts: a clause whose normalized text, or whose vector
+        (same clause type, cosine >= dedup_threshold), matches one already in the tenant's shard
+        or earlier in the batch is recorded as another reference to that clause instead of a
+        new vector. Returns the vector id each input clause resolved to.
+        """
+        self._initialize_model()
+        clauses = [(text.strip(), clause_type) for text, clause_type in clauses if text and text.strip()]
+        if not clauses: return []
+
+        embeddings = self.model.encode([text for text, _ in clauses]).astype('float32')
+        faiss.normalize_L2(embeddings)
+
+        added_date = datetime.now().isoformat()
+        texts = [text for text, _ in clauses]
+        metadata = [{
             "clause_type": clause_type,
             "source_contract": source_contract,
+            "contract_id": contract_id,
+            "company_id": company_id,
             "risk_level": risk_level,
             "tags": tags or [],
-            "added_date": datetime.now().isoformat(),
-            "length_chars": len(clause_text)
-        })
-        self.clause_texts.append(clause_text)
-        return len(self.clause_texts) - 1
+            "added_date": added_date,
+            "length_chars": len(text),
+            "content_hash": clause_fingerprint(text),
+            "sources": [{"contract_id": contract_id, "source_contract": source_contract}],
+            "ref_count": 1
+        } for text, clause_type in clauses]
+        # Deviation from the closest standard clause, for the whole batch in one matrix product
+        if self.clause_library:
+            for meta, deviation in zip(metadata, self.clause_library.score(embeddings, [t for _, t in clauses])):
+                meta.update(deviation)
+
+        key = shard_key_for(company_id)
+        shard = self._shard(key)
+        hashes = [meta["content_hash"] for meta in metadata]
+        types = [clause_type for _, clause_type in clauses]
+        resolved = shard.snapshot.find_duplicates(embeddings, hashes, types, self.dedup_threshold)
+
+        # Duplicates within the batch point at the first clause they repeat (one matrix product)
+        parents: Dict[int, int] = {}
+        fresh = [i for i, dup in enumerate(resolved) if dup is None]
+        if len(fresh) > 1:
+            cosine = embeddings[fresh] @ embeddings[fresh].T
+            for a, i in enumerate(fresh):
+                for b in range(a):
+                    j = fresh[b]
+                    if j in parents or types[i] != types[j]: continue
+                    if hashes[i] == hashes[j] or cosine[a, b] >= self.dedup_threshold:
+                        parents[i] = j
+                        break
+
+        existing = [i for i, dup in enumerate(resolved) if dup is not None]
+        references = []
+        if existing:
+            recorded = shard.add_references([(resolved[i], contract_id, source_contract) for i in existing])
+            for i, ok in zip(existing, recorded):
+                if ok:
+                    references.append((resolved[i], contract_id, source_contract))
+                else:
+                    # Removed since the snapshot was read; index it afresh
+                    resolved[i] = None
+
+        unique = [i for i, dup in enumerate(resolved) if dup is None and i not in parents]
+        if unique:
+            unique_texts = [texts[i] for i in unique]
+            unique_meta = [metadata[i] for i in unique]
+            # The database row is written first; its id becomes the vector id in every worker's shard
+            ids = None
+            if self.clause_store:
+                ids = self.clause_store.insert(unique_texts, embeddings[unique], unique_meta, self.model_version)
+            ids = shard.add(embeddings[unique], unique_texts, unique_meta, ids=ids)
+            for i, vector_id in zip(unique, ids):
+                resolved[i] = vector_id
+
+        if parents:
+            children = [(resolved[parent], contract_id, source_contract) for parent in parents.values()]
+            references.extend(ref for ref, ok in zip(children, shard.add_references(children)) if ok)
+            for child, parent in parents.items():
+                resolved[child] = resolved[parent]
+
+        if references and self.clause_store:
+            self.clause_store.add_references(references)
+        self.shards.touch(key)
+        return resolved
+
+    def remove_contract(self, contract_id: int, company_id: Optional[int] = None) -> int:
+        """
+        Drops a contract's clause references and its document vector. Clauses no other contract
+        references are tombstoned and filtered at query time until the background compactor
+        rewrites the shard.
+        """
+        self._initialize_model()
+        shard = self._shard(shard_key_for(company_id))
+        vector_ids = shard.remove_contract(contract_id)
+        if self.clause_store:
+            self.clause_store.delete_contract(contract_id, vector_ids)
+        self.contract_embeddings.invalidate(contract_id)
+        shard.save()
+        if shard.dead_ratio() >= self.compactor.dead_ratio_threshold:
+            self.compactor.wake()
+        return len(vector_ids)
+
+    def remove_tenant(self, company_id: int):
+        """
+        Drops a departing tenant's clause vectors everywhere: its clause_embeddings rows first,
+        so no database warm-up can bring them back, then its shard, through the change log so
+        every worker empties its copy (see VectorShard.clear)
+        """
+        self._initialize_model()
+        key = shard_key_for(company_id)
+        if self.clause_store:
+            deleted = self.clause_store.delete_company(company_id)
+            logger.info(f"Deleted {deleted} clause_embeddings rows of company {company_id}")
+        if self.shards.peek(key) is not None or os.path.isdir(os.path.join(self.shards_dir, key)):
+            self._shard(key).clear()
+        self.shards.drop(key)
+
+    def contract_clause_deviations(self, contract_id: int, company_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """A contract's indexed clauses, most non-standard first, from the deviation scored at ingestion"""
+        self._initialize_model()
+        shard = self._shard(shard_key_for(company_id))
+        snapshot = shard.snapshot
+        results = []
+        for vector_id in shard.contract_vector_ids.get(contract_id, ()):
+            meta = snapshot.clause_metadata.get(vector_id)
+            if meta is None or not snapshot.is_live(vector_id): continue
+            standard_id = meta.get("standard_clause_id")
+            results.append({
+                "text": snapshot.clause_texts.get(vector_id),
+                "clause_type": meta["clause_type"],
+                "standard_deviation": meta.get("standard_deviation"),
+                "standard_clause_id": standard_id,
+                "standard_clause": self.clause_library.text_of(standard_id) if self.clause_library and standard_id else None
+            })
+        results.sort(key=lambda r: -1.0 if r["standard_deviation"] is None else r["standard_deviation"], reverse=True)
+        return results
+
+    def _encode_queries(self, query_texts: List[str]) -> np.ndarray:
+        """Normalized query embeddings, served from the LRU where possible. Misses are encoded in one forward pass."""
+        embeddings: List[Optional[np.ndarray]] = [self.query_cache.get(self.model_version, q) for q in query_texts]
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
+        if missing:
+            encoded = self.model.encode([query_texts[i] for i in missing]).astype('float32')
+            faiss.normalize_L2(encoded)
+            for i, emb in zip(missing, encoded):
+                embeddings[i] = emb
+                self.query_cache.put(self.model_version, query_texts[i], emb)
+        return np.vstack(embeddings).astype('float32')
+
+    def find_similar_clauses(self, query_text: str, clause_type: Optional[str] = None, top_k: int = 10, similarity_threshold: float = 0.7, filter_by_risk: Optional[str] = None, company_id: Optional[int] = None, include_public: bool = True, search_mode: str = "vector") -> List[Dict[str, Any]]:
+        """
+        Searches the caller's tenant shard, plus the shared public library when requested.
+        search_mode="hybrid" fuses BM25 and vector rankings, so exact phrases ("liquidated damages") surface.
+        """
+        return self.find_similar_clauses_batch(
+            [query_text], clause_type=clause_type, top_k=top_k, similarity_threshold=similarity_threshold,
+            filter_by_risk=filter_by_risk, company_id=company_id, include_public=include_public, search_mode=search_mode
+        )[0]
+
+    def find_similar_clauses_batch(self, query_texts: List[str], clause_type: Optional[str] = None, top_k: int = 10, similarity_threshold: float = 0.7, filter_by_risk: Optional[str] = None, company_id: Optional[int] = None, include_public: bool = True, search_mode: str = "vector") -> List[List[Dict[str, Any]]]:
+        """Runs many queries with one encode call and one multi-query FAISS search per shard."""
+        self._initialize_model()
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{search_mode}' (expected one of {SEARCH_MODES})")
+        if not query_texts: return []
+        shards = [s for s in self._shards_for_search(company_id, include_public) if len(s)]
+        if not shards: return [[] for _ in query_texts]
+
+        query_embeddings = self._encode_queries(query_texts)
 
-    def find_similar_clauses(self, query_text: str, clause_type: Optional[str] = None, top_k: int = 10, similarity_threshold: float = 0.7, filter_by_risk: Optional[str] = None) -> List[Dict[str, Any]]:
+        candidates = [[] for _ in query_texts]
+        for shard in shards:
+            # One snapshot per shard for the whole query: concurrent writes can't skew ids vs metadata
+            snapshot = shard.snapshot
+            distances, indices = snapshot.search(query_embeddings, top_k * 5)
+            for q in range(len(query_texts)):
+                vector_hits = [(int(v), float(score)) for v, score in zip(indices[q], distances[q]) if snapshot.is_live(int(v))]
+                if search_mode == "vector":
+                    candidates[q].extend((score, shard.key, snapshot, v, score, None) for v, score in vector_hits)
+                else:
+                    lexical_ids, lexical_scores = snapshot.search_lexical(query_texts[q], top_k * 5)
+                    lexical_hits = list(zip(lexical_ids.tolist(), lexical_scores.tolist()))
+                    candidates[q].extend(self._fuse_rankings(shard.key, snapshot, vector_hits, lexical_hits))
+
+        return [
+            self._collect_results(c, clause_type, top_k, similarity_threshold, filter_by_risk, hybrid=search_mode == "hybrid")
+            for c in candidates
+        ]
+
+    def find_clauses_above_threshold(self, query_text: str, similarity_threshold: float, clause_type: Optional[str] = None, filter_by_risk: Optional[str] = None, company_id: Optional[int] = None, include_public: bool = True, page_size: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Every clause scoring >= similarity_threshold, via FAISS range_search instead of a guessed top_k.
+
+        Results are ordered by (similarity desc, shard, vector id) and returned `page_size` at a
+        time; pass the returned `next_cursor` to fetch the next page. The cursor is the position
+        of the last result, so pages stay consistent while clauses are added or removed, and each
+        page only ranks the matches after it. A page holds at most `range_search_max_results`
+        matches (`truncated` says when page_size was cut down to that); every match stays
+        reachable through the cursor.
+        """
         self._initialize_model()
-        if not self.clause_texts: return []
+        after = _decode_cursor(cursor) if cursor else None
+        shards = [s for s in self._shards_for_search(company_id, include_public) if len(s)]
+        query_embedding = self._encode_queries([query_text])[0]
+        truncated = page_size > self.range_search_max_results
+        page_size = min(page_size, self.range_search_max_results)
+
+        def shard_matches(shard):
+            snapshot = shard.snapshot
+            shard_after = None
+            if after:
+                # Ties on the cursor's score continue in later shards, or past its id in its own shard
+                after_score, after_key, after_id = after
+                if shard.key == after_key:
+                    shard_after = (after_score, after_id)
+                else:
+                    shard_after = (after_score, -1 if shard.key > after_key else np.iinfo(np.int64).max)
+            scores, ids = snapshot.range_search(query_embedding, similarity_threshold, after=shard_after)
+            for score, vector_id in zip(scores.tolist(), ids.tolist()):
+                meta = snapshot.clause_metadata.get(vector_id)
+                if meta is None: continue
+                if clause_type and meta["clause_type"] != clause_type: continue
+                if filter_by_risk and meta["risk_level"] != filter_by_risk: continue
+                yield score, shard.key, vector_id, snapshot
 
-        query_embedding = self.model.encode([query_text])
-        faiss.normalize_L2(query_embedding)
-        distances, indices = self.index.search(query_embedding.astype('float32'), top_k * 5)
+        matches = heapq.nsmallest(
+            page_size + 1,
+            (m for shard in shards for m in shard_matches(shard)),
+            key=lambda m: (-m[0], m[1], m[2])
+        )
+
+        page = matches[:page_size]
+        results = []
+        for score, shard_key, vector_id, snapshot in page:
+            meta = snapshot.clause_metadata[vector_id]
+            results.append({
+                "vector_id": vector_id,
+                "text": snapshot.clause_texts.get(vector_id),
+                "similarity_score": round(score, 3),
+                "clause_type": meta["clause_type"],
+                "risk_level": meta["risk_level"],
+                "source_contract": meta["source_contract"],
+                "ref_count": meta.get("ref_count", 1),
+                "shard": shard_key,
+                "match_type": self._get_match_type(score)
+            })
+        has_more = len(matches) > page_size
+        return {
+            "results": results,
+            "next_cursor": _encode_cursor(page[-1][:3]) if has_more else None,
+            "truncated": truncated
+        }
+
+    def _fuse_rankings(self, shard_key: str, snapshot, vector_hits: List[Tuple[int, float]], lexical_hits: List[Tuple[int, float]]) -> list:
+        """Reciprocal rank fusion of one shard's vector and BM25 rankings"""
+        fused: Dict[int, List] = {}
+        for rank, (vector_id, similarity) in enumerate(vector_hits):
+            fused[vector_id] = [1.0 / (RRF_K + rank + 1), similarity, None]
+        for rank, (vector_id, bm25) in enumerate(lexical_hits):
+            entry = fused.setdefault(vector_id, [0.0, None, None])
+            entry[0] += 1.0 / (RRF_K + rank + 1)
+            entry[2] = bm25
+        return [(rrf, shard_key, snapshot, vector_id, similarity, bm25) for vector_id, (rrf, similarity, bm25) in fused.items()]
+
+    def _collect_results(self, candidates: list, clause_type: Optional[str], top_k: int, similarity_threshold: float, filter_by_risk: Optional[str], hybrid: bool = False) -> List[Dict[str, Any]]:
+        # Candidates are (rank_score, shard_key, snapshot, vector_id, similarity, bm25_score)
+        candidates.sort(key=lambda c: c[0], reverse=True)
         
         results = []
         seen_texts = set()
         
-        for idx, score in zip(indices[0], distances[0]):
-            if idx < 0 or idx >= len(self.clause_texts): continue
-            similarity = float(score)
-            if similarity < similarity_threshold: continue
+        for rank_score, shard_key, snapshot, vector_id, similarity, bm25 in candidates:
+            if not hybrid and similarity < similarity_threshold: break
+            # Lexical matches qualify on their own; vector-only matches still need the threshold
+            if hybrid and not bm25 and (similarity is None or similarity < similarity_threshold): continue
             
-            meta = self.clause_metadata[idx]
-            text = self.clause_texts[idx]
+            meta = snapshot.clause_metadata.get(vector_id)
+            text = snapshot.clause_texts.get(vector_id)
+            if meta is None or text is None: continue
             
             if clause_type and meta["clause_type"] != clause_type: continue
             if filter_by_risk and meta["risk_level"] != filter_by_risk: continue
             if text in seen_texts: continue
             seen_texts.add(text)
             
-            results.append({
+            result = {
                 "text": text,
-                "similarity_score": round(similarity, 3),
+                "similarity_score": round(similarity, 3) if similarity is not None else None,
                 "clause_type": meta["clause_type"],
                 "risk_level": meta["risk_level"],
                 "source_contract": meta["source_contract"],
-                "match_type": self._get_match_type(similarity)
+                "ref_count": meta.get("ref_count", 1),
+                "shard": shard_key,
+                "match_type": self._get_match_type(similarity) if similarity is not None else "LEXICAL"
+            }
+            if hybrid:
+                result["bm25_score"] = round(bm25 or 0.0, 3)
+                result["fusion_score"] = round(rank_score, 5)
+            results.append(result)
+            if len(results) >= top_k: break
+        return results
+
+    def _embed_contract(self, text: str) -> ContractEmbeddings:
+        """Document + clause vectors for one contract in a single batched encode"""
+        clauses = self._extract_clauses(text)
+        return self._contract_embeddings(clauses, self.model.encode([text] + clauses))
+
+    def _contract_embeddings(self, clauses: List[str], vectors: np.ndarray) -> ContractEmbeddings:
+        """Splits one contract's [document] + clauses vectors"""
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        faiss.normalize_L2(vectors)
+        return ContractEmbeddings(
+            fingerprint="",
+            clauses=clauses,
+            clause_embeddings=vectors[1:].reshape(len(clauses), self.embedding_dim),
+            document_embedding=vectors[0]
+        )
+
+    def get_contract_embeddings(self, contract_id: int, text: str) -> ContractEmbeddings:
+        """Cached per-contract embeddings; only recomputed when the contract text changes"""
+        self._initialize_model()
+        return self.contract_embeddings.get(contract_id, text)
+
+    def compare_contract_records(self, contract1_id: int, text1: str, contract2_id: int, text2: str) -> Dict[str, Dict[str, Any]]:
+        """Overall and clause comparison of two stored contracts, reusing their cached embeddings."""
+        self._initialize_model()
+        emb1 = self.get_contract_embeddings(contract1_id, text1)
+        emb2 = self.get_contract_embeddings(contract2_id, text2)
+        return {
+            "overall": self._compare_overall(emb1, emb2),
+            "clauses": self._compare_clauses(emb1, emb2)
+        }
+
+    def _contract_vector(self, embeddings: ContractEmbeddings) -> np.ndarray:
+        """Mean-pooled clause vector, falling back to the document vector for clause-less texts"""
+        if len(embeddings.clauses):
+            pooled = embeddings.clause_embeddings.mean(axis=0, keepdims=True).astype('float32')
+            faiss.normalize_L2(pooled)
+            return pooled[0]
+        return embeddings.document_embedding
+
+    def index_contract(self, contract_id: int, text: str, company_id: Optional[int] = None, contract_name: str = "", risk_level: str = "UNKNOWN"):
+        """Stores (or refreshes) the document-level vector of a contract in its tenant shard"""
+        self._initialize_model()
+        vector = self._contract_vector(self.get_contract_embeddings(contract_id, text))
+        key = shard_key_for(company_id)
+        self._shard(key).upsert_contract(contract_id, vector, {
+            "contract_name": contract_name,
+            "risk_level": risk_level
+        })
+        self.shards.touch(key)
+        return vector
+
+    def index_contracts_bulk(self, contracts: List[Dict[str, Any]], processes: int = 0) -> int:
+        """
+        Re-indexing path for backfills: encodes every contract's document and clause texts in one
+        multi-process pass, then stores the document vectors. Each entry needs contract_id and
+        text, and may carry company_id, contract_name and risk_level.
+        """
+        self._initialize_model()
+        splits, texts = [], []
+        for contract in contracts:
+            clauses = self._extract_clauses(contract["text"])
+            splits.append((len(texts), clauses))
+            texts.extend([contract["text"]] + clauses)
+        vectors = self.model.encode_multi_process(texts, processes=processes)
+
+        for contract, (start, clauses) in zip(contracts, splits):
+            embeddings = self._contract_embeddings(clauses, vectors[start:start + 1 + len(clauses)])
+            self.contract_embeddings.put(contract["contract_id"], contract["text"], embeddings)
+            key = shard_key_for(contract.get("company_id"))
+            self._shard(key).upsert_contract(contract["contract_id"], self._contract_vector(embeddings), {
+                "contract_name": contract.get("contract_name", ""),
+                "risk_level": contract.get("risk_level", "UNKNOWN")
+            })
+            self.shards.touch(key)
+        return len(contracts)
+
+    def find_similar_contracts(self, contract_id: int, text: str, company_id: Optional[int] = None, top_k: int = 5, contract_name: str = "", risk_level: str = "UNKNOWN") -> List[Dict[str, Any]]:
+        """Top-k most similar contracts within the same tenant, ranked by pooled clause vectors."""
+        self._initialize_model()
+        shard = self._shard(shard_key_for(company_id))
+        vector = shard.contract_vector(contract_id)
+        if vector is None:
+            # Contracts uploaded before the document index existed are indexed lazily
+            vector = self.index_contract(contract_id, text, company_id, contract_name, risk_level)
+
+        snapshot = shard.snapshot
+        distances, ids = snapshot.search_contracts(vector, top_k + 1)
+        results = []
+        for other_id, score in zip(ids[0], distances[0]):
+            other_id = int(other_id)
+            if other_id < 0 or other_id == contract_id: continue
+            meta = snapshot.contract_metadata.get(other_id, {})
+            similarity = float(score)
+            results.append({
+                "contract_id": other_id,
+                "contract_name": meta.get("contract_name"),
+                "risk_level": meta.get("risk_level"),
+                "similarity_score": round(similarity, 3),
+                "interpretation": self._interpret_similarity(similarity)
             })
             if len(results) >= top_k: break
         return results
@@ -148,72 +601,59 @@ class ContractSimilarityEngine:
     # ✅ FIXED: Full Implementation of 1:1 Contract Comparison
     def compare_contracts(self, text1: str, text2: str, compare_by: str = "clauses") -> Dict[str, Any]:
         self._initialize_model()
+        emb1 = self._embed_contract(text1)
+        emb2 = self._embed_contract(text2)
         
         # 1. Overall Semantic Comparison
         if compare_by == "overall":
-            emb1 = self.model.encode([text1])
-            emb2 = self.model.encode([text2])
-            faiss.normalize_L2(emb1)
-            faiss.normalize_L2(emb2)
-            similarity = float(np.dot(emb1, emb2.T)[0][0])
-            return {
-                "similarity_score": round(similarity, 3),
-                "comparison_type": "overall",
-                "interpretation": self._interpret_similarity(similarity)
-            }
+            return self._compare_overall(emb1, emb2)
         
         # 2. Detailed Clause-by-Clause Comparison
         elif compare_by == "clauses":
-            # Extract clauses on the fly
-            clauses1 = self._extract_clauses(text1)
-            clauses2 = self._extract_clauses(text2)
-            
-            if not clauses1 or not clauses2:
-                return {
-                    "similarity_score": 0.0,
-                    "comparison_type": "clauses",
-                    "num_clauses_compared": 0,
-                    "clause_comparisons": []
-                }
-
-            # Create a temporary index for Contract 2
-            emb2 = self.model.encode(clauses2)
-            faiss.normalize_L2(emb2)
-            temp_index = faiss.IndexFlatIP(self.embedding_dim)
-            temp_index.add(emb2.astype('float32'))
-
-            comparisons = []
+            return self._compare_clauses(emb1, emb2)
             
-            # Compare first 20 clauses of Contract 1 against ALL of Contract 2
-            for c1_text in clauses1[:20]: 
-                emb1 = self.model.encode([c1_text])
-                faiss.normalize_L2(emb1)
-                
-                # Search for best match in Contract 2
-                D, I = temp_index.search(emb1.astype('float32'), 1)
-                
-                sim = float(D[0][0])
-                best_match_idx = I[0][0]
-                
-                # Only keep relevant matches
-                if sim > 0.6: 
-                    best_match_text = clauses2[best_match_idx]
-                    comparisons.append({
-                        "clause": c1_text,
-                        "best_match": best_match_text,
-                        "similarity": round(sim, 3)
-                    })
-
-            avg_sim = sum(c['similarity'] for c in comparisons) / len(comparisons) if comparisons else 0
+        return {}
+
+    def _compare_overall(self, emb1: ContractEmbeddings, emb2: ContractEmbeddings) -> Dict[str, Any]:
+        similarity = float(np.dot(emb1.document_embedding, emb2.document_embedding))
+        return {
+            "similarity_score": round(similarity, 3),
+            "comparison_type": "overall",
+            "interpretation": self._interpret_similarity(similarity)
+        }
 
+    def _compare_clauses(self, emb1: ContractEmbeddings, emb2: ContractEmbeddings) -> Dict[str, Any]:
+        if not emb1.clauses or not emb2.clauses:
             return {
-                "similarity_score": round(avg_sim, 3),
+                "similarity_score": 0.0,
                 "comparison_type": "clauses",
-                "num_clauses_compared": len(comparisons),
-                "clause_comparisons": comparisons
+                "num_clauses_compared": 0,
+                "clause_comparisons": []
             }
-            
-        return {}
+
+        # Compare first 20 clauses of Contract 1 against ALL of Contract 2 in one matrix product
+        sims = emb1.clause_embeddings[:20] @ emb2.clause_embeddings.T
+        best_match_idx = sims.argmax(axis=1)
+        best_sims = sims[np.arange(len(best_match_idx)), best_match_idx]
+
+        comparisons = []
+        for c1_text, match_idx, sim in zip(emb1.clauses[:20], best_match_idx, best_sims):
+            # Only keep relevant matches
+            if sim > 0.6:
+                comparisons.append({
+                    "clause": c1_text,
+                    "best_match": emb2.clauses[int(match_idx)],
+                    "similarity": round(float(sim), 3)
+                })
+
+        avg_sim = sum(c['similarity'] for c in comparisons) / len(comparisons) if comparisons else 0
+
+        return {
+            "similarity_score": round(avg_sim, 3),
+            "comparison_type": "clauses",
+            "num_clauses_compared": len(comparisons),
+            "clause_comparisons": comparisons
+        }
 
     def _extract_clauses(self, text: str) -> List[str]:
         """Split text into clause-like chunks"""
@@ -233,9 +673,20 @@ class ContractSimilarityEngine:
         if score > 0.5: return "Structural Similarity"
         return "Different Content"
 
-    def get_database_stats(self) -> Dict[str, Any]:
+    def get_database_stats(self, company_id: Optional[int] = None) -> Dict[str, Any]:
+        if not self._is_initialized:
+            return {"total_clauses": 0, "is_initialized": False, "backend": f"FAISS {self.vector_storage.mode} (per-tenant shards)"}
+        shard = self._shard(shard_key_for(company_id))
         return {
-            "total_clauses": len(self.clause_texts),
+            "total_clauses": len(shard),
+            "shard": shard.key,
+            "segments": len(shard.segments),
+            "dead_vectors": len(shard.tombstones),
+            "dead_ratio": round(shard.dead_ratio(), 3),
             "is_initialized": self._is_initialized,
-            "backend": "FAISS IndexFlatIP"
+            "backend": f"FAISS {self.vector_storage.mode} (per-tenant shards)",
+            "memory_bytes": shard.memory_bytes(),
+            "durable_store": "database" if self.clause_store else "local files",
+            "shard_cache": self.shards.stats(),
+            "query_cache": self.query_cache.stats()
         }
\ No newline at end of file
@@ -0,0 +1,177 @@
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List
+
+from app.services.vector_store.shard import VectorShard
+
+logger = logging.getLogger(__name__)
+
+
+class ShardCache:
+    """
+    LRU of loaded tenant shards bounded by a memory budget.
+    Shards are loaded on first use; the least recently used ones are saved and dropped
+    once the budget is exceeded. The shard being returned is never evicted.
+
+    The cache-wide lock only guards the LRU bookkeeping. Loading a shard (snapshot, log replay,
+    database sync) and saving evicted ones happen outside it, under a per-key lock, so one
+    tenant's cold load never stalls lookups for the others, and concurrent misses on the same
+    key load it once.
+    """
+
+    def __init__(self, loader: Callable[[str], VectorShard], max_bytes: int):
+        self._loader = loader
+        self.max_bytes = max_bytes
+        self._shards: "OrderedDict[str, VectorShard]" = OrderedDict()
+        self._lock = threading.RLock()
+        # key -> lock held while that shard loads
+        self._loading: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> VectorShard:
+        with self._lock:
+            shard = self._hit(key)
+            if shard is not None:
+                return shard
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                # Loaded by another thread while this one waited
+                shard = self._hit(key)
+                if shard is not None:
+                    return shard
+                self.misses += 1
+            try:
+                shard = self._loader(key)
+                with self._lock:
+                    self._shards[key] = shard
+                    evicted = self._evict(keep=key)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        self._save_evicted(evicted)
+        return shard
+
+    def _hit(self, key: str):
+        shard = self._shards.get(key)
+        if shard is not None:
+            self._shards.move_to_end(key)
+            self.hits += 1
+        return shard
+
+    def peek(self, key: str):
+        """Returns a loaded shard without loading it or touching the LRU order"""
+        with self._lock:
+            return self._shards.get(key)
+
+    def drop(self, key: str):
+        """Forgets a shard without saving it"""
+        with self._lock:
+            self._shards.pop(key, None)
+
+    def touch(self, key: str):
+        """Re-applies the budget after a shard grew in place"""
+        with self._lock:
+            evicted = self._evict(keep=key)
+        self._save_evicted(evicted)
+
+    def _evict(self, keep: str) -> List[VectorShard]:
+        """Drops LRU shards until the budget fits; the caller saves them after releasing the lock"""
+        evicted = []
+        while len(self._shards) > 1 and self.total_bytes() > self.max_bytes:
+            oldest_key = next(iter(self._shards))
+            if oldest_key == keep:
+                self._shards.move_to_end(oldest_key)
+                oldest_key = next(iter(self._shards))
+            evicted.append(self._shards.pop(oldest_key))
+            self.evictions += 1
+            logger.info(f"Evicted vector shard '{oldest_key}' from memory")
+        return evicted
+
+    @staticmethod
+    def _save_evicted(shards: List[VectorShard]):
+        # Every write is already in the shard's change log, so a reload racing this save loses nothing
+        for shard in shards:
+            try:
+                shard.save()
+            except Exception as e:
+                logger.error(f"Could not checkpoint evicted shard '{shard.key}': {e}", exc_info=True)
+
+    def total_bytes(self) -> int:
+        return sum(s.memory_bytes() for s in self._shards.values())
+
+    def save_all(self):
+        for shard in self.loaded_shards():
+            shard.save()
+
+    def loaded_shards(self):
+        with self._lock:
+            return list(self._shards.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded_shards": len(self._shards),
+                "memory_bytes": self.total_bytes(),
+                "memory_budget_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def normalize_query_text(text: str) -> str:
+    """Case and whitespace-insensitive cache key for a search query"""
+    return " ".join(text.lower().split())
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU of normalized query embeddings keyed by (model version, normalized text).
+    The UI sends the same handful of queries constantly, so most searches skip the encoder.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model_version: str, text: str):
+        key = (model_version, normalize_query_text(text))
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, model_version: str, text: str, embedding):
+        if self.max_entries <= 0:
+            return
+        key = (model_version, normalize_query_text(text))
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,143 @@
+import json
+import os
+import shutil
+import struct
+import zlib
+import logging
+from typing import Any, Dict, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Record header: magic, sequence number, op code, JSON length, blob length, CRC32 of JSON + blob
+_HEADER = struct.Struct("<4sQBIII")
+_MAGIC = b"VLOG"
+
+OP_ADD = 1
+OP_REMOVE_CONTRACT = 2
+OP_UPSERT_CONTRACT = 3
+OP_ADD_REFERENCES = 4
+# Drop every tombstoned vector; each worker rewrites its own segments when it applies this
+OP_COMPACT = 5
+# Drop everything in the shard (tenant removal)
+OP_RESET = 6
+
+
+def safe_replace(src: str, dst: str):
+    """
+    Atomically replace dst with src, so a concurrent reader sees either the old file or the new
+    one, never neither. Falls back to remove-then-move only when Windows refuses the replace
+    because another process holds the old file open.
+    """
+    try:
+        os.replace(src, dst)
+        return
+    except PermissionError:
+        if os.name != "nt":
+            raise
+    try:
+        os.remove(dst)
+    except (FileNotFoundError, PermissionError):
+        pass # Windows file lock fallback
+    shutil.move(src, dst)
+
+
+class FileLock:
+    """
+    Exclusive inter-process lock on `<path>`, used to serialize writers across uvicorn workers.
+    Uses flock on POSIX and msvcrt byte-range locking on Windows.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Takes the lock; with blocking=False returns False at once if another holder has it"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        try:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(self._fd)
+            self._fd = None
+            if blocking:
+                raise
+            return False
+        return True
+
+    def release(self):
+        try:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class ChangeLog:
+    """
+    Append-only log of vector store mutations for one shard generation.
+    Each record carries a global sequence number, a JSON body and an optional binary blob
+    (raw float32 vectors). Readers tail the file without locking; a record is only
+    returned once it has been written completely.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def create(self):
+        with open(self.path, 'ab'):
+            pass
+
+    def append(self, seq: int, op: int, body: Dict[str, Any], blob: bytes = b""):
+        """Writes one record. Callers must hold the shard's FileLock."""
+        payload = json.dumps(body).encode("utf-8")
+        crc = zlib.crc32(payload + blob)
+        record = _HEADER.pack(_MAGIC, seq, op, len(payload), len(blob), crc) + payload + blob
+        with open(self.path, 'ab') as f:
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read_from(self, offset: int) -> Iterator[Tuple[int, int, Dict[str, Any], bytes, int]]:
+        """Yields (seq, op, body, blob, next_offset) for every complete record after `offset`."""
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return
+                magic, seq, op, json_len, blob_len, crc = _HEADER.unpack(header)
+                if magic != _MAGIC:
+                    logger.error(f"Corrupt change log record in {self.path} at offset {offset}")
+                    return
+                data = f.read(json_len + blob_len)
+                if len(data) < json_len + blob_len:
+                    return  # Writer is still appending this record
+                if zlib.crc32(data) != crc:
+                    logger.error(f"Checksum mismatch in {self.path} at offset {offset}")
+                    return
+                offset += _HEADER.size + json_len + blob_len
+                yield seq, op, json.loads(data[:json_len].decode("utf-8")), data[json_len:], offset
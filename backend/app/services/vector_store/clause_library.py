@@ -0,0 +1,105 @@
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+import faiss
+from typing import Callable, Dict, Any, List, Optional
+
+from app.services.vector_store.change_log import safe_replace
+
+logger = logging.getLogger(__name__)
+
+
+class StandardClauseLibrary:
+    """
+    Precomputed embeddings of the reference clauses in `clause_library.json`.
+
+    The library is a few dozen vectors, so it is held as one float32 matrix: scoring a
+    contract's clauses is a single (n_clauses x n_standard) matrix product. Deviation is
+    1 - cosine to the closest standard clause of the same type (of any type when the
+    library has none for that type).
+    """
+
+    def __init__(self, ids: List[str], clause_types: List[str], texts: List[str], vectors: np.ndarray, model_version: str, source_hash: str):
+        self.ids = ids
+        self.clause_types = clause_types
+        self.texts = texts
+        self.vectors = np.ascontiguousarray(vectors, dtype='float32')
+        self.model_version = model_version
+        self.source_hash = source_hash
+        self._type_masks: Dict[str, np.ndarray] = {}
+        types = np.array(clause_types)
+        for clause_type in set(clause_types):
+            self._type_masks[clause_type] = types == clause_type
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def read_source(library_path: str) -> Dict[str, List[Dict[str, str]]]:
+        with open(library_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def source_hash_of(library_path: str) -> str:
+        with open(library_path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    @classmethod
+    def build(cls, library_path: str, encode: Callable[[List[str]], np.ndarray], model_version: str) -> "StandardClauseLibrary":
+        """Embeds every standard clause in one encode call"""
+        ids, clause_types, texts = [], [], []
+        for clause_type, entries in cls.read_source(library_path).items():
+            for entry in entries:
+                ids.append(entry["id"])
+                clause_types.append(clause_type)
+                texts.append(entry["text"])
+        vectors = np.asarray(encode(texts), dtype='float32') if texts else np.zeros((0, 1), dtype='float32')
+        faiss.normalize_L2(vectors)
+        return cls(ids, clause_types, texts, vectors, model_version, cls.source_hash_of(library_path))
+
+    def save(self, path: str):
+        with open(f"{path}.tmp", 'wb') as f:
+            np.savez(
+                f, vectors=self.vectors, ids=np.array(self.ids), clause_types=np.array(self.clause_types),
+                texts=np.array(self.texts), model_version=self.model_version, source_hash=self.source_hash
+            )
+        safe_replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path: str, model_version: str, library_path: Optional[str] = None) -> Optional["StandardClauseLibrary"]:
+        """The built library, or None when it is missing or stale (other encoder / edited JSON)"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if str(data["model_version"]) != model_version:
+                return None
+            if library_path and os.path.exists(library_path) and str(data["source_hash"]) != cls.source_hash_of(library_path):
+                return None
+            return cls(
+                data["ids"].tolist(), data["clause_types"].tolist(), data["texts"].tolist(),
+                data["vectors"], str(data["model_version"]), str(data["source_hash"])
+            )
+
+    def score(self, embeddings: np.ndarray, clause_types: List[str]) -> List[Dict[str, Any]]:
+        """Closest standard clause and deviation for each (normalized) clause embedding"""
+        if not len(self) or not len(embeddings):
+            return [{"standard_clause_id": None, "standard_deviation": None} for _ in clause_types]
+
+        similarities = np.asarray(embeddings, dtype='float32') @ self.vectors.T
+        scores = []
+        for row, clause_type in zip(similarities, clause_types):
+            mask = self._type_masks.get(clause_type)
+            best = int(np.argmax(np.where(mask, row, -np.inf))) if mask is not None else int(np.argmax(row))
+            scores.append({
+                "standard_clause_id": self.ids[best],
+                "standard_deviation": round(float(1.0 - row[best]), 4)
+            })
+        return scores
+
+    def text_of(self, standard_clause_id: str) -> Optional[str]:
+        try:
+            return self.texts[self.ids.index(standard_clause_id)]
+        except ValueError:
+            return None
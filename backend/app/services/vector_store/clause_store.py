@@ -0,0 +1,195 @@
+import numpy as np
+import logging
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models.embedding import ClauseEmbedding
+from app.services.vector_store.shard import clause_fingerprint, clause_sources
+
+logger = logging.getLogger(__name__)
+
+# (vector_ids, embeddings, texts, metadata) for one chunk of rows
+ClauseChunk = Tuple[List[int], np.ndarray, List[str], List[Dict[str, Any]]]
+
+
+def vector_to_bytes(vector: np.ndarray) -> bytes:
+    return np.ascontiguousarray(vector, dtype='<f4').tobytes()
+
+
+def vectors_from_bytes(blobs: List[bytes], embedding_dim: int) -> np.ndarray:
+    if not blobs:
+        return np.zeros((0, embedding_dim), dtype='float32')
+    return np.frombuffer(b"".join(blobs), dtype='<f4').reshape(len(blobs), embedding_dim).astype('float32')
+
+
+class ClauseEmbeddingStore:
+    """
+    Reads and writes clause vectors in the `clause_embeddings` table.
+
+    The table is the durable copy of every tenant shard: rows are bulk-inserted at ingestion,
+    their primary keys become the FAISS vector ids, and a node without local shard files
+    warms its index by streaming the rows back in id order.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], chunk_size: int = 1000):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+
+    def insert(self, texts: List[str], embeddings: np.ndarray, metadata: List[Dict[str, Any]], model_version: str) -> List[int]:
+        """Bulk-inserts one batch of clauses in a single transaction and returns their row ids"""
+        db = self.session_factory()
+        try:
+            rows = [
+                ClauseEmbedding(
+                    clause_text=text,
+                    clause_type=meta["clause_type"],
+                    embedding=vector_to_bytes(vector),
+                    embedding_dim=len(vector),
+                    model_version=model_version,
+                    content_hash=meta.get("content_hash") or clause_fingerprint(text),
+                    company_id=meta.get("company_id"),
+                    source_contract_id=meta.get("contract_id"),
+                    source_contract=meta.get("source_contract"),
+                    sources=clause_sources(meta),
+                    reference_count=len(clause_sources(meta)),
+                    risk_level=meta.get("risk_level"),
+                    tags=meta.get("tags") or [],
+                    standard_clause_id=meta.get("standard_clause_id"),
+                    standard_deviation=meta.get("standard_deviation")
+                )
+                for text, vector, meta in zip(texts, embeddings, metadata)
+            ]
+            db.add_all(rows)
+            db.flush()
+            # Read ids before commit expires the rows (avoids one SELECT per row)
+            ids = [row.id for row in rows]
+            db.commit()
+            return ids
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def stream(self, company_id: Optional[int], after_id: int = 0, model_version: Optional[str] = None) -> Iterator[ClauseChunk]:
+        """Yields one tenant's rows with id > after_id, in id order, `chunk_size` rows at a time"""
+        db = self.session_factory()
+        try:
+            query = db.query(
+                ClauseEmbedding.id, ClauseEmbedding.clause_text, ClauseEmbedding.clause_type,
+                ClauseEmbedding.embedding, ClauseEmbedding.embedding_dim, ClauseEmbedding.source_contract_id,
+                ClauseEmbedding.source_contract, ClauseEmbedding.sources, ClauseEmbedding.content_hash,
+                ClauseEmbedding.risk_level, ClauseEmbedding.tags, ClauseEmbedding.created_at,
+                ClauseEmbedding.standard_clause_id, ClauseEmbedding.standard_deviation
+            ).filter(ClauseEmbedding.id > after_id, ClauseEmbedding.embedding.isnot(None))
+            if company_id is None:
+                query = query.filter(ClauseEmbedding.company_id.is_(None))
+            else:
+                query = query.filter(ClauseEmbedding.company_id == company_id)
+            if model_version:
+                query = query.filter(ClauseEmbedding.model_version == model_version)
+
+            chunk = []
+            for row in query.order_by(ClauseEmbedding.id).yield_per(self.chunk_size):
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    yield self._to_chunk(chunk, company_id)
+                    chunk = []
+            if chunk:
+                yield self._to_chunk(chunk, company_id)
+        finally:
+            db.close()
+
+    def _to_chunk(self, rows: list, company_id: Optional[int]) -> ClauseChunk:
+        embeddings = vectors_from_bytes([row.embedding for row in rows], rows[0].embedding_dim)
+        metadata = []
+        for row in rows:
+            meta = {
+                "clause_type": row.clause_type,
+                "source_contract": row.source_contract or "unknown",
+                "contract_id": row.source_contract_id,
+                "company_id": company_id,
+                "risk_level": row.risk_level or "MEDIUM",
+                "tags": row.tags or [],
+                "added_date": row.created_at.isoformat() if row.created_at else None,
+                "length_chars": len(row.clause_text),
+                "content_hash": row.content_hash,
+                "standard_clause_id": row.standard_clause_id,
+                "standard_deviation": row.standard_deviation
+            }
+            # Rows written before dedup have no sources list
+            meta["sources"] = row.sources or clause_sources(meta)
+            meta["ref_count"] = len(meta["sources"])
+            metadata.append(meta)
+        return [row.id for row in rows], embeddings, [row.clause_text for row in rows], metadata
+
+    def add_references(self, references: List[Tuple[int, Optional[int], str]]):
+        """Records (row_id, contract_id, source_contract) references to rows that already exist"""
+        if not references:
+            return
+        db = self.session_factory()
+        try:
+            rows = {row.id: row for row in db.query(ClauseEmbedding).filter(ClauseEmbedding.id.in_({r[0] for r in references}))}
+            for row_id, contract_id, source_contract in references:
+                row = rows.get(row_id)
+                if row is None:
+                    continue
+                sources = self._row_sources(row) + [{"contract_id": contract_id, "source_contract": source_contract}]
+                row.sources = sources
+                row.reference_count = len(sources)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def delete_contract(self, contract_id: int, vector_ids: Optional[List[int]] = None) -> int:
+        """
+        Drops a contract's references. Rows no other contract references are deleted; shared
+        rows are re-pointed at their next remaining contract. Returns the number of deleted rows.
+        """
+        db = self.session_factory()
+        try:
+            criterion = ClauseEmbedding.source_contract_id == contract_id
+            if vector_ids:
+                criterion = or_(criterion, ClauseEmbedding.id.in_(list(vector_ids)))
+            deleted = 0
+            for row in db.query(ClauseEmbedding).filter(criterion):
+                remaining = [src for src in self._row_sources(row) if src.get("contract_id") != contract_id]
+                if not remaining:
+                    db.delete(row)
+                    deleted += 1
+                    continue
+                row.sources = remaining
+                row.reference_count = len(remaining)
+                row.source_contract_id = remaining[0]["contract_id"]
+                row.source_contract = remaining[0]["source_contract"]
+            db.commit()
+            return deleted
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _row_sources(row: ClauseEmbedding) -> List[Dict[str, Any]]:
+        return list(row.sources or [{"contract_id": row.source_contract_id, "source_contract": row.source_contract}])
+
+    def delete_company(self, company_id: int) -> int:
+        return self._delete(ClauseEmbedding.company_id == company_id)
+
+    def _delete(self, criterion) -> int:
+        db = self.session_factory()
+        try:
+            deleted = db.query(ClauseEmbedding).filter(criterion).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
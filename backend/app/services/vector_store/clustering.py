@@ -0,0 +1,226 @@
+import math
+import logging
+import numpy as np
+import faiss
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.embedding import ClauseEmbedding, ClauseCluster
+from app.services.vector_store.clause_store import vector_to_bytes, vectors_from_bytes
+
+logger = logging.getLogger(__name__)
+
+KMEANS_ITERATIONS = 20
+
+
+class ClauseClusterer:
+    """
+    Groups each tenant's clauses of one clause_type into templates with spherical k-means.
+
+    Runs offline over the `clause_embeddings` table. The first run for a (company, clause_type)
+    scope fits k-means on all of its vectors; later runs only assign clauses that arrived since
+    (cluster_id IS NULL) and move the centroids by a mini-batch update, until the scope has
+    grown `refit_growth` times past the last full fit, which triggers a fresh fit.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], max_clusters: int = 50, outlier_similarity: float = 0.75, refit_growth: float = 2.0, chunk_size: int = 1000):
+        self.session_factory = session_factory
+        self.max_clusters = max_clusters
+        self.outlier_similarity = outlier_similarity
+        self.refit_growth = refit_growth
+        self.chunk_size = chunk_size
+
+    def run(self, company_id: Optional[int] = None, all_companies: bool = True, model_version: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Updates every (company, clause_type) scope, or only `company_id`'s when all_companies is False"""
+        db = self.session_factory()
+        try:
+            query = db.query(ClauseEmbedding.company_id, ClauseEmbedding.clause_type).filter(ClauseEmbedding.embedding.isnot(None))
+            if not all_companies:
+                query = query.filter(_company_filter(ClauseEmbedding, company_id))
+            scopes = sorted(query.distinct().all(), key=lambda s: (s[0] is not None, s[0] or 0, s[1] or ""))
+        finally:
+            db.close()
+        return [self.update(scope_company, clause_type, model_version) for scope_company, clause_type in scopes]
+
+    def update(self, company_id: Optional[int], clause_type: str, model_version: Optional[str] = None) -> Dict[str, Any]:
+        db = self.session_factory()
+        try:
+            scope = self._scope(db, ClauseEmbedding, company_id, clause_type).filter(ClauseEmbedding.embedding.isnot(None))
+            if model_version:
+                scope = scope.filter(ClauseEmbedding.model_version == model_version)
+            total = scope.count()
+            clusters = self._scope(db, ClauseCluster, company_id, clause_type).order_by(ClauseCluster.id).all()
+            fitted_on = clusters[0].fitted_on if clusters else 0
+
+            if not clusters or total >= self.refit_growth * max(fitted_on, 1):
+                assigned = self._fit(db, scope, clusters, company_id, clause_type, total, model_version)
+                mode = "full"
+            else:
+                assigned = self._assign_new(db, scope, clusters)
+                mode = "incremental"
+            db.commit()
+            logger.info(f"Clustered {assigned} '{clause_type}' clauses of company {company_id} ({mode})")
+            return {"company_id": company_id, "clause_type": clause_type, "mode": mode, "clauses": total, "assigned": assigned}
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _fit(self, db: Session, scope, old_clusters: List[ClauseCluster], company_id: Optional[int], clause_type: str, total: int, model_version: Optional[str]) -> int:
+        ids, vectors = self._load(scope)
+        if not ids:
+            self._drop_clusters(db, old_clusters)
+            return 0
+
+        # Rule-of-thumb k; templates are few relative to clauses
+        k = min(self.max_clusters, len(ids), max(1, round(math.sqrt(len(ids) / 2))))
+        kmeans = faiss.Kmeans(vectors.shape[1], k, niter=KMEANS_ITERATIONS, spherical=True, seed=1234, min_points_per_centroid=1)
+        kmeans.train(vectors)
+        centroids = kmeans.centroids.copy()
+        faiss.normalize_L2(centroids)
+
+        similarities, labels = self._nearest(centroids, vectors)
+        clusters = []
+        for j in range(k):
+            cluster = ClauseCluster(
+                company_id=company_id, clause_type=clause_type, centroid=vector_to_bytes(centroids[j]),
+                embedding_dim=vectors.shape[1], model_version=model_version, fitted_on=total
+            )
+            members = labels == j
+            self._set_stats(cluster, similarities[members], np.asarray(ids)[members])
+            clusters.append(cluster)
+        db.add_all(clusters)
+        db.flush()
+
+        self._write_assignments(db, ids, [clusters[j].id for j in labels], similarities)
+        self._drop_clusters(db, old_clusters)
+        return len(ids)
+
+    @staticmethod
+    def _drop_clusters(db: Session, clusters: List[ClauseCluster]):
+        if not clusters:
+            return
+        # Rows outside the refit (e.g. another model version) lose their stale assignment
+        db.query(ClauseEmbedding).filter(ClauseEmbedding.cluster_id.in_([c.id for c in clusters])).update(
+            {ClauseEmbedding.cluster_id: None, ClauseEmbedding.cluster_similarity: None}, synchronize_session=False
+        )
+        for cluster in clusters:
+            db.delete(cluster)
+
+    def _assign_new(self, db: Session, scope, clusters: List[ClauseCluster]) -> int:
+        """Mini-batch k-means step: each centroid moves towards its new members with rate 1/size"""
+        centroids = vectors_from_bytes([c.centroid for c in clusters], clusters[0].embedding_dim)
+        assigned = 0
+        while True:
+            ids, vectors = self._load(scope.filter(ClauseEmbedding.cluster_id.is_(None)), limit=self.chunk_size)
+            if not ids:
+                return assigned
+            similarities, labels = self._nearest(centroids, vectors)
+            for j in np.unique(labels):
+                members = labels == j
+                cluster = clusters[j]
+                previous = cluster.size or 0
+                size = previous + int(members.sum())
+                centroids[j] += (vectors[members].sum(axis=0) - members.sum() * centroids[j]) / size
+                centroids[j] /= max(np.linalg.norm(centroids[j]), 1e-12)
+                cluster.centroid = vector_to_bytes(centroids[j])
+
+                cluster.mean_similarity = ((cluster.mean_similarity or 0.0) * previous + float(similarities[members].sum())) / size
+                cluster.outlier_count = (cluster.outlier_count or 0) + int((similarities[members] < self.outlier_similarity).sum())
+                cluster.size = size
+                if cluster.representative_clause_id is None:
+                    cluster.representative_clause_id = int(np.asarray(ids)[members][np.argmax(similarities[members])])
+            self._write_assignments(db, ids, [clusters[j].id for j in labels], similarities)
+            db.flush()
+            assigned += len(ids)
+
+    def _set_stats(self, cluster: ClauseCluster, similarities: np.ndarray, member_ids: np.ndarray):
+        cluster.size = int(len(similarities))
+        cluster.mean_similarity = float(similarities.mean()) if len(similarities) else 0.0
+        cluster.outlier_count = int((similarities < self.outlier_similarity).sum())
+        cluster.representative_clause_id = int(member_ids[np.argmax(similarities)]) if len(member_ids) else None
+
+    @staticmethod
+    def _nearest(centroids: np.ndarray, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        index = faiss.IndexFlatIP(centroids.shape[1])
+        index.add(np.ascontiguousarray(centroids, dtype='float32'))
+        similarities, labels = index.search(np.ascontiguousarray(vectors, dtype='float32'), 1)
+        return similarities[:, 0], labels[:, 0]
+
+    def _load(self, query, limit: Optional[int] = None) -> Tuple[List[int], np.ndarray]:
+        query = query.with_entities(ClauseEmbedding.id, ClauseEmbedding.embedding, ClauseEmbedding.embedding_dim).order_by(ClauseEmbedding.id)
+        if limit:
+            query = query.limit(limit)
+        ids, blobs, dim = [], [], 0
+        for row in query.yield_per(self.chunk_size):
+            ids.append(row.id)
+            blobs.append(row.embedding)
+            dim = row.embedding_dim
+        return ids, vectors_from_bytes(blobs, dim)
+
+    @staticmethod
+    def _write_assignments(db: Session, ids: List[int], cluster_ids: List[int], similarities: np.ndarray):
+        db.execute(update(ClauseEmbedding), [
+            {"id": vector_id, "cluster_id": int(cluster_id), "cluster_similarity": float(similarity)}
+            for vector_id, cluster_id, similarity in zip(ids, cluster_ids, similarities)
+        ])
+
+    @staticmethod
+    def _scope(db: Session, model, company_id: Optional[int], clause_type: str):
+        return db.query(model).filter(_company_filter(model, company_id), model.clause_type == clause_type)
+
+
+def _company_filter(model, company_id: Optional[int]):
+    return model.company_id.is_(None) if company_id is None else model.company_id == company_id
+
+
+# --- Precomputed lookups (read by the API) ---
+
+def cluster_stats(db: Session, company_id: Optional[int], clause_type: Optional[str] = None) -> Dict[str, Any]:
+    """Templates per clause type for one tenant, largest first, from the clustering job's output"""
+    query = db.query(ClauseCluster).filter(_company_filter(ClauseCluster, company_id))
+    if clause_type:
+        query = query.filter(ClauseCluster.clause_type == clause_type)
+    clusters = query.order_by(ClauseCluster.clause_type, ClauseCluster.size.desc()).all()
+
+    representative_ids = [c.representative_clause_id for c in clusters if c.representative_clause_id]
+    texts = dict(db.query(ClauseEmbedding.id, ClauseEmbedding.clause_text).filter(ClauseEmbedding.id.in_(representative_ids)).all()) if representative_ids else {}
+
+    by_type: Dict[str, Dict[str, Any]] = {}
+    for cluster in clusters:
+        entry = by_type.setdefault(cluster.clause_type, {"clause_type": cluster.clause_type, "template_count": 0, "clause_count": 0, "outlier_count": 0, "templates": []})
+        entry["template_count"] += 1
+        entry["clause_count"] += cluster.size or 0
+        entry["outlier_count"] += cluster.outlier_count or 0
+        entry["templates"].append({
+            "cluster_id": cluster.id,
+            "size": cluster.size,
+            "mean_similarity": round(cluster.mean_similarity or 0.0, 3),
+            "outlier_count": cluster.outlier_count,
+            "representative_text": texts.get(cluster.representative_clause_id),
+            "updated_at": cluster.updated_at
+        })
+    return {"company_id": company_id, "clause_types": list(by_type.values())}
+
+
+def outlier_clauses(db: Session, company_id: Optional[int], max_similarity: float, clause_type: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """Clauses furthest from their template (cosine to centroid below max_similarity), least typical first"""
+    query = db.query(ClauseEmbedding).filter(
+        _company_filter(ClauseEmbedding, company_id),
+        ClauseEmbedding.cluster_similarity.isnot(None),
+        ClauseEmbedding.cluster_similarity < max_similarity
+    )
+    if clause_type:
+        query = query.filter(ClauseEmbedding.clause_type == clause_type)
+    rows = query.order_by(ClauseEmbedding.cluster_similarity).limit(limit).all()
+    return [{
+        "clause_id": row.id,
+        "text": row.clause_text,
+        "clause_type": row.clause_type,
+        "cluster_id": row.cluster_id,
+        "cluster_similarity": round(row.cluster_similarity, 3),
+        "contracts": row.sources or [{"contract_id": row.source_contract_id, "source_contract": row.source_contract}]
+    } for row in rows]
@@ -0,0 +1,57 @@
+import threading
+import logging
+from typing import Callable, List
+
+from app.services.vector_store.shard import VectorShard
+
+logger = logging.getLogger(__name__)
+
+
+class CompactionWorker:
+    """
+    Background thread that rewrites shards whose dead-vector ratio crosses a threshold.
+    Runs every `interval_seconds`, or immediately when `wake()` is called after a removal.
+    """
+
+    def __init__(self, shards_fn: Callable[[], List[VectorShard]], dead_ratio_threshold: float = 0.2, interval_seconds: float = 60.0):
+        self._shards_fn = shards_fn
+        self.dead_ratio_threshold = dead_ratio_threshold
+        self.interval_seconds = interval_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.compactions = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="vector-compaction", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.run_once()
+
+    def run_once(self) -> int:
+        """Compacts every loaded shard above the threshold. Returns how many were compacted."""
+        compacted = 0
+        for shard in self._shards_fn():
+            try:
+                if shard.tombstones and shard.dead_ratio() >= self.dead_ratio_threshold:
+                    shard.compact()
+                    compacted += 1
+            except Exception as e:
+                logger.error(f"Compaction of shard '{shard.key}' failed: {e}", exc_info=True)
+        self.compactions += compacted
+        return compacted
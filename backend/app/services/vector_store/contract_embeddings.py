@@ -0,0 +1,117 @@
+import numpy as np
+import hashlib
+import os
+import threading
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from app.services.vector_store.shard import safe_replace
+
+logger = logging.getLogger(__name__)
+
+
+def text_fingerprint(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ContractEmbeddings:
+    """Clause split and normalized vectors of one contract, as used by comparisons"""
+    fingerprint: str
+    clauses: List[str]
+    clause_embeddings: np.ndarray   # (n_clauses, dim), L2-normalized
+    document_embedding: np.ndarray  # (dim,), L2-normalized
+
+
+class ContractEmbeddingStore:
+    """
+    Per-contract embedding cache: a small in-memory LRU backed by one `.npz` file per contract.
+    Entries are keyed by contract id and invalidated when the contract text fingerprint changes.
+    """
+
+    def __init__(self, data_dir: str, compute_fn: Callable[[str], "ContractEmbeddings"], max_entries: int = 256):
+        self.dir = os.path.join(data_dir, "contracts")
+        self._compute = compute_fn
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, ContractEmbeddings]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, contract_id: int) -> str:
+        return os.path.join(self.dir, f"contract_{int(contract_id)}.npz")
+
+    def get(self, contract_id: int, text: str) -> ContractEmbeddings:
+        fingerprint = text_fingerprint(text)
+        with self._lock:
+            cached = self._entries.get(contract_id)
+            if cached is not None and cached.fingerprint == fingerprint:
+                self._entries.move_to_end(contract_id)
+                return cached
+
+        embeddings = self._load(contract_id, fingerprint)
+        if embeddings is None:
+            embeddings = self._compute(text)
+            embeddings.fingerprint = fingerprint
+            self._persist(contract_id, embeddings)
+
+        self._remember(contract_id, embeddings)
+        return embeddings
+
+    def put(self, contract_id: int, text: str, embeddings: ContractEmbeddings):
+        """Stores embeddings computed elsewhere (e.g. by a bulk encode) for the given contract text"""
+        embeddings.fingerprint = text_fingerprint(text)
+        self._persist(contract_id, embeddings)
+        self._remember(contract_id, embeddings)
+
+    def invalidate(self, contract_id: int):
+        with self._lock:
+            self._entries.pop(contract_id, None)
+        path = self._path(contract_id)
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not delete cached embeddings for contract {contract_id}: {e}")
+
+    def _remember(self, contract_id: int, embeddings: ContractEmbeddings):
+        with self._lock:
+            self._entries[contract_id] = embeddings
+            self._entries.move_to_end(contract_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, contract_id: int, fingerprint: str) -> Optional[ContractEmbeddings]:
+        path = self._path(contract_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if str(data["fingerprint"]) != fingerprint:
+                    return None
+                return ContractEmbeddings(
+                    fingerprint=fingerprint,
+                    clauses=[str(c) for c in data["clauses"]],
+                    clause_embeddings=data["clause_embeddings"].astype('float32'),
+                    document_embedding=data["document_embedding"].astype('float32'),
+                )
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embedding cache for contract {contract_id}: {e}")
+            return None
+
+    def _persist(self, contract_id: int, embeddings: ContractEmbeddings):
+        os.makedirs(self.dir, exist_ok=True)
+        path = self._path(contract_id)
+        try:
+            # Open a file object first so numpy doesn't silently add an extra ".npz"
+            with open(path + ".tmp", 'wb') as f:
+                np.savez(
+                    f,
+                    fingerprint=np.array(embeddings.fingerprint),
+                    clauses=np.array(embeddings.clauses, dtype=str),
+                    clause_embeddings=embeddings.clause_embeddings,
+                    document_embedding=embeddings.document_embedding,
+                )
+            safe_replace(path + ".tmp", path)
+        except Exception as e:
+            logger.error(f"Failed to persist embeddings for contract {contract_id}: {e}")
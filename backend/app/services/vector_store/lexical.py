@@ -0,0 +1,197 @@
+import re
+import math
+import pickle
+import numpy as np
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Function words that appear in nearly every clause; dropping them keeps posting lists short
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "its", "of", "on", "or", "such", "that", "the", "this", "to", "which", "with"
+})
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# `_recent` is folded into `_base` once it holds more terms than this or a quarter of `_base`
+RECENT_FOLD_MIN_TERMS = 1024
+
+# (vector ids, term frequencies, clause lengths) for a run of postings
+Chunk = Tuple[array, array, array]
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over one shard's clause texts.
+
+    A term's postings are a tuple of chunks, each three parallel typed arrays (uint32 vector id,
+    uint16 term frequency, uint16 clause length), i.e. 8 bytes per posting. Deleted clauses are
+    filtered by the shard's tombstones and dropped when compaction rebuilds the index.
+
+    Neither an index nor its chunks are modified once a snapshot publishes them. `with_added`
+    returns a new index that shares every existing chunk and term table with this one: the new
+    clauses become one new chunk per term they contain, and only the small `_recent` table of
+    terms touched since the last fold is copied. Trailing chunks are merged binary-counter style
+    and `_recent` is folded into `_base` once it outgrows a fraction of it, so an upload costs
+    amortized O(postings it adds) rather than O(postings of the terms it touches).
+    """
+
+    def __init__(self):
+        # Term -> chunks. `_recent` overrides `_base`; both are shared between indexes, never mutated
+        self._base: Dict[str, Tuple[Chunk, ...]] = {}
+        self._recent: Dict[str, Tuple[Chunk, ...]] = {}
+        self.doc_count = 0
+        self.total_length = 0
+
+    @classmethod
+    def build(cls, texts: Dict[int, str]) -> "LexicalIndex":
+        index = cls()
+        collected, index.doc_count, index.total_length = _collect(texts.items())
+        index._base = {term: (_chunk(*columns),) for term, columns in collected.items()}
+        return index
+
+    def with_added(self, items: Iterable[Tuple[int, str]]) -> "LexicalIndex":
+        """A new index with these (vector_id, text) clauses added; this one is left untouched"""
+        collected, doc_count, total_length = _collect(items)
+        index = LexicalIndex()
+        index._base = self._base
+        index._recent = dict(self._recent)
+        index.doc_count = self.doc_count + doc_count
+        index.total_length = self.total_length + total_length
+        for term, columns in collected.items():
+            index._recent[term] = _append_chunk(self._chunks(term), _chunk(*columns))
+        if len(index._recent) > max(RECENT_FOLD_MIN_TERMS, len(index._base) // 4):
+            index._base = {**index._base, **index._recent}
+            index._recent = {}
+        return index
+
+    def _chunks(self, term: str) -> Tuple[Chunk, ...]:
+        chunks = self._recent.get(term)
+        return chunks if chunks is not None else self._base.get(term, ())
+
+    def _terms(self) -> Dict[str, Tuple[Chunk, ...]]:
+        return {**self._base, **self._recent} if self._recent else self._base
+
+    def search(self, query: str, k: int, exclude: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k vector ids by BM25 score, best first. `exclude` holds tombstoned ids."""
+        terms = set(tokenize(query))
+        doc_count, avg_length = self.doc_count, self.total_length / max(self.doc_count, 1)
+        matched = [_concat(chunks) for chunks in (self._chunks(term) for term in terms) if chunks]
+        if not matched:
+            return np.zeros(0, dtype='int64'), np.zeros(0, dtype='float32')
+
+        all_ids, all_scores = [], []
+        for ids, tf, length in matched:
+            ids = np.frombuffer(ids, dtype='uint32').astype('int64')
+            tf = np.frombuffer(tf, dtype='uint16').astype('float32')
+            length = np.frombuffer(length, dtype='uint16').astype('float32')
+            idf = math.log(1 + (doc_count - len(ids) + 0.5) / (len(ids) + 0.5))
+            all_ids.append(ids)
+            all_scores.append(idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)))
+
+        ids, inverse = np.unique(np.concatenate(all_ids), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(all_scores)).astype('float32')
+        if exclude is not None and len(exclude):
+            keep = ~np.isin(ids, exclude)
+            ids, scores = ids[keep], scores[keep]
+
+        if len(ids) > k:
+            top = np.argpartition(-scores, k)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+        return ids[order], scores[order]
+
+    def memory_bytes(self) -> int:
+        return sum(
+            sum(8 * len(chunk[0]) + 64 for chunk in chunks) + len(term)
+            for term, chunks in self._terms().items()
+        )
+
+    # --- Persistence ---
+
+    def save(self, path: str, log_seq: int):
+        state = {
+            "log_seq": log_seq,
+            "doc_count": self.doc_count,
+            "total_length": self.total_length,
+            "postings": {term: tuple(a.tobytes() for a in _concat(chunks)) for term, chunks in self._terms().items()}
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str, log_seq: int) -> Optional["LexicalIndex"]:
+        """The saved index, or None when it doesn't match the snapshot at `log_seq`"""
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        if state.get("log_seq") != log_seq:
+            return None
+        index = cls()
+        index.doc_count = state["doc_count"]
+        index.total_length = state["total_length"]
+        for term, (ids, tfs, lengths) in state["postings"].items():
+            chunk = (array('I'), array('H'), array('H'))
+            chunk[0].frombytes(ids)
+            chunk[1].frombytes(tfs)
+            chunk[2].frombytes(lengths)
+            index._base[term] = (chunk,)
+        return index
+
+
+def _collect(items: Iterable[Tuple[int, str]]) -> Tuple[Dict[str, Tuple[list, list, list]], int, int]:
+    """Per-term (ids, term frequencies, clause lengths) lists for these clauses, plus doc and token counts"""
+    collected: Dict[str, Tuple[list, list, list]] = {}
+    doc_count = total_length = 0
+    for vector_id, text in items:
+        tokens = tokenize(text)
+        if not tokens:
+            continue
+        length = min(len(tokens), 65535)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for term, tf in counts.items():
+            columns = collected.get(term)
+            if columns is None:
+                columns = collected[term] = ([], [], [])
+            columns[0].append(vector_id)
+            columns[1].append(min(tf, 65535))
+            columns[2].append(length)
+        doc_count += 1
+        total_length += len(tokens)
+    return collected, doc_count, total_length
+
+
+def _chunk(ids: list, tfs: list, lengths: list) -> Chunk:
+    return array('I', ids), array('H', tfs), array('H', lengths)
+
+
+def _concat(chunks: Tuple[Chunk, ...]) -> Chunk:
+    if len(chunks) == 1:
+        return chunks[0]
+    ids, tfs, lengths = array('I'), array('H'), array('H')
+    for chunk in chunks:
+        ids += chunk[0]
+        tfs += chunk[1]
+        lengths += chunk[2]
+    return ids, tfs, lengths
+
+
+def _append_chunk(chunks: Tuple[Chunk, ...], chunk: Chunk) -> Tuple[Chunk, ...]:
+    """
+    Appends without touching the existing chunks' arrays. Trailing chunks no larger than the new
+    one are merged into it, which keeps chunk sizes decreasing by at least half: O(log n) chunks
+    per term, and each posting is copied O(log n) times over the index's lifetime.
+    """
+    chunks = list(chunks)
+    while chunks and len(chunks[-1][0]) <= len(chunk[0]):
+        chunk = _concat((chunks.pop(), chunk))
+    chunks.append(chunk)
+    return tuple(chunks)
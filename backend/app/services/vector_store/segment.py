@@ -0,0 +1,212 @@
+import os
+import hashlib
+import numpy as np
+import faiss
+from dataclasses import dataclass
+from typing import Tuple
+
+from app.services.vector_store.change_log import safe_replace
+
+# Vectors a quantizer is trained on before a segment may use it: PQ codebooks (256 centroids
+# per sub-quantizer) need roughly 39 * 256; SQ8 needs enough to see each dimension's real range.
+# Smaller segments (single write batches) are held as fp16 until merges make them big enough.
+MIN_TRAINING_VECTORS = {"sq8": 1000, "pq": 10000}
+
+STORAGE_MODES = ("flat", "fp16", "sq8", "pq")
+
+# Compressed codes under-estimate some scores; range searches over them widen the radius by
+# this much and keep only candidates whose exact score clears the threshold
+RANGE_SEARCH_MARGIN = 0.05
+
+
+@dataclass(frozen=True)
+class VectorStorage:
+    """
+    How segment vectors are held in RAM and on disk.
+
+    flat: float32 IndexFlatIP, float32 on disk (exact)
+    fp16: half-precision scalar quantizer in RAM, float16 on disk
+    sq8:  8-bit scalar quantizer in RAM; candidates re-ranked against the mmap'd float16 vectors
+    pq:   product quantizer with `pq_m` one-byte codes per vector, re-ranked the same way
+
+    sq8/pq segments smaller than MIN_TRAINING_VECTORS are staged as fp16, and the shard merges
+    staged segments into one trained segment once together they are big enough.
+    """
+    mode: str = "flat"
+    pq_m: int = 96
+    rerank_factor: int = 10
+
+    @property
+    def disk_dtype(self) -> str:
+        return 'float32' if self.mode == "flat" else 'float16'
+
+
+FLAT_STORAGE = VectorStorage()
+
+
+class VectorSegment:
+    """
+    A run of clause vectors in one FAISS index, built once and never appended to after publish.
+    Row `i` of the index holds vector id `ids[i]`; ids are stable across compactions.
+    """
+
+    def __init__(self, name: str, embedding_dim: int, storage: VectorStorage = FLAT_STORAGE):
+        self.name = name
+        self.embedding_dim = embedding_dim
+        self.storage = storage
+        # Effective mode: segments too small to train the configured quantizer stay fp16
+        self.mode = storage.mode
+        self.index = None
+        self.ids = np.zeros(0, dtype='int64')
+        # Uncompressed copy for re-ranking and rewrites (float16, memory-mapped once saved); None in flat mode
+        self._vectors = None
+        self.is_dirty = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def content_name(self) -> str:
+        """
+        File name derived from the vector ids the segment holds. A vector id's embedding never
+        changes, so every worker that applied the same log records names the same segment the
+        same way, and one worker's checkpoint can't orphan another's files.
+        """
+        return f"seg_{hashlib.sha1(np.ascontiguousarray(self.ids, dtype='<i8').tobytes()).hexdigest()[:16]}"
+
+    def is_saved(self, segments_dir: str) -> bool:
+        base = os.path.join(segments_dir, self.name)
+        return os.path.exists(f"{base}.ids.npy") or os.path.exists(f"{base}.npz")
+
+    @property
+    def is_approximate(self) -> bool:
+        return self.mode in ("sq8", "pq")
+
+    @property
+    def is_staged(self) -> bool:
+        """Held as fp16 because it was too small to train the configured quantizer"""
+        return self.mode != self.storage.mode
+
+    def _build_index(self, training: np.ndarray) -> faiss.Index:
+        if len(training) < MIN_TRAINING_VECTORS.get(self.mode, 0):
+            self.mode = "fp16"
+        if self.mode == "fp16":
+            return faiss.IndexScalarQuantizer(self.embedding_dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+        if self.mode == "sq8":
+            index = faiss.IndexScalarQuantizer(self.embedding_dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+            index.train(training)
+            return index
+        if self.mode == "pq":
+            index = faiss.IndexPQ(self.embedding_dim, self.storage.pq_m, 8, faiss.METRIC_INNER_PRODUCT)
+            index.train(training)
+            return index
+        return faiss.IndexFlatIP(self.embedding_dim)
+
+    def add(self, ids: np.ndarray, embeddings: np.ndarray):
+        embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+        if self.index is None:
+            self.index = self._build_index(embeddings)
+        self.index.add(embeddings)
+        if self.mode != "flat":
+            stored = embeddings.astype('float16')
+            self._vectors = stored if self._vectors is None else np.vstack([self._vectors, stored])
+        self.ids = np.concatenate([self.ids, np.asarray(ids, dtype='int64')])
+        self.is_dirty = True
+
+    def vectors(self) -> np.ndarray:
+        if not len(self.ids):
+            return np.zeros((0, self.embedding_dim), dtype='float32')
+        if self._vectors is not None:
+            return np.asarray(self._vectors, dtype='float32')
+        return self.index.reconstruct_n(0, self.index.ntotal)
+
+    def search(self, query_embeddings: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Like `index.search`, but returns vector ids instead of row numbers (-1 for padding)."""
+        k = min(k, len(self.ids))
+        if k <= 0:
+            empty = np.zeros((len(query_embeddings), 0))
+            return empty.astype('float32'), empty.astype('int64')
+        query_embeddings = np.ascontiguousarray(query_embeddings, dtype='float32')
+
+        if not self.is_approximate:
+            scores, rows = self.index.search(query_embeddings, k)
+        else:
+            # Shortlist on the compressed codes, then re-score the shortlist exactly
+            fetch = min(len(self.ids), k * self.storage.rerank_factor)
+            _, rows = self.index.search(query_embeddings, fetch)
+            candidates = np.asarray(self._vectors[np.clip(rows, 0, None).ravel()], dtype='float32')
+            exact = np.einsum('qfd,qd->qf', candidates.reshape(len(rows), fetch, self.embedding_dim), query_embeddings)
+            exact = np.where(rows >= 0, exact, -np.inf)
+            order = np.argsort(-exact, axis=1, kind='stable')[:, :k]
+            scores = np.take_along_axis(exact, order, axis=1).astype('float32')
+            rows = np.take_along_axis(rows, order, axis=1)
+
+        return scores, np.where(rows >= 0, self.ids[np.clip(rows, 0, None)], -1)
+
+    def range_search(self, query_embedding: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Every vector scoring >= threshold against one query, as (scores, vector_ids) in row order"""
+        if not len(self.ids):
+            return np.zeros(0, dtype='float32'), np.zeros(0, dtype='int64')
+        query = np.ascontiguousarray(query_embedding.reshape(1, -1), dtype='float32')
+        radius = threshold - RANGE_SEARCH_MARGIN if self.is_approximate else threshold
+        _, scores, rows = self.index.range_search(query, radius)
+        if self.is_approximate and len(rows):
+            scores = (np.asarray(self._vectors[rows], dtype='float32') @ query[0]).astype('float32')
+        keep = scores >= threshold
+        return scores[keep], self.ids[rows[keep]]
+
+    def memory_bytes(self) -> int:
+        """Resident size: index codes plus ids (memory-mapped vectors live in the page cache)"""
+        if self.index is None:
+            return 0
+        resident = self.index.ntotal * self.index.sa_code_size() + self.ids.nbytes
+        if self._vectors is not None and not isinstance(self._vectors, np.memmap):
+            resident += self._vectors.nbytes
+        return resident
+
+    # --- Persistence ---
+
+    def save(self, segments_dir: str):
+        """Writes `<name>.ids.npy`, `<name>.vectors.npy` and, for trained indexes, `<name>.<mode>.index`"""
+        base = os.path.join(segments_dir, self.name)
+        # Open file objects first so numpy doesn't silently add an extra extension
+        with open(f"{base}.ids.npy.tmp", 'wb') as f:
+            np.save(f, self.ids)
+        with open(f"{base}.vectors.npy.tmp", 'wb') as f:
+            np.save(f, self.vectors().astype(self.storage.disk_dtype))
+        safe_replace(f"{base}.ids.npy.tmp", f"{base}.ids.npy")
+        safe_replace(f"{base}.vectors.npy.tmp", f"{base}.vectors.npy")
+        if self.mode in ("sq8", "pq"):
+            faiss.write_index(self.index, f"{base}.{self.mode}.index.tmp")
+            safe_replace(f"{base}.{self.mode}.index.tmp", f"{base}.{self.mode}.index")
+
+        if self._vectors is not None:
+            self._vectors = np.load(f"{base}.vectors.npy", mmap_mode='r')
+        self.is_dirty = False
+
+    @classmethod
+    def load(cls, segments_dir: str, name: str, embedding_dim: int, storage: VectorStorage = FLAT_STORAGE) -> "VectorSegment":
+        segment = cls(name, embedding_dim, storage)
+        base = os.path.join(segments_dir, name)
+
+        if os.path.exists(f"{base}.npz"):
+            # Segment written before the storage modes existed
+            with np.load(f"{base}.npz") as data:
+                segment.add(data["ids"], data["vectors"])
+            segment.is_dirty = storage.mode != "flat"
+            return segment
+
+        ids = np.load(f"{base}.ids.npy")
+        vectors = np.load(f"{base}.vectors.npy", mmap_mode='r')
+        # Reuse the trained index when the segment is big enough to have one in the configured mode
+        trained = f"{base}.{storage.mode}.index"
+        if storage.mode in MIN_TRAINING_VECTORS and len(ids) >= MIN_TRAINING_VECTORS[storage.mode] and os.path.exists(trained):
+            segment.index = faiss.read_index(trained)
+            segment.ids = ids
+        else:
+            segment.add(ids, vectors)
+
+        if segment.mode != "flat":
+            segment._vectors = vectors if vectors.dtype == np.float16 else np.asarray(vectors, dtype='float16')
+        # Re-save when the configured mode changed the on-disk precision
+        segment.is_dirty = vectors.dtype != np.dtype(storage.disk_dtype)
+        return segment
@@ -0,0 +1,707 @@
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple, Set
+import json
+import pickle
+import os
+import shutil
+import threading
+import time
+import uuid
+import hashlib
+import dataclasses
+import faiss
+import logging
+
+from app.services.vector_store.segment import VectorSegment, VectorStorage, FLAT_STORAGE, MIN_TRAINING_VECTORS
+from app.services.vector_store.snapshot import ShardSnapshot, empty_contract_index
+from app.services.vector_store.lexical import LexicalIndex
+from app.services.vector_store.change_log import (
+    ChangeLog, FileLock, safe_replace, OP_ADD, OP_REMOVE_CONTRACT, OP_UPSERT_CONTRACT, OP_ADD_REFERENCES, OP_COMPACT, OP_RESET
+)
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_SHARD_KEY = "public"
+
+# Upper bound on vectors per segment
+SEGMENT_CAPACITY = 65536
+
+# Each write batch lands in its own small segment; past this many they are merged into one.
+# Under sq8/pq, batches too small to train the quantizer are staged as fp16 until merged.
+MAX_SMALL_SEGMENTS = 8
+
+# Log records applied since the last snapshot before `save()` writes a new one
+CHECKPOINT_EVERY_RECORDS = 1000
+
+# Readers check the change log for other workers' writes at most this often
+SYNC_INTERVAL_SECONDS = 0.2
+
+
+def shard_key_for(company_id: Optional[int]) -> str:
+    """Maps a tenant to the directory name of its shard. Clauses without a tenant go to the shared library."""
+    if company_id is None:
+        return PUBLIC_SHARD_KEY
+    return f"company_{int(company_id)}"
+
+
+def company_id_for(key: str) -> Optional[int]:
+    """Inverse of `shard_key_for`"""
+    if key == PUBLIC_SHARD_KEY:
+        return None
+    return int(key[len("company_"):])
+
+
+def clause_fingerprint(text: str) -> str:
+    """Case and whitespace-insensitive hash used to spot repeated boilerplate clauses"""
+    return hashlib.sha1(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+def clause_sources(meta: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Contracts referencing a clause; entries written before dedup only carry their own contract"""
+    if "sources" in meta:
+        return meta["sources"]
+    return [{"contract_id": meta.get("contract_id"), "source_contract": meta.get("source_contract")}]
+
+
+class VectorShard:
+    """
+    One tenant's slice of the clause vector store, persisted under `<data_dir>/<key>/`.
+
+    Clause vectors live in a list of segments and are addressed by stable vector ids.
+    Removed vectors are tombstoned and filtered at query time until `compact()` rewrites
+    the segments without them.
+
+    On disk a shard is a snapshot (manifest + segment files) plus an append-only change log.
+    Every mutation is appended to the log under an inter-process file lock before it is
+    applied in memory, and every worker tails the log, so all uvicorn workers converge on
+    the same index without reloading it. `save()` folds the log into a new snapshot and
+    starts the next log generation.
+
+    Concurrency: searches read `self.snapshot`, an immutable `ShardSnapshot`, without taking
+    any lock. Writers are serialized by `_write_lock`, build the next snapshot off to the side
+    (new segments, copied indexes) and publish it with one atomic attribute swap, so a
+    search never blocks behind indexing and never sees a vector without its metadata.
+    """
+
+    def __init__(self, key: str, data_dir: str, embedding_dim: int, storage: VectorStorage = FLAT_STORAGE):
+        self.key = key
+        self.embedding_dim = embedding_dim
+        self.storage = storage
+        self.dir = os.path.join(data_dir, key)
+        self.segments_dir = os.path.join(self.dir, "segments")
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        self.metadata_path = os.path.join(self.dir, "clause_metadata.json")
+        self.texts_path = os.path.join(self.dir, "clause_texts.pkl")
+        self.contract_vectors_path = os.path.join(self.dir, "contract_vectors.npy")
+        self.contract_metadata_path = os.path.join(self.dir, "contract_metadata.json")
+        self.lexical_path = os.path.join(self.dir, "lexical_index.pkl")
+        self.lock_path = os.path.join(self.dir, ".lock")
+
+        self.snapshot = ShardSnapshot(
+            version=0,
+            embedding_dim=embedding_dim,
+            contract_index=empty_contract_index(embedding_dim)
+        )
+        self._reset_state()
+
+        self._write_lock = threading.RLock()
+        self.is_dirty = False
+
+    def _reset_state(self):
+        # The published snapshot is left alone so readers keep serving it during a reload
+        # Writer-side bookkeeping, only touched under _write_lock
+        self.contract_vector_ids: Dict[int, Set[int]] = {}
+        self.next_id = 0
+
+        # Change log position
+        self.log_generation = 0
+        self.applied_seq = 0
+        self._log_offset = 0
+        self._last_sync = 0.0
+        self.records_since_checkpoint = 0
+
+    def _publish(self, **changes):
+        """Atomically replaces the snapshot readers see"""
+        self.snapshot = dataclasses.replace(self.snapshot, version=self.snapshot.version + 1, **changes)
+
+    # Read-only views of the current snapshot
+    @property
+    def segments(self) -> Tuple[VectorSegment, ...]:
+        return self.snapshot.segments
+
+    @property
+    def clause_metadata(self) -> Dict[int, Dict[str, Any]]:
+        return self.snapshot.clause_metadata
+
+    @property
+    def clause_texts(self) -> Dict[int, str]:
+        return self.snapshot.clause_texts
+
+    @property
+    def tombstones(self):
+        return self.snapshot.tombstones
+
+    @property
+    def contract_metadata(self) -> Dict[int, Dict[str, Any]]:
+        return self.snapshot.contract_metadata
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    @property
+    def total_vectors(self) -> int:
+        return self.snapshot.total_vectors
+
+    def dead_ratio(self) -> float:
+        return self.snapshot.dead_ratio()
+
+    def _log(self, generation: Optional[int] = None) -> ChangeLog:
+        generation = self.log_generation if generation is None else generation
+        return ChangeLog(os.path.join(self.dir, f"changes_{generation:06d}.log"))
+
+    def _file_lock(self) -> FileLock:
+        return FileLock(self.lock_path)
+
+    # --- Snapshot + log replay ---
+
+    def load(self):
+        with self._write_lock, self._file_lock():
+            self._load_snapshot()
+            self._sync_locked()
+
+    def _load_snapshot(self):
+        self._reset_state()
+        contract_index, contract_metadata = self._load_contracts()
+        segments, clause_metadata, clause_texts, tombstones, lexical = [], {}, {}, set(), LexicalIndex()
+        content_hashes = {}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r') as f:
+                    manifest = json.load(f)
+                with open(self.metadata_path, 'r') as f:
+                    clause_metadata = {int(k): v for k, v in json.load(f).items()}
+                with open(self.texts_path, 'rb') as f:
+                    clause_texts = pickle.load(f)
+
+                for name in manifest["segments"]:
+                    segments.append(VectorSegment.load(self.segments_dir, name, self.embedding_dim, self.storage))
+
+                self.next_id = manifest["next_id"]
+                tombstones = set(manifest.get("tombstones", []))
+                self.log_generation = manifest.get("log_generation", 0)
+                self.applied_seq = manifest.get("log_seq", 0)
+                lexical = self._load_lexical(clause_texts)
+                for vector_id, meta in clause_metadata.items():
+                    if vector_id not in tombstones:
+                        self._track_contracts(vector_id, meta)
+                content_hashes = self._content_hashes(clause_metadata, clause_texts, tombstones)
+                logger.info(f"✅ Loaded {len(clause_texts) - len(tombstones)} clauses into shard '{self.key}' ({len(segments)} segments)")
+            except Exception as e:
+                logger.error(f"Could not load shard '{self.key}': {e}")
+                segments, clause_metadata, clause_texts, tombstones, lexical = [], {}, {}, set(), LexicalIndex()
+                content_hashes = {}
+
+        self._publish(
+            segments=tuple(segments),
+            clause_metadata=clause_metadata,
+            clause_texts=clause_texts,
+            tombstones=frozenset(tombstones),
+            contract_index=contract_index,
+            contract_metadata=contract_metadata,
+            lexical=lexical,
+            content_hashes=content_hashes
+        )
+
+    def _track_contracts(self, vector_id: int, meta: Dict[str, Any]):
+        for source in clause_sources(meta):
+            if source.get("contract_id") is not None:
+                self.contract_vector_ids.setdefault(source["contract_id"], set()).add(vector_id)
+
+    @staticmethod
+    def _content_hashes(clause_metadata: Dict[int, Dict[str, Any]], clause_texts: Dict[int, str], dead) -> Dict[str, int]:
+        return {
+            meta.get("content_hash") or clause_fingerprint(clause_texts[vector_id]): vector_id
+            for vector_id, meta in clause_metadata.items()
+            if vector_id not in dead and vector_id in clause_texts
+        }
+
+    def _load_lexical(self, clause_texts: Dict[int, str]) -> LexicalIndex:
+        """The checkpointed BM25 index when it matches this snapshot, otherwise rebuilt from the texts"""
+        if os.path.exists(self.lexical_path):
+            try:
+                lexical = LexicalIndex.load(self.lexical_path, self.applied_seq)
+                if lexical is not None:
+                    return lexical
+            except Exception as e:
+                logger.error(f"Could not load lexical index for shard '{self.key}': {e}")
+        return LexicalIndex.build(clause_texts)
+
+    def _load_contracts(self):
+        contract_index = empty_contract_index(self.embedding_dim)
+        if not (os.path.exists(self.contract_metadata_path) and os.path.exists(self.contract_vectors_path)):
+            return contract_index, {}
+        try:
+            with open(self.contract_metadata_path, 'r') as f:
+                contract_metadata = {int(k): v for k, v in json.load(f).items()}
+            vectors = np.load(self.contract_vectors_path)
+            ids = np.array(list(contract_metadata.keys()), dtype='int64')
+            if len(ids):
+                contract_index.add_with_ids(np.ascontiguousarray(vectors, dtype='float32'), ids)
+            return contract_index, contract_metadata
+        except Exception as e:
+            logger.error(f"Could not load contract vectors for shard '{self.key}': {e}")
+            return empty_contract_index(self.embedding_dim), {}
+
+    def sync(self, force: bool = False):
+        """Applies other workers' changes from the log. Cheap enough to call before every read."""
+        if not force and time.monotonic() - self._last_sync < SYNC_INTERVAL_SECONDS:
+            return
+        # Never block a search behind a writer: if one is active, serve the current snapshot
+        if not self._write_lock.acquire(blocking=force):
+            return
+        try:
+            try:
+                if self._catch_up():
+                    return
+            except FileNotFoundError:
+                pass
+            with self._file_lock():
+                self._sync_locked()
+        finally:
+            self._write_lock.release()
+
+    def _sync_locked(self):
+        """
+        Catch-up for callers holding the file lock, which every writer must do before appending
+        or checkpointing: a worker that fell more than one checkpoint behind (its log generation
+        is gone) reloads the snapshot first, so it never writes back a stale one.
+        """
+        try:
+            if self._catch_up():
+                return
+        except FileNotFoundError:
+            pass
+        self._load_snapshot()
+        if os.path.exists(self.manifest_path) and not self._log().exists():
+            # A checkpoint died between the manifest and the next log; finish it
+            self._log().create()
+        self._catch_up()
+
+    def _catch_up(self) -> bool:
+        """
+        Tails the current log generation, following newer generations as they appear.
+        Returns False when this worker's generation is gone and the snapshot must be reloaded.
+        """
+        while True:
+            log = self._log()
+            if not log.exists() and (os.path.exists(self.manifest_path) or self.applied_seq):
+                return False
+            if log.exists():
+                for seq, op, body, blob, next_offset in log.read_from(self._log_offset):
+                    if seq > self.applied_seq:
+                        self._apply(op, body, blob)
+                        self.applied_seq = seq
+                        self.records_since_checkpoint += 1
+                    self._log_offset = next_offset
+            # A newer generation only exists once this one is sealed by a checkpoint
+            if self._log(self.log_generation + 1).exists():
+                self.log_generation += 1
+                self._log_offset = 0
+                continue
+            break
+        self._last_sync = time.monotonic()
+        return True
+
+    def _append(self, op: int, body: Dict[str, Any], blob: bytes = b""):
+        """Logs and applies one mutation. Callers must hold the file lock and be caught up."""
+        seq = self.applied_seq + 1
+        log = self._log()
+        log.append(seq, op, body, blob)
+        self._apply(op, body, blob)
+        self.applied_seq = seq
+        self._log_offset = os.path.getsize(log.path)
+        self.records_since_checkpoint += 1
+        self.is_dirty = True
+
+    def _apply(self, op: int, body: Dict[str, Any], blob: bytes):
+        if op == OP_ADD:
+            vectors = np.frombuffer(blob, dtype='float32').reshape(len(body["ids"]), self.embedding_dim)
+            self._apply_add(body["ids"], vectors, body["texts"], body["metadata"])
+        elif op == OP_REMOVE_CONTRACT:
+            self._apply_remove_contract(body["contract_id"])
+        elif op == OP_UPSERT_CONTRACT:
+            vector = np.frombuffer(blob, dtype='float32')
+            self._apply_upsert_contract(body["contract_id"], vector, body["metadata"])
+        elif op == OP_ADD_REFERENCES:
+            self._apply_add_references(body["references"])
+        elif op == OP_COMPACT:
+            self._apply_compact()
+        elif op == OP_RESET:
+            self._apply_reset()
+        self.is_dirty = True
+
+    def save(self, force: bool = False):
+        """
+        Writes a new snapshot once enough log records have piled up (or when forced).
+        The log is already durable, so skipping a checkpoint never loses data.
+        """
+        with self._write_lock:
+            if not force and self.records_since_checkpoint < CHECKPOINT_EVERY_RECORDS:
+                return
+            with self._file_lock():
+                self._sync_locked()
+                self._checkpoint()
+
+    def _checkpoint(self):
+        """Snapshot everything up to `applied_seq` and seal the current log generation."""
+        os.makedirs(self.segments_dir, exist_ok=True)
+        snapshot = self.snapshot
+        try:
+            self._save_contracts(snapshot)
+
+            for segment in snapshot.segments:
+                # Also rewrites segments whose files are gone (e.g. removed by an older checkpoint)
+                if not segment.is_dirty and segment.is_saved(self.segments_dir): continue
+                segment.name = segment.content_name()
+                segment.save(self.segments_dir)
+
+            next_generation = self.log_generation + 1
+            with open(self.metadata_path + ".tmp", 'w') as f:
+                json.dump({str(k): v for k, v in snapshot.clause_metadata.items()}, f, indent=2)
+            with open(self.texts_path + ".tmp", 'wb') as f:
+                pickle.dump(dict(snapshot.clause_texts), f)
+            snapshot.lexical.save(self.lexical_path + ".tmp", self.applied_seq)
+            with open(self.manifest_path + ".tmp", 'w') as f:
+                json.dump({
+                    "next_id": self.next_id,
+                    "segments": [seg.name for seg in snapshot.segments],
+                    "tombstones": sorted(snapshot.tombstones),
+                    "log_generation": next_generation,
+                    "log_seq": self.applied_seq
+                }, f)
+
+            safe_replace(self.metadata_path + ".tmp", self.metadata_path)
+            safe_replace(self.texts_path + ".tmp", self.texts_path)
+            safe_replace(self.lexical_path + ".tmp", self.lexical_path)
+            # The manifest goes last: it is what makes new segments visible on load
+            safe_replace(self.manifest_path + ".tmp", self.manifest_path)
+
+            # Seal this generation; keep it one more round for workers still tailing it
+            self._log(next_generation).create()
+            stale_log = self._log(self.log_generation - 1)
+            if self.log_generation > 0 and stale_log.exists():
+                os.remove(stale_log.path)
+            self.log_generation = next_generation
+            self._log_offset = 0
+            self.records_since_checkpoint = 0
+
+            # Safe across workers: we are caught up under the file lock, and segment names depend
+            # only on content, so any worker's live set at this seq is exactly this one
+            live = {seg.name for seg in snapshot.segments}
+            for filename in os.listdir(self.segments_dir):
+                if filename.split(".")[0] not in live:
+                    try:
+                        os.remove(os.path.join(self.segments_dir, filename))
+                    except PermissionError:
+                        pass # Still memory-mapped on Windows; removed by a later checkpoint
+            self.is_dirty = False
+        except Exception as e:
+            logger.error(f"❌ Failed to save shard '{self.key}': {e}", exc_info=True)
+
+    def _save_contracts(self, snapshot: ShardSnapshot):
+        if not snapshot.contract_metadata:
+            for path in (self.contract_vectors_path, self.contract_metadata_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return
+        # Vectors are written in contract_metadata order so ids can be rebuilt on load
+        ids = list(snapshot.contract_metadata.keys())
+        vectors = np.vstack([snapshot.contract_index.reconstruct(cid) for cid in ids])
+        with open(self.contract_vectors_path + ".tmp", 'wb') as f:
+            np.save(f, vectors)
+        with open(self.contract_metadata_path + ".tmp", 'w') as f:
+            json.dump({str(k): v for k, v in snapshot.contract_metadata.items()}, f, indent=2)
+        safe_replace(self.contract_vectors_path + ".tmp", self.contract_vectors_path)
+        safe_replace(self.contract_metadata_path + ".tmp", self.contract_metadata_path)
+
+    # --- Document-level index ---
+
+    def upsert_contract(self, contract_id: int, vector: np.ndarray, metadata: Dict[str, Any]):
+        """Adds or replaces the pooled document vector of one contract"""
+        vector = np.ascontiguousarray(vector.reshape(-1), dtype='float32')
+        with self._write_lock, self._file_lock():
+            self._sync_locked()
+            self._append(OP_UPSERT_CONTRACT, {"contract_id": int(contract_id), "metadata": metadata}, vector.tobytes())
+
+    def _apply_upsert_contract(self, contract_id: int, vector: np.ndarray, metadata: Dict[str, Any]):
+        # Copy-on-write: readers keep searching the previous document index
+        snapshot = self.snapshot
+        contract_index = faiss.clone_index(snapshot.contract_index)
+        ids = np.array([contract_id], dtype='int64')
+        if contract_id in snapshot.contract_metadata:
+            contract_index.remove_ids(ids)
+        contract_index.add_with_ids(np.ascontiguousarray(vector.reshape(1, -1), dtype='float32'), ids)
+        self._publish(
+            contract_index=contract_index,
+            contract_metadata={**snapshot.contract_metadata, contract_id: metadata}
+        )
+
+    def contract_vector(self, contract_id: int) -> Optional[np.ndarray]:
+        return self.snapshot.contract_vector(contract_id)
+
+    def search_contracts(self, query_vector: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.snapshot.search_contracts(query_vector, k)
+
+    # --- Clause vectors ---
+
+    def _new_segment(self) -> VectorSegment:
+        # Named after its content when checkpointed
+        return VectorSegment(f"seg_{uuid.uuid4().hex[:12]}", self.embedding_dim, self.storage)
+
+    def add(self, embeddings: np.ndarray, texts: List[str], metadata: List[Dict[str, Any]], ids: Optional[List[int]] = None) -> List[int]:
+        """
+        Appends a batch of already-normalized embeddings as one log record and one new snapshot.
+        `ids` are the vectors' database row ids; without them the shard allocates its own.
+        Returns their stable vector ids.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+        with self._write_lock, self._file_lock():
+            # Catch up first so ids stay unique across workers
+            self._sync_locked()
+            if ids is None:
+                ids = list(range(self.next_id, self.next_id + len(texts)))
+            ids = [int(v) for v in ids]
+
+            # Another worker may already have pulled these rows in from the database
+            known = self.snapshot.clause_texts
+            keep = [i for i, vector_id in enumerate(ids) if vector_id not in known]
+            if not keep:
+                return ids
+            if len(keep) < len(ids):
+                embeddings = embeddings[keep]
+                texts = [texts[i] for i in keep]
+                metadata = [metadata[i] for i in keep]
+            new_ids = [ids[i] for i in keep]
+
+            for vector_id, meta in zip(new_ids, metadata):
+                meta["id"] = vector_id
+            self._append(OP_ADD, {"ids": new_ids, "texts": texts, "metadata": metadata}, embeddings.tobytes())
+            return ids
+
+    def _apply_add(self, ids: List[int], embeddings: np.ndarray, texts: List[str], metadata: List[Dict[str, Any]]):
+        if not ids:
+            return
+        snapshot = self.snapshot
+
+        # Copy-on-write: readers of the current snapshot may be iterating these
+        clause_metadata = dict(snapshot.clause_metadata)
+        clause_texts = dict(snapshot.clause_texts)
+        content_hashes = dict(snapshot.content_hashes)
+        for vector_id, text, meta in zip(ids, texts, metadata):
+            clause_metadata[vector_id] = meta
+            clause_texts[vector_id] = text
+            self._track_contracts(vector_id, meta)
+            content_hashes[meta.get("content_hash") or clause_fingerprint(text)] = vector_id
+
+        # The batch becomes new segments; published segments are never appended to in place
+        new_segments = []
+        for start in range(0, len(ids), SEGMENT_CAPACITY):
+            segment = self._new_segment()
+            segment.add(np.array(ids[start:start + SEGMENT_CAPACITY]), embeddings[start:start + SEGMENT_CAPACITY])
+            new_segments.append(segment)
+
+        self.next_id = max(self.next_id, max(ids) + 1)
+        self._publish(
+            segments=self._merge_small_segments(snapshot.segments + tuple(new_segments)),
+            clause_metadata=clause_metadata,
+            clause_texts=clause_texts,
+            content_hashes=content_hashes,
+            lexical=snapshot.lexical.with_added(zip(ids, texts))
+        )
+
+    def _merge_small_segments(self, segments: Tuple[VectorSegment, ...]) -> Tuple[VectorSegment, ...]:
+        """
+        Folds small write-batch segments together once there are too many of them to search
+        cheaply, and folds fp16-staged ones (sq8/pq) into one trained segment as soon as they
+        hold enough vectors to train the quantizer on.
+        """
+        staged = [seg for seg in segments if seg.is_staged]
+        if len(staged) > 1 and sum(len(seg) for seg in staged) >= MIN_TRAINING_VECTORS[self.storage.mode]:
+            small = staged
+        else:
+            small = [seg for seg in segments if len(seg) < SEGMENT_CAPACITY // 2 or seg.is_staged]
+            if len(small) <= MAX_SMALL_SEGMENTS:
+                return segments
+        merging = {id(seg) for seg in small}
+        large = [seg for seg in segments if id(seg) not in merging]
+        ids = np.concatenate([seg.ids for seg in small])
+        vectors = np.vstack([seg.vectors() for seg in small])
+        merged = []
+        for start in range(0, len(ids), SEGMENT_CAPACITY):
+            segment = self._new_segment()
+            segment.add(ids[start:start + SEGMENT_CAPACITY], vectors[start:start + SEGMENT_CAPACITY])
+            merged.append(segment)
+        return tuple(large + merged)
+
+    def add_references(self, references: List[Tuple[int, Optional[int], str]]) -> List[bool]:
+        """
+        Records (vector_id, contract_id, source_contract) references to clauses that are already
+        indexed, instead of adding duplicate vectors. Returns, per reference, whether it was
+        recorded; a clause removed in the meantime must be added as a new vector instead.
+        """
+        with self._write_lock, self._file_lock():
+            self._sync_locked()
+            recorded = [self.snapshot.is_live(int(vector_id)) for vector_id, _, _ in references]
+            accepted = [[int(v), c, name] for (v, c, name), ok in zip(references, recorded) if ok]
+            if accepted:
+                self._append(OP_ADD_REFERENCES, {"references": accepted})
+            return recorded
+
+    def _apply_add_references(self, references: List[List[Any]]):
+        clause_metadata = dict(self.snapshot.clause_metadata)
+        for vector_id, contract_id, source_contract in references:
+            meta = clause_metadata.get(vector_id)
+            if meta is None:
+                continue
+            sources = clause_sources(meta) + [{"contract_id": contract_id, "source_contract": source_contract}]
+            # Replace the value whole; readers may hold the old dict
+            clause_metadata[vector_id] = dict(meta, sources=sources, ref_count=len(sources))
+            if contract_id is not None:
+                self.contract_vector_ids.setdefault(contract_id, set()).add(vector_id)
+        self._publish(clause_metadata=clause_metadata)
+
+    def remove_contract(self, contract_id: int) -> List[int]:
+        """
+        Drops a contract's references to its clause vectors, and its document vector.
+        Clauses still referenced by other contracts stay live; the rest are tombstoned.
+        Returns the ids of the clause vectors the contract referenced, read under the same
+        locks as the removal so a concurrent upload of the contract can't slip ids in between.
+        """
+        with self._write_lock, self._file_lock():
+            self._sync_locked()
+            vector_ids = sorted(self.contract_vector_ids.get(contract_id, ()))
+            if vector_ids or contract_id in self.snapshot.contract_metadata:
+                self._append(OP_REMOVE_CONTRACT, {"contract_id": int(contract_id)})
+            return vector_ids
+
+    def _apply_remove_contract(self, contract_id: int):
+        snapshot = self.snapshot
+        dead = set()
+        updated = {}
+        for vector_id in self.contract_vector_ids.pop(contract_id, set()):
+            meta = snapshot.clause_metadata.get(vector_id)
+            remaining = [src for src in clause_sources(meta) if src.get("contract_id") != contract_id] if meta else []
+            if not remaining:
+                dead.add(vector_id)
+                continue
+            updated[vector_id] = dict(
+                meta, sources=remaining, ref_count=len(remaining),
+                contract_id=remaining[0]["contract_id"], source_contract=remaining[0]["source_contract"]
+            )
+
+        changes = {"tombstones": snapshot.tombstones | frozenset(dead)}
+        if updated:
+            changes["clause_metadata"] = {**snapshot.clause_metadata, **updated}
+        if contract_id in snapshot.contract_metadata:
+            contract_index = faiss.clone_index(snapshot.contract_index)
+            contract_index.remove_ids(np.array([contract_id], dtype='int64'))
+            changes["contract_index"] = contract_index
+            changes["contract_metadata"] = {k: v for k, v in snapshot.contract_metadata.items() if k != contract_id}
+        self._publish(**changes)
+
+    def is_live(self, vector_id: int) -> bool:
+        return self.snapshot.is_live(vector_id)
+
+    def search(self, query_embeddings: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.snapshot.search(query_embeddings, k)
+
+    def compact(self) -> int:
+        """
+        Rewrites the segments without tombstoned vectors and checkpoints the result.
+        Returns the number of vectors dropped.
+
+        Compaction is a log record like any other write, so every worker tailing the log swaps
+        to the compacted segments too, instead of holding segments whose files the checkpoint
+        below deletes.
+        """
+        with self._write_lock, self._file_lock():
+            self._sync_locked()
+            dropped = len(self.snapshot.tombstones)
+            if not dropped:
+                return 0
+            self._append(OP_COMPACT, {"dropped": dropped})
+            self._checkpoint()
+            logger.info(f"🧹 Compacted shard '{self.key}': dropped {dropped} dead vectors")
+            return dropped
+
+    def _apply_compact(self):
+        snapshot = self.snapshot
+        dead = snapshot.tombstones
+        if not dead:
+            return
+
+        dead_ids = np.fromiter(dead, dtype='int64', count=len(dead))
+        live_ids, live_vectors = [], []
+        for segment in snapshot.segments:
+            mask = ~np.isin(segment.ids, dead_ids)
+            if mask.any():
+                live_ids.append(segment.ids[mask])
+                live_vectors.append(segment.vectors()[mask])
+
+        new_segments = []
+        if live_ids:
+            ids = np.concatenate(live_ids)
+            vectors = np.vstack(live_vectors)
+            for start in range(0, len(ids), SEGMENT_CAPACITY):
+                segment = self._new_segment()
+                segment.add(ids[start:start + SEGMENT_CAPACITY], vectors[start:start + SEGMENT_CAPACITY])
+                new_segments.append(segment)
+
+        # Build replacements off to the side, then swap them in with one publish
+        clause_texts = {k: v for k, v in snapshot.clause_texts.items() if k not in dead}
+        clause_metadata = {k: v for k, v in snapshot.clause_metadata.items() if k not in dead}
+        self._publish(
+            segments=tuple(new_segments),
+            clause_metadata=clause_metadata,
+            clause_texts=clause_texts,
+            tombstones=frozenset(),
+            lexical=LexicalIndex.build(clause_texts),
+            content_hashes=self._content_hashes(clause_metadata, clause_texts, ())
+        )
+
+    def clear(self) -> int:
+        """
+        Empties the shard (a departing tenant) on every worker: the reset goes through the log,
+        so workers that still have the shard loaded drop it too instead of serving it or writing
+        it back at their next checkpoint. The directory stays behind with an empty snapshot.
+        Returns the number of live clauses dropped.
+        """
+        with self._write_lock, self._file_lock():
+            self._sync_locked()
+            dropped = len(self.snapshot)
+            self._append(OP_RESET, {"dropped": dropped})
+            self._checkpoint()
+            logger.info(f"🗑️ Cleared shard '{self.key}': dropped {dropped} clauses")
+            return dropped
+
+    def _apply_reset(self):
+        # next_id is kept so vector ids are never reused
+        self.contract_vector_ids = {}
+        self._publish(
+            segments=(),
+            clause_metadata={},
+            clause_texts={},
+            tombstones=frozenset(),
+            contract_index=empty_contract_index(self.embedding_dim),
+            contract_metadata={},
+            lexical=LexicalIndex(),
+            content_hashes={}
+        )
+
+    def memory_bytes(self) -> int:
+        """Rough resident size used by the shard cache budget"""
+        snapshot = self.snapshot
+        vector_bytes = sum(seg.memory_bytes() for seg in snapshot.segments)
+        vector_bytes += snapshot.contract_index.ntotal * self.embedding_dim * 4
+        text_bytes = sum(len(t) for t in snapshot.clause_texts.values()) + snapshot.lexical.memory_bytes()
+        return vector_bytes + text_bytes + 256 * len(snapshot.clause_metadata)
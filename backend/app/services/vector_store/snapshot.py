@@ -0,0 +1,137 @@
+import numpy as np
+import faiss
+from dataclasses import dataclass, field
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
+
+from app.services.vector_store.segment import VectorSegment
+from app.services.vector_store.lexical import LexicalIndex
+
+
+def empty_contract_index(embedding_dim: int) -> faiss.Index:
+    return faiss.IndexIDMap2(faiss.IndexFlatIP(embedding_dim))
+
+
+@dataclass(frozen=True)
+class ShardSnapshot:
+    """
+    Immutable, self-consistent view of a shard that readers search without locks.
+
+    Writers never mutate anything a published snapshot holds: segments, dicts and indexes
+    are copied on write into the next snapshot (dicts shallowly; the lexical index shares its
+    posting chunks and only adds new ones), which is published with a single attribute assignment. A reader can iterate
+    any field without a lock, and every id it finds, lexical hits included, has its vectors
+    and metadata in the same snapshot.
+    """
+    version: int
+    embedding_dim: int
+    segments: Tuple[VectorSegment, ...] = ()
+    clause_metadata: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    clause_texts: Dict[int, str] = field(default_factory=dict)
+    tombstones: FrozenSet[int] = frozenset()
+    contract_index: Optional[faiss.Index] = None
+    contract_metadata: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    lexical: LexicalIndex = field(default_factory=LexicalIndex)
+    # Fingerprint of the normalized clause text -> vector id, for insertion-time dedup
+    content_hashes: Dict[str, int] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        """Number of live (non-tombstoned) clauses"""
+        return self.total_vectors - len(self.tombstones)
+
+    @property
+    def total_vectors(self) -> int:
+        return sum(len(seg) for seg in self.segments)
+
+    def dead_ratio(self) -> float:
+        total = self.total_vectors
+        return len(self.tombstones) / total if total else 0.0
+
+    def is_live(self, vector_id: int) -> bool:
+        return vector_id >= 0 and vector_id not in self.tombstones and vector_id in self.clause_texts
+
+    def search(self, query_embeddings: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k over all segments with tombstones filtered out.
+        Returns (scores, vector_ids), padded with -1 ids when fewer than k live vectors match.
+        """
+        n_queries = len(query_embeddings)
+        if not self.segments:
+            return np.zeros((n_queries, 0), dtype='float32'), np.zeros((n_queries, 0), dtype='int64')
+
+        # Over-fetch by the number of dead vectors so filtering can't starve the result set
+        fetch = k + len(self.tombstones)
+        all_scores, all_ids = [], []
+        for segment in self.segments:
+            scores, ids = segment.search(query_embeddings, fetch)
+            all_scores.append(scores)
+            all_ids.append(ids)
+        scores = np.hstack(all_scores)
+        ids = np.hstack(all_ids)
+
+        invalid = ids < 0
+        if self.tombstones:
+            invalid |= np.isin(ids, np.fromiter(self.tombstones, dtype='int64', count=len(self.tombstones)))
+        scores = np.where(invalid, -np.inf, scores)
+        ids = np.where(invalid, -1, ids)
+
+        order = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+    def range_search(self, query_embedding: np.ndarray, threshold: float, after: Optional[Tuple[float, int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Every live clause scoring >= threshold against one query, as (scores, vector_ids), unordered.
+        With `after` = (score, vector_id), only clauses ranked after that position in
+        (score desc, vector id) order are returned, so a paginating caller never collects the
+        matches its earlier pages already served.
+        """
+        if not self.segments:
+            return np.zeros(0, dtype='float32'), np.zeros(0, dtype='int64')
+        hits = [segment.range_search(query_embedding, threshold) for segment in self.segments]
+        scores = np.concatenate([s for s, _ in hits])
+        ids = np.concatenate([i for _, i in hits])
+        if after is not None and len(ids):
+            after_score, after_id = after
+            keep = (scores < after_score) | ((scores == after_score) & (ids > after_id))
+            scores, ids = scores[keep], ids[keep]
+        if self.tombstones and len(ids):
+            keep = ~np.isin(ids, np.fromiter(self.tombstones, dtype='int64', count=len(self.tombstones)))
+            scores, ids = scores[keep], ids[keep]
+        return scores, ids
+
+    def find_duplicates(self, embeddings: np.ndarray, hashes: List[str], clause_types: List[str], threshold: float) -> List[Optional[int]]:
+        """
+        For each new clause, the live vector id it duplicates, or None.
+        A duplicate has the same normalized text, or the same clause type and cosine >= threshold.
+        """
+        duplicates: List[Optional[int]] = []
+        for content_hash in hashes:
+            vector_id = self.content_hashes.get(content_hash)
+            duplicates.append(vector_id if vector_id is not None and self.is_live(vector_id) else None)
+
+        pending = [i for i, dup in enumerate(duplicates) if dup is None]
+        if pending and threshold < 1.0 and self.segments:
+            scores, ids = self.search(embeddings[pending], 1)
+            for row, i in enumerate(pending):
+                if not len(ids[row]) or scores[row][0] < threshold:
+                    continue
+                vector_id = int(ids[row][0])
+                meta = self.clause_metadata.get(vector_id)
+                if meta is not None and meta.get("clause_type") == clause_types[i] and self.is_live(vector_id):
+                    duplicates[i] = vector_id
+        return duplicates
+
+    def search_lexical(self, query_text: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 top-k over live clauses. Returns (vector_ids, scores), best first."""
+        exclude = np.fromiter(self.tombstones, dtype='int64', count=len(self.tombstones)) if self.tombstones else None
+        return self.lexical.search(query_text, k, exclude=exclude)
+
+    def contract_vector(self, contract_id: int) -> Optional[np.ndarray]:
+        if contract_id not in self.contract_metadata:
+            return None
+        return self.contract_index.reconstruct(contract_id)
+
+    def search_contracts(self, query_vector: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, self.contract_index.ntotal)
+        if k <= 0:
+            return np.zeros((1, 0), dtype='float32'), np.zeros((1, 0), dtype='int64')
+        return self.contract_index.search(np.ascontiguousarray(query_vector.reshape(1, -1), dtype='float32'), k)
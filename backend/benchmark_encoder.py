@@ -0,0 +1,77 @@
+# benchmark_encoder.py
+# Embedding parity and CPU throughput of each sentence encoder backend (torch / int8 / onnx / onnx-int8).
+# Parity: cosine between each backend's embeddings and the torch fp32 reference, and how many
+# of each sentence's top-10 neighbours the backend reproduces.
+# Throughput: sentences per second, and per core (THREADS intra-op threads per backend),
+# plus the multi-process pool used by bulk re-indexing.
+import sys
+import os
+import json
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.encoder_service import SentenceEncoder, ENCODER_BACKENDS
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+LIBRARY_PATH = "app/data/clause_library.json"
+CACHE_DIR = "app/data/embeddings/encoders"
+N_SENTENCES = 2000
+THREADS = 4
+BATCH_SIZE = 32
+POOL_PROCESSES = 4
+TOP_K = 10
+
+def make_corpus() -> list:
+    """Standard clauses with varied numbers and parties, so lengths and wording differ"""
+    with open(LIBRARY_PATH, 'r', encoding='utf-8') as f:
+        base = [entry["text"] for entries in json.load(f).values() for entry in entries]
+    rng = np.random.default_rng(0)
+    parties = ["the Supplier", "the Vendor", "the Contractor", "the Service Provider"]
+    corpus = []
+    while len(corpus) < N_SENTENCES:
+        text = base[rng.integers(len(base))]
+        text = text.replace("thirty (30)", f"{rng.integers(5, 120)}").replace("the Vendor", parties[rng.integers(len(parties))])
+        corpus.append(text if rng.random() < 0.7 else text.split(",")[0] + ".")
+    return corpus
+
+def neighbours(embeddings: np.ndarray) -> np.ndarray:
+    normed = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    scores = normed @ normed.T
+    np.fill_diagonal(scores, -np.inf)
+    return np.argsort(-scores, axis=1)[:, :TOP_K]
+
+def throughput(encode, corpus: list) -> float:
+    encode(corpus[:BATCH_SIZE])  # warm-up
+    start = time.perf_counter()
+    encode(corpus)
+    return len(corpus) / (time.perf_counter() - start)
+
+def run():
+    corpus = make_corpus()
+    reference = None
+    print(f"{len(corpus)} sentences, {THREADS} threads per backend\n")
+    print(f"{'backend':<10} {'active':<10} {'min cos':>8} {'mean cos':>9} {'top-' + str(TOP_K) + ' overlap':>15} {'sent/s':>8} {'sent/s/core':>12}")
+    print("-" * 78)
+    for backend in ENCODER_BACKENDS:
+        encoder = SentenceEncoder(MODEL_NAME, backend=backend, threads=THREADS, batch_size=BATCH_SIZE, cache_dir=CACHE_DIR)
+        embeddings = encoder.encode(corpus)
+        if reference is None:
+            reference = encoder.encode_reference(corpus)
+            reference_neighbours = neighbours(reference)
+
+        a = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        b = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+        cosine = (a * b).sum(axis=1)
+        overlap = np.mean([len(set(x) & set(y)) / TOP_K for x, y in zip(neighbours(embeddings), reference_neighbours)])
+        rate = throughput(encoder.encode, corpus)
+        print(f"{backend:<10} {encoder.backend:<10} {cosine.min():>8.4f} {cosine.mean():>9.4f} {overlap:>15.3f} {rate:>8.0f} {rate / THREADS:>12.1f}")
+
+    pool_rate = throughput(lambda texts: encoder.encode_multi_process(texts, processes=POOL_PROCESSES), corpus * max(1, 4000 // len(corpus)))
+    cores = os.cpu_count() or 1
+    print(f"\nmulti-process pool ({POOL_PROCESSES} processes, torch): {pool_rate:.0f} sent/s, {pool_rate / min(cores, POOL_PROCESSES * max(1, cores // POOL_PROCESSES)):.1f} sent/s/core")
+    print("A backend whose parity falls below the configured minimum runs as 'torch' (see the active column).")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,88 @@
+# benchmark_feature_extraction.py
+# ContractFeatureExtractor.extract_features on large contracts: the previous implementation
+# (text lowercased twice, per-word Python list for the mean word length, sentence list)
+# against the current one (one lowercased copy, C-level sums and counts).
+# Also times a single compiled alternation regex over all keywords, the "one sweep" design,
+# for reference: CPython's regex engine is far slower than str.find/str.count per keyword.
+import sys
+import os
+import re
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ml_models.feature_engineering import ContractFeatureExtractor
+from benchmark_risk_batch import SENTENCES
+
+SIZES_MB = [1, 5, 20]
+REPEATS = 3
+
+def make_text(size_mb: float) -> str:
+    rng = np.random.default_rng(0)
+    parts, length, section = [], 0, 1
+    while length < size_mb * 1024 * 1024:
+        if rng.random() < 0.05:
+            parts.append(f"\n{section}. SECTION {section}\n")
+            section += 1
+        sentence = SENTENCES[rng.integers(len(SENTENCES))]
+        parts.append(sentence.upper() if rng.random() < 0.1 else sentence)
+        length += len(parts[-1]) + 1
+    return " ".join(parts)
+
+def legacy_text_features(extractor: ContractFeatureExtractor, text: str) -> dict:
+    """The previous _extract_text_features + _extract_structural_features"""
+    features = {}
+    words = text.split()
+    features["text_length"] = len(text)
+    features["word_count"] = len(words)
+    features["sentence_count"] = len(extractor.sentence_split.split(text))
+    features["avg_word_length"] = np.mean([len(w) for w in words]) if words else 0.0
+    features["avg_sentence_length"] = len(words) / max(1, features["sentence_count"]) if words else 0.0
+    text_lower = text.lower()
+    for indicator in extractor.risk_indicators:
+        features[f"contains_{indicator.replace(' ', '_')}"] = 1.0 if indicator in text_lower else 0.0
+    features["section_count"] = float(len(extractor.section_header.findall(text)))
+    features["has_tables"] = 1.0 if ("|" in text and "---" in text) else 0.0
+    text_lower = text.lower()
+    features["definition_count"] = float(sum(text_lower.count(p) for p in extractor.definition_patterns))
+    return features
+
+def current_text_features(extractor: ContractFeatureExtractor, text: str) -> dict:
+    text_lower = text.lower()
+    features = extractor._extract_text_features(text, text_lower)
+    features.update(extractor._extract_structural_features(text, text_lower))
+    return features
+
+def alternation_sweep(extractor: ContractFeatureExtractor, text: str) -> dict:
+    keywords = extractor.risk_indicators + extractor.definition_patterns
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))", re.IGNORECASE)
+    counts = {}
+    for match in pattern.findall(text):
+        counts[match.lower()] = counts.get(match.lower(), 0) + 1
+    return counts
+
+def best_time(fn) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def run():
+    extractor = ContractFeatureExtractor()
+    print(f"{'size MB':>7} {'previous ms':>12} {'current ms':>11} {'speed-up':>9} {'alternation regex ms':>21}")
+    print("-" * 66)
+    for size in SIZES_MB:
+        text = make_text(size)
+        legacy = legacy_text_features(extractor, text)
+        current = current_text_features(extractor, text)
+        assert all(float(legacy[k]) == float(current[k]) for k in legacy), "feature values changed"
+        before = best_time(lambda: legacy_text_features(extractor, text))
+        after = best_time(lambda: current_text_features(extractor, text))
+        sweep = best_time(lambda: alternation_sweep(extractor, text))
+        print(f"{size:>7} {before * 1000:>12.0f} {after * 1000:>11.0f} {before / after:>8.1f}x {sweep * 1000:>21.0f}")
+
+if __name__ == "__main__":
+    run()
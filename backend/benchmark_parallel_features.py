@@ -0,0 +1,47 @@
+# benchmark_parallel_features.py
+# Feature extraction throughput of FeatureExtractionPool (training prep, portfolio re-scoring,
+# feature store refresh) by worker count, on synthetic contracts. Output must be identical and
+# in input order for every worker count; scaling should track the number of physical cores.
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ml_models.feature_engineering import ContractFeatureExtractor
+from app.services.ml_models.feature_pool import FeatureExtractionPool
+from benchmark_risk_batch import make_contracts
+
+N_CONTRACTS = 4000
+WORKER_COUNTS = [1, 2, 4, 8, 16]
+CHUNK_SIZE = 32
+
+def run():
+    contracts = make_contracts(N_CONTRACTS)
+    extractor = ContractFeatureExtractor()
+    cores = os.cpu_count() or 1
+    print(f"{N_CONTRACTS} contracts, {cores} CPU cores")
+    print(f"{'workers':>7} {'seconds':>8} {'contracts/s':>12} {'speed-up':>9}")
+    print("-" * 40)
+
+    start = time.perf_counter()
+    reference = [extractor.extract_features(c) for c in contracts]
+    serial = time.perf_counter() - start
+    print(f"{'serial':>7} {serial:>8.2f} {N_CONTRACTS / serial:>12.0f} {1.0:>8.1f}x")
+
+    for workers in WORKER_COUNTS:
+        if workers > 2 * cores:
+            break
+        pool = FeatureExtractionPool(processes=workers, chunk_size=CHUNK_SIZE)
+        try:
+            pool.extract_features(contracts[:pool.min_parallel * workers])  # start the workers
+            start = time.perf_counter()
+            features = pool.extract_features(contracts, extractor)
+            elapsed = time.perf_counter() - start
+        finally:
+            pool.shutdown()
+        assert features == reference, "parallel extraction changed the features or their order"
+        print(f"{workers:>7} {elapsed:>8.2f} {N_CONTRACTS / elapsed:>12.0f} {serial / elapsed:>8.1f}x")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,66 @@
+# benchmark_risk_batch.py
+# Throughput of RiskPredictionModel.predict_batch (one feature matrix, one predict_proba call)
+# against calling predict() once per contract, on synthetic contracts.
+# Uses the trained model at app/data/models/risk_model.pkl.
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ml_models.risk_model import RiskPredictionModel
+
+BATCH_SIZES = [1, 10, 100, 1000]
+REPEATS = 3
+
+SENTENCES = [
+    "Either party may terminate this agreement without cause on thirty days notice.",
+    "The Supplier shall indemnify and hold harmless the Customer against all claims.",
+    "Invoices are payable within 45 days; late payments incur a penalty of 2% per month.",
+    "Liquidated damages of $5,000 per day apply to late delivery.",
+    "\"Services\" means the services described in Schedule 1.",
+    "The Vendor grants a perpetual and irrevocable licence to the deliverables.",
+    "This agreement renews automatically for successive one-year terms.",
+    "The parties' liability is unlimited for breaches of confidentiality.",
+]
+
+def make_contracts(n: int) -> list:
+    rng = np.random.default_rng(0)
+    contracts = []
+    for i in range(n):
+        body = " ".join(SENTENCES[j] for j in rng.integers(0, len(SENTENCES), rng.integers(20, 200)))
+        contracts.append({
+            "raw_text": f"{i + 1}. MASTER SERVICES AGREEMENT\n{body}",
+            "extracted_clauses": {"termination": SENTENCES[:1], "payment": SENTENCES[2:3], "penalty": SENTENCES[3:4] * int(rng.integers(0, 3))},
+            "entities": {"money": [f"${rng.integers(1000, 900000)}"], "dates": ["January 1, 2025"], "organizations": ["Acme Corp"]},
+            "start_date": "2025-01-01",
+            "end_date": f"202{rng.integers(5, 9)}-12-31"
+        })
+    return contracts
+
+def best_time(fn) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def run():
+    model = RiskPredictionModel()
+    if not model.model:
+        print("No trained model found; run train_with_synthetic.py first")
+        return
+
+    print(f"{'contracts':>9} {'loop /s':>10} {'batch /s':>10} {'speed-up':>9}")
+    print("-" * 42)
+    for n in BATCH_SIZES:
+        contracts = make_contracts(n)
+        assert [p["risk_score"] for p in model.predict_batch(contracts)] == [model.predict(c)["risk_score"] for c in contracts]
+        loop = best_time(lambda: [model.predict(c) for c in contracts])
+        batch = best_time(lambda: model.predict_batch(contracts))
+        print(f"{n:>9} {n / loop:>10.0f} {n / batch:>10.0f} {loop / batch:>8.1f}x")
+
+if __name__ == "__main__":
+    run()
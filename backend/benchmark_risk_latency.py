@@ -0,0 +1,80 @@
+# benchmark_risk_latency.py
+# p50/p99 latency of a single RiskPredictionModel.predict call, before (one-row DataFrame,
+# reindex, predict_proba, per-call importance sort) and after (feature-index map, reused
+# NumPy row, Booster.inplace_predict, cached importance order).
+# Reported for the model step alone and end to end (including feature extraction).
+# Uses the trained model at app/data/models/risk_model.pkl.
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ml_models.risk_model import RiskPredictionModel
+from app.services.ml_models.feature_engineering import ContractFeatureExtractor
+from benchmark_risk_batch import make_contracts
+
+N_CALLS = 2000
+WARMUP = 100
+
+def legacy_model_step(model: RiskPredictionModel, features: dict) -> int:
+    """The pre-optimisation predict body, minus feature extraction"""
+    X = pd.DataFrame([features]).reindex(columns=model.feature_names, fill_value=0)
+    proba = model.model.predict_proba(X)[0]
+    danger_weights = {"LOW": 15.0, "MEDIUM": 50.0, "HIGH": 90.0}
+    score = int(np.clip(sum(proba[i] * danger_weights.get(c, 50.0) for i, c in enumerate(model._state.label_encoder.classes_)), 0, 100))
+    importances = model.model.feature_importances_
+    row = X.iloc[0]
+    [row.get(model.feature_names[i], 0) for i in np.argsort(importances)[::-1][:5]]
+    return score
+
+def lean_model_step(model: RiskPredictionModel, features: dict) -> int:
+    state = model._state
+    row = state.row_buffer()
+    row.fill(0.0)
+    state.fill_row(row[0], features)
+    probabilities = state.booster.inplace_predict(row)
+    score = int(state.risk_scores(probabilities)[0])
+    state.top_contributing_features(row[0], state.contributions(row, probabilities)[0])
+    return score
+
+def percentiles(fn, inputs: list) -> tuple:
+    for item in inputs[:WARMUP]:
+        fn(item)
+    timings = []
+    for i in range(N_CALLS):
+        item = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        fn(item)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+def run():
+    model = RiskPredictionModel()
+    if not model.model:
+        print("No trained model found; run train_with_synthetic.py first")
+        return
+    extractor = ContractFeatureExtractor()
+    model.feature_extractor = extractor
+    contracts = make_contracts(200)
+    features = [extractor.extract_features(c) for c in contracts]
+    assert all(legacy_model_step(model, f) == lean_model_step(model, f) for f in features)
+
+    def legacy_end_to_end(contract):
+        return legacy_model_step(model, extractor.extract_features(contract))
+
+    print(f"{'path':<28} {'p50 ms':>8} {'p99 ms':>8}")
+    print("-" * 46)
+    for label, fn, inputs in [
+        ("model step, before", lambda f: legacy_model_step(model, f), features),
+        ("model step, after", lambda f: lean_model_step(model, f), features),
+        ("predict(), before", legacy_end_to_end, contracts),
+        ("predict(), after", model.predict, contracts),
+    ]:
+        p50, p99 = percentiles(fn, inputs)
+        print(f"{label:<28} {p50:>8.3f} {p99:>8.3f}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,84 @@
+# benchmark_vector_storage.py
+# Compares the segment storage modes (flat / fp16 / sq8 / pq) on memory per million clauses,
+# on-disk size, recall@K against exact float32 search, and query latency.
+# Uses the vectors of SHARD_KEY when that shard exists locally, synthetic clustered vectors otherwise.
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+import faiss
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.vector_store.segment import VectorSegment, VectorStorage, STORAGE_MODES
+from app.services.vector_store.shard import VectorShard
+
+SHARD_KEY = "public"
+SHARDS_DIR = "app/data/embeddings/tenants"
+EMBEDDING_DIM = 384          # all-MiniLM-L6-v2
+N_SYNTHETIC = 200_000
+N_QUERIES = 500
+TOP_K = 10
+PQ_SUBQUANTIZERS = 96
+RERANK_FACTOR = 10
+
+def load_vectors() -> np.ndarray:
+    if os.path.exists(os.path.join(SHARDS_DIR, SHARD_KEY, "manifest.json")):
+        shard = VectorShard(SHARD_KEY, SHARDS_DIR, EMBEDDING_DIM)
+        shard.load()
+        if len(shard):
+            print(f"Using {len(shard)} vectors from shard '{SHARD_KEY}'")
+            return np.vstack([seg.vectors() for seg in shard.segments])
+
+    # Sentence embeddings cluster by topic; isotropic noise would make every mode look worse than it is
+    print(f"Using {N_SYNTHETIC} synthetic clustered vectors")
+    rng = np.random.default_rng(42)
+    centers = rng.standard_normal((200, EMBEDDING_DIM)).astype('float32')
+    vectors = centers[rng.integers(0, len(centers), N_SYNTHETIC)] + 0.6 * rng.standard_normal((N_SYNTHETIC, EMBEDDING_DIM)).astype('float32')
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def make_queries(vectors: np.ndarray) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    queries = vectors[rng.integers(0, len(vectors), N_QUERIES)] + 0.3 * rng.standard_normal((N_QUERIES, vectors.shape[1])).astype('float32')
+    faiss.normalize_L2(queries)
+    return queries
+
+def run():
+    vectors = load_vectors()
+    queries = make_queries(vectors)
+    ids = np.arange(len(vectors))
+
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, TOP_K)
+
+    print(f"\n{'mode':<6} {'RAM MB / 1M':>12} {'disk MB / 1M':>13} {'recall@' + str(TOP_K):>10} {'ms / query':>11} {'build s':>8}")
+    print("-" * 66)
+    for mode in STORAGE_MODES:
+        storage = VectorStorage(mode=mode, pq_m=PQ_SUBQUANTIZERS, rerank_factor=RERANK_FACTOR)
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            segment = VectorSegment("bench", vectors.shape[1], storage)
+            segment.add(ids, vectors)
+            segment.save(tmp)
+            build_seconds = time.perf_counter() - start
+
+            disk_bytes = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+            ram_bytes = segment.memory_bytes()
+
+            start = time.perf_counter()
+            _, found = segment.search(queries, TOP_K)
+            ms_per_query = (time.perf_counter() - start) * 1000 / len(queries)
+
+            recall = np.mean([len(set(found[q]) & set(truth[q])) / TOP_K for q in range(len(queries))])
+            scale = 1_000_000 / len(vectors) / (1024 * 1024)
+            label = segment.mode if segment.mode == mode else f"{mode}->{segment.mode}"
+            print(f"{label:<6} {ram_bytes * scale:>12.1f} {disk_bytes * scale:>13.1f} {recall:>10.3f} {ms_per_query:>11.3f} {build_seconds:>8.1f}")
+            del segment
+
+    print("\nRAM excludes the page cache used by memory-mapped float16 vectors during sq8/pq re-ranking.")
+
+if __name__ == "__main__":
+    run()
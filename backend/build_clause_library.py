@@ -0,0 +1,71 @@
+# build_clause_library.py
+# Embeds the standard clauses in app/data/clause_library.json once, into
+# app/data/embeddings/clause_library.npz, which the similarity engine loads at startup to score
+# each ingested clause's deviation from the closest standard clause.
+# Re-run after editing the JSON or changing the encoder. With RESCORE_EXISTING, clauses already
+# in clause_embeddings are re-scored against the new library and their tenant shards rebuilt.
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import update
+from app.config import settings
+from app.database import SessionLocal
+# Import ALL models so Base knows about them
+from app.models.company import Company
+from app.models.user import User
+from app.models.vendor import Vendor
+from app.models.contract import Contract
+from app.models.sla import SLAEvent, VendorPerformance
+from app.models.embedding import ClauseEmbedding
+from app.services.similarity_service import ContractSimilarityEngine
+from app.services.vector_store.clause_store import ClauseEmbeddingStore, vectors_from_bytes
+
+RESCORE_EXISTING = True
+
+def rescore_existing(similarity: ContractSimilarityEngine) -> set:
+    """Re-scores every stored clause against the library; returns the tenants touched"""
+    library = similarity.clause_library
+    db = SessionLocal()
+    tenants, rescored = set(), 0
+    try:
+        query = db.query(
+            ClauseEmbedding.id, ClauseEmbedding.clause_type, ClauseEmbedding.embedding,
+            ClauseEmbedding.embedding_dim, ClauseEmbedding.company_id
+        ).filter(ClauseEmbedding.embedding.isnot(None), ClauseEmbedding.model_version == similarity.model_version)
+        # Keyset pages, one transaction each, so only one chunk of embeddings is in memory at a time
+        last_id = 0
+        while True:
+            chunk = query.filter(ClauseEmbedding.id > last_id).order_by(ClauseEmbedding.id).limit(settings.CLAUSE_EMBEDDING_CHUNK_SIZE).all()
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            embeddings = vectors_from_bytes([row.embedding for row in chunk], chunk[0].embedding_dim)
+            scores = library.score(embeddings, [row.clause_type for row in chunk])
+            db.execute(update(ClauseEmbedding), [dict(score, id=row.id) for row, score in zip(chunk, scores)])
+            db.commit()
+            tenants.update(row.company_id for row in chunk)
+            rescored += len(chunk)
+    finally:
+        db.close()
+    print(f"📐 Re-scored {rescored} stored clauses")
+    return tenants
+
+def build():
+    store = ClauseEmbeddingStore(SessionLocal, chunk_size=settings.CLAUSE_EMBEDDING_CHUNK_SIZE)
+    similarity = ContractSimilarityEngine(clause_store=store)
+    similarity._initialize_model()
+
+    library = similarity.build_clause_library()
+    print(f"📚 Embedded {len(library)} standard clauses -> {similarity.clause_library_path}")
+
+    if RESCORE_EXISTING:
+        for company_id in rescore_existing(similarity):
+            live = similarity.rebuild_shard(company_id)
+            print(f"✅ Shard '{'public' if company_id is None else f'company_{company_id}'}': rebuilt with {live} clauses")
+
+    similarity.compactor.stop()
+
+if __name__ == "__main__":
+    build()
@@ -0,0 +1,41 @@
+# cluster_clauses.py
+# Offline clause template clustering. Run periodically (e.g. nightly cron):
+#   - the first run per (company, clause_type) fits k-means over all of its clauses,
+#   - later runs assign only clauses added since and nudge the centroids (mini-batch k-means),
+#   - once a scope has grown CLAUSE_CLUSTER_REFIT_GROWTH times, it is re-fitted from scratch.
+# Results land in clause_clusters / clause_embeddings.cluster_id and are served by
+# GET /similarity/clusters and GET /similarity/clusters/outliers.
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.database import engine, SessionLocal, Base
+# Import ALL models so Base knows about them
+from app.models.company import Company
+from app.models.user import User
+from app.models.vendor import Vendor
+from app.models.contract import Contract
+from app.models.sla import SLAEvent, VendorPerformance
+from app.models.embedding import ClauseEmbedding, ClauseCluster
+from app.services.vector_store.clustering import ClauseClusterer
+from app.services.similarity_service import DEFAULT_MODEL_NAME
+
+MODEL_VERSION = DEFAULT_MODEL_NAME   # only cluster vectors from the serving encoder
+
+def run():
+    Base.metadata.create_all(bind=engine, tables=[ClauseCluster.__table__])
+    clusterer = ClauseClusterer(
+        SessionLocal,
+        max_clusters=settings.CLAUSE_CLUSTER_MAX_K,
+        outlier_similarity=settings.CLAUSE_OUTLIER_SIMILARITY,
+        refit_growth=settings.CLAUSE_CLUSTER_REFIT_GROWTH,
+        chunk_size=settings.CLAUSE_EMBEDDING_CHUNK_SIZE
+    )
+    for result in clusterer.run(model_version=MODEL_VERSION):
+        tenant = "public" if result["company_id"] is None else f"company {result['company_id']}"
+        print(f"🧩 {tenant} / {result['clause_type']}: {result['assigned']} of {result['clauses']} clauses assigned ({result['mode']})")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,46 @@
+# index_contract_vectors.py
+# Backfills the document-level vector index for contracts uploaded before it existed.
+# Contracts are encoded BATCH_SIZE at a time through the encoder's multi-process pool.
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.contract import Contract
+from app.services.similarity_service import ContractSimilarityEngine
+
+BATCH_SIZE = 500
+POOL_PROCESSES = 0   # 0 = one encoder process per CPU core
+
+def backfill_contract_vectors():
+    engine = ContractSimilarityEngine(encoder_backend=settings.EMBEDDING_BACKEND, encoder_batch_size=settings.EMBEDDING_BATCH_SIZE)
+    db = SessionLocal()
+    indexed = 0
+    try:
+        contracts = db.query(Contract).filter(Contract.raw_text.isnot(None)).yield_per(100)
+        batch = []
+        for contract in contracts:
+            batch.append({
+                "contract_id": contract.id,
+                "text": contract.raw_text[:15000],
+                "company_id": contract.company_id,
+                "contract_name": contract.contract_name,
+                "risk_level": contract.risk_level
+            })
+            if len(batch) >= BATCH_SIZE:
+                indexed += engine.index_contracts_bulk(batch, processes=POOL_PROCESSES)
+                batch = []
+        if batch:
+            indexed += engine.index_contracts_bulk(batch, processes=POOL_PROCESSES)
+        engine._save_data()
+        print(f"✅ Indexed {indexed} contracts")
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        db.close()
+        engine.compactor.stop()
+
+if __name__ == "__main__":
+    backfill_contract_vectors()
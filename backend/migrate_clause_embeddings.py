@@ -0,0 +1,100 @@
+# migrate_clause_embeddings.py
+# Makes the clause_embeddings table the source of truth for the vector store:
+#   1. adds the vector/metadata columns to an existing clause_embeddings table,
+#   2. copies live clauses from local tenant shards into it (tenants with no rows yet),
+#   3. rebuilds every shard from the table so vector ids match row ids on all nodes.
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import inspect, text
+from app.config import settings
+from app.database import engine, SessionLocal, Base
+# Import ALL models so Base knows about them
+from app.models.company import Company
+from app.models.user import User
+from app.models.vendor import Vendor
+from app.models.contract import Contract
+from app.models.sla import SLAEvent, VendorPerformance
+from app.models.embedding import ClauseEmbedding, ClauseCluster
+from app.services.similarity_service import ContractSimilarityEngine
+from app.services.vector_store.clause_store import ClauseEmbeddingStore
+from app.services.vector_store.shard import VectorShard, company_id_for
+
+NEW_COLUMNS = {
+    "embedding": "BYTEA" if engine.dialect.name == "postgresql" else "BLOB",
+    "embedding_dim": "INTEGER",
+    "model_version": "VARCHAR",
+    "content_hash": "VARCHAR(40)",
+    "company_id": "INTEGER REFERENCES companies(id)",
+    "source_contract": "VARCHAR",
+    "risk_level": "VARCHAR",
+    "sources": "JSON",
+    "reference_count": "INTEGER DEFAULT 1",
+    "cluster_id": "INTEGER REFERENCES clause_clusters(id)",
+    "cluster_similarity": "FLOAT",
+    "standard_clause_id": "VARCHAR",
+    "standard_deviation": "FLOAT",
+}
+
+def add_missing_columns():
+    Base.metadata.create_all(bind=engine, tables=[ClauseCluster.__table__, ClauseEmbedding.__table__])
+    existing = {col["name"] for col in inspect(engine).get_columns("clause_embeddings")}
+    with engine.begin() as conn:
+        for name, ddl in NEW_COLUMNS.items():
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE clause_embeddings ADD COLUMN {name} {ddl}"))
+                print(f"➕ Added column clause_embeddings.{name}")
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_clause_embeddings_company_id_id ON clause_embeddings (company_id, id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_clause_embeddings_content_hash ON clause_embeddings (content_hash)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_clause_embeddings_company_cluster_similarity ON clause_embeddings (company_id, cluster_similarity)"))
+
+def export_local_shards(similarity: ContractSimilarityEngine, store: ClauseEmbeddingStore) -> list:
+    if not os.path.isdir(similarity.shards_dir):
+        return []
+    keys = sorted(os.listdir(similarity.shards_dir))
+    db = SessionLocal()
+    try:
+        for key in keys:
+            company_id = company_id_for(key)
+            query = db.query(ClauseEmbedding.id)
+            query = query.filter(ClauseEmbedding.company_id.is_(None) if company_id is None else ClauseEmbedding.company_id == company_id)
+            if query.first():
+                print(f"⏭️  Shard '{key}' already has rows in the database")
+                continue
+
+            shard = VectorShard(key, similarity.shards_dir, similarity.embedding_dim)
+            shard.load()
+            exported = 0
+            for segment in shard.segments:
+                vectors = segment.vectors()
+                live = [row for row, vector_id in enumerate(segment.ids) if shard.is_live(int(vector_id))]
+                for start in range(0, len(live), settings.CLAUSE_EMBEDDING_CHUNK_SIZE):
+                    rows = live[start:start + settings.CLAUSE_EMBEDDING_CHUNK_SIZE]
+                    ids = [int(segment.ids[row]) for row in rows]
+                    metadata = [dict(shard.clause_metadata[vector_id], company_id=company_id) for vector_id in ids]
+                    store.insert([shard.clause_texts[vector_id] for vector_id in ids], vectors[rows], metadata, similarity.model_version)
+                    exported += len(rows)
+            print(f"📤 Shard '{key}': exported {exported} clauses")
+    finally:
+        db.close()
+    return keys
+
+def migrate():
+    add_missing_columns()
+
+    store = ClauseEmbeddingStore(SessionLocal, chunk_size=settings.CLAUSE_EMBEDDING_CHUNK_SIZE)
+    similarity = ContractSimilarityEngine(clause_store=store)
+    similarity._initialize_model()
+
+    for key in export_local_shards(similarity, store):
+        live = similarity.rebuild_shard(company_id_for(key))
+        print(f"✅ Shard '{key}': rebuilt with {live} clauses from the database")
+
+    similarity.compactor.stop()
+    print("\nMigration complete. Nodes without local shard files now warm them from the database.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,59 @@
+# migrate_vector_shards.py
+# One-off migration of the old global FAISS store (app/data/embeddings/clause_*.*)
+# into per-tenant shards under app/data/embeddings/tenants/<key>/.
+import sys
+import os
+import json
+import pickle
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app.models.company import Company
+from app.services.vector_store.shard import VectorShard, shard_key_for
+
+DATA_DIR = "app/data/embeddings"
+SHARDS_DIR = os.path.join(DATA_DIR, "tenants")
+
+def migrate():
+    metadata_path = os.path.join(DATA_DIR, "clause_metadata.json")
+    texts_path = os.path.join(DATA_DIR, "clause_texts.pkl")
+    embeddings_path = os.path.join(DATA_DIR, "clause_embeddings.npy")
+
+    if not (os.path.exists(metadata_path) and os.path.exists(embeddings_path)):
+        print("No legacy vector store found. Nothing to migrate.")
+        return
+
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+    with open(texts_path, 'rb') as f:
+        texts = pickle.load(f)
+    embeddings = np.load(embeddings_path).astype('float32')
+
+    # The legacy store only tagged clauses with the company *name*
+    db = SessionLocal()
+    try:
+        company_ids = {c.name: c.id for c in db.query(Company).all()}
+    finally:
+        db.close()
+
+    shards = {}
+    for row, (meta, text) in enumerate(zip(metadata, texts)):
+        tag = meta.get("tags", ["public"])[0] if meta.get("tags") else "public"
+        company_id = company_ids.get(tag)
+        key = shard_key_for(company_id)
+        if key not in shards:
+            shards[key] = VectorShard(key, SHARDS_DIR, embeddings.shape[1])
+            shards[key].load()
+        meta = dict(meta, company_id=company_id)
+        shards[key].add(embeddings[row:row + 1], [text], [meta])
+
+    for key, shard in shards.items():
+        shard.save(force=True)
+        print(f"✅ Shard '{key}': {len(shard)} clauses")
+
+    print("\nMigration complete. The legacy files can be deleted once the shards are verified.")
+
+if __name__ == "__main__":
+    migrate()
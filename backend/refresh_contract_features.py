@@ -0,0 +1,33 @@
+# refresh_contract_features.py
+# Fills the contract_features table (the risk model's feature store):
+#   - contracts with no row, or a row from an older FEATURE_SCHEMA_VERSION, are extracted,
+#   - VERIFY_HASHES also re-hashes every stored contract and re-extracts the ones whose text,
+#     clauses, entities or dates changed outside the upload API (e.g. seed or fix scripts).
+# /ml/train refreshes missing rows itself; run this after bumping FEATURE_SCHEMA_VERSION or
+# bulk-editing contracts so the next training run starts from a warm store.
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.database import engine, SessionLocal, Base
+# Import ALL models so Base knows about them
+from app.models.company import Company
+from app.models.user import User
+from app.models.vendor import Vendor
+from app.models.contract import Contract
+from app.models.sla import SLAEvent, VendorPerformance
+from app.models.ml_features import ContractFeatures
+from app.services.ml_models.feature_store import ContractFeatureStore
+
+VERIFY_HASHES = True
+
+def run():
+    Base.metadata.create_all(bind=engine, tables=[ContractFeatures.__table__])
+    store = ContractFeatureStore(SessionLocal, chunk_size=settings.ML_FEATURE_CHUNK_SIZE, processes=settings.ML_FEATURE_WORKERS)
+    result = store.refresh(verify=VERIFY_HASHES)
+    print(f"🧮 Extracted features for {result['extracted']} of {result['scanned']} contracts")
+
+if __name__ == "__main__":
+    run()
@@ -6,6 +6,7 @@ from app.models.vendor import Vendor
 from app.models.contract import Contract
 from app.models.sla import SLAEvent, VendorPerformance
 from app.models.embedding import ClauseEmbedding
+from app.models.ml_features import ContractFeatures
 
 print("⚠️  Dropping all tables...")
 Base.metadata.drop_all(bind=engine)
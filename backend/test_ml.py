@@ -1,9 +1,137 @@
 # test_ml.py
 import requests
 import json
+import time
+import tempfile
+import multiprocessing
 
 BASE_URL = "http://localhost:8000"
 
+def check_feature_store_refresh():
+    """
+    Offline check of the risk-model feature store on a scratch SQLite database: refresh only
+    extracts contracts without current features, verify=True catches edits made outside the
+    API, and the watermark picks out exactly the rows a warm start trains on.
+    """
+    import os
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.database import Base
+    # Import ALL models so Base knows about them
+    from app.models.company import Company
+    from app.models.user import User
+    from app.models.vendor import Vendor
+    from app.models.contract import Contract
+    from app.models.sla import SLAEvent, VendorPerformance
+    from app.models.embedding import ClauseEmbedding
+    from app.models.ml_features import ContractFeatures
+    from app.services.ml_models.feature_store import ContractFeatureStore
+
+    print("Checking the feature store refresh and watermark...")
+    texts = [
+        "The vendor shall pay a penalty of $5,000 for each breach. Liability is unlimited.",
+        "Either party may terminate with 30 days notice. Payment is due within 30 days.",
+        "Confidential information must not be disclosed. The vendor indemnifies the client."
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'features.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        db = Session()
+        try:
+            for i in range(12):
+                db.add(Contract(contract_name=f"Contract {i}", raw_text=texts[i % 3] * (i + 1), risk_score=20 + 5 * i, risk_level="MEDIUM"))
+            db.commit()
+
+            store = ContractFeatureStore(Session, processes=1)
+            first, second = store.refresh(), store.refresh()
+            assert first["extracted"] == 12 and second["extracted"] == 0, (first, second)
+            print(f"  first refresh extracted {first['extracted']} contracts, the second {second['extracted']}")
+
+            watermark = store.feature_watermark()
+            assert store.count_training_rows(updated_after=watermark) == 0
+
+            edited = db.query(Contract).order_by(Contract.id).first()
+            edited.raw_text += " Late delivery incurs a penalty."
+            db.commit()
+            store.put(edited, db)
+            db.add(Contract(contract_name="Contract 12", raw_text=texts[0], risk_score=80, risk_level="HIGH"))
+            db.commit()
+            assert store.refresh()["extracted"] == 1
+            changed = store.count_training_rows(updated_after=watermark)
+            assert changed == 2 and store.feature_watermark() > watermark, f"{changed} rows past the watermark, expected 2"
+            print(f"  one edit and one new contract later, {changed} rows are past the watermark")
+
+            # Edits that bypass the API are only caught by re-hashing every stored contract
+            db.query(Contract).filter(Contract.id == edited.id).update({"raw_text": texts[1]})
+            db.commit()
+            assert store.refresh()["extracted"] == 0 and store.refresh(verify=True)["extracted"] == 1
+            print("  an out-of-band edit is skipped by refresh() and re-extracted by refresh(verify=True)")
+
+            ids, X, _ = store.load_training_matrix()
+            assert X.shape == (13, len(store.feature_names))
+            capped = ContractFeatureStore(Session, processes=1, holdout_max_rows=1)
+            holdout_ids, _, _ = capped.load_training_matrix(split="holdout")
+            train_ids, _, _ = capped.load_training_matrix(split="train")
+            assert len(holdout_ids) == 1 and sorted(holdout_ids + train_ids) == sorted(ids), (holdout_ids, train_ids)
+            print(f"  training matrix {X.shape}; a capped holdout of {len(holdout_ids)} leaves {len(train_ids)} rows to train on")
+        finally:
+            db.close()
+            engine.dispose()
+    print("✅ Feature store check passed!")
+
+def _slow_training(progress, mode):
+    for step in range(20):
+        progress("training", step / 20)
+        time.sleep(0.1)
+    return {"status": "success", "mode": mode}
+
+def _worker_running_a_job(jobs_dir, job_ids):
+    """A second 'uvicorn worker': starts a training job and stays up until it finishes"""
+    from app.services.ml_models.training_jobs import TrainingJobManager
+    manager = TrainingJobManager(_slow_training, jobs_dir)
+    job, _ = manager.submit("worker-2", "full")
+    job_ids.put(job.id)
+    while manager.get(job.id).active:
+        time.sleep(0.05)
+
+def check_training_job_guard():
+    """
+    Offline check of the one-job guard across workers, no server needed: while a job runs in
+    another process, submitting here returns that job instead of starting a second one, and
+    its progress and result are readable from this process.
+    """
+    from app.services.ml_models.training_jobs import TrainingJobManager
+
+    print("Checking the cross-worker training job guard...")
+    with tempfile.TemporaryDirectory() as jobs_dir:
+        context = multiprocessing.get_context("spawn")
+        job_ids = context.Queue()
+        worker = context.Process(target=_worker_running_a_job, args=(jobs_dir, job_ids))
+        worker.start()
+        running_id = job_ids.get(timeout=60)
+
+        def must_not_run(progress, mode):
+            raise AssertionError("a second training job started while another worker's job was running")
+
+        manager = TrainingJobManager(must_not_run, jobs_dir)
+        job, created = manager.submit("worker-1", "auto")
+        assert not created and job.id == running_id, f"submit started job {job.id} beside running job {running_id}"
+        print(f"  submit during worker 2's job {running_id[:8]} returned it ({job.status}, {job.mode}, progress {job.progress})")
+
+        worker.join(timeout=60)
+        finished = manager.get(running_id)
+        assert finished.status == "succeeded" and finished.result == {"status": "success", "mode": "full"}, finished.to_dict()
+        print(f"  worker 2's job finished: {finished.status}, visible from worker 1")
+
+        manager.run_training = _slow_training
+        job, created = manager.submit("worker-1", "auto")
+        assert created, "the training lock was not released when worker 2's job finished"
+        while manager.get(job.id).active:
+            time.sleep(0.05)
+        print(f"  the next submit started job {job.id[:8]}: {manager.get(job.id).status}")
+    print("✅ Training job guard check passed!")
+
 def test_ml_features():
     print("Testing ML Features...")
     print("=" * 50)
@@ -89,4 +217,6 @@ def test_ml_features():
     print("✅ ML Features Test Completed!")
 
 if __name__ == "__main__":
+    check_feature_store_refresh()
+    check_training_job_guard()
     test_ml_features()
\ No newline at end of file
@@ -1,9 +1,67 @@
 # test_similarity.py
 import requests
 import json
+import tempfile
+import numpy as np
 
 BASE_URL = "http://localhost:8000"
 
+def check_tenant_isolation():
+    """
+    Offline check of the per-tenant shards, no server needed: two "workers" (shard caches on one
+    data dir) index two tenants, each tenant's searches only ever return its own clauses, and
+    removing a tenant on one worker empties it on the other without touching the second tenant.
+    """
+    from app.services.vector_store.cache import ShardCache
+    from app.services.vector_store.shard import VectorShard, shard_key_for
+
+    print("Checking tenant isolation of the vector store...")
+    dim = 16
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as data_dir:
+        def load_shard(key):
+            shard = VectorShard(key, data_dir, dim)
+            shard.load()
+            return shard
+
+        worker_a = ShardCache(load_shard, 64 * 1024 * 1024)
+        worker_b = ShardCache(load_shard, 64 * 1024 * 1024)
+
+        tenants = {1: list(range(1, 41)), 2: list(range(101, 141))}
+        vectors = {}
+        for company_id, ids in tenants.items():
+            vectors[company_id] = rng.standard_normal((len(ids), dim)).astype('float32')
+            vectors[company_id] /= np.linalg.norm(vectors[company_id], axis=1, keepdims=True)
+            worker_a.get(shard_key_for(company_id)).add(
+                vectors[company_id],
+                [f"company {company_id} clause {i}" for i in ids],
+                [{"clause_type": "payment", "contract_id": company_id * 1000} for _ in ids],
+                ids=ids
+            )
+
+        # Querying with the other tenant's exact vectors still only finds this tenant's clauses
+        for company_id, other in ((1, 2), (2, 1)):
+            shard = worker_b.get(shard_key_for(company_id))
+            shard.sync(force=True)
+            _, found = shard.snapshot.search(vectors[other], 10)
+            leaked = set(found.ravel().tolist()) - {-1} - set(tenants[company_id])
+            assert not leaked, f"company {company_id} search returned company {other} clauses {sorted(leaked)}"
+            print(f"  company {company_id}: {len(shard)} clauses, no clauses of company {other} in its results")
+
+        # Tenant removal on worker A reaches worker B's loaded copy and a fresh load
+        removed = worker_a.get(shard_key_for(1))
+        dropped = removed.clear()
+        worker_a.drop(shard_key_for(1))
+        stale = worker_b.get(shard_key_for(1))
+        stale.sync(force=True)
+        assert dropped == 40 and len(stale) == 0, f"worker B still serves {len(stale)} clauses of the removed tenant"
+        assert len(load_shard(shard_key_for(1))) == 0, "the removed tenant came back on a fresh load"
+        survivor = worker_b.get(shard_key_for(2))
+        survivor.sync(force=True)
+        assert len(survivor) == 40, f"removing company 1 changed company 2 ({len(survivor)} clauses left)"
+        print(f"  company 1 removed on worker A: worker B and a fresh load see 0 clauses, company 2 keeps {len(survivor)}")
+    print("✅ Tenant isolation check passed!")
+
 def test_similarity_features():
     print("Testing Similarity Engine Features...")
     print("=" * 50)
@@ -119,4 +177,5 @@ def test_similarity_features():
     print("✅ Similarity engine test completed!")
 
 if __name__ == "__main__":
+    check_tenant_isolation()
     test_similarity_features()
\ No newline at end of file
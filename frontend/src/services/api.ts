@@ -111,6 +111,11 @@ export const api = {
       headers: getAuthHeaders()
     }).then(handleResponse),
 
-  trainModel: () =>
-    fetch(`${API_BASE}/ml/train`, { method: "POST", headers: getAuthHeaders() }).then(handleResponse),
+  // Starts a background retraining job; poll getTrainingJob(job_id) for progress.
+  // "auto" warm-starts from the current model when few contracts changed, "full" always refits
+  trainModel: (mode: "auto" | "full" | "incremental" = "auto") =>
+    fetch(`${API_BASE}/ml/train?mode=${mode}`, { method: "POST", headers: getAuthHeaders() }).then(handleResponse),
+
+  getTrainingJob: (jobId: string) =>
+    fetch(`${API_BASE}/ml/train/jobs/${jobId}`, { headers: getAuthHeaders() }).then(handleResponse),
 };
\ No newline at end of file